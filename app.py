@@ -1,16 +1,104 @@
 import streamlit as st
+import streamlit.components.v1 as components
+import csv
+import gzip
+import hashlib
+import hmac
+import io
 import json
+import mmap
 import os
-from datetime import datetime, timedelta
+import re
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import altair as alt
+import numpy as np
 import pandas as pd
-import pytz
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # 沒有 pyarrow 時分析匯出只提供 CSV
+    pa = None
 
-# 設定台灣時區
-TW_TZ = pytz.timezone('Asia/Taipei')
+# 設定台灣時區（台灣沒有日光節約時間，使用固定時差）
+TW_OFFSET_SECONDS = 8 * 3600
+TW_TZ = timezone(timedelta(seconds=TW_OFFSET_SECONDS), 'Asia/Taipei')
+
+class SystemClock:
+    """系統時鐘"""
+    def now_ts(self):
+        return time.time()
+
+class ManualClock:
+    """手動時鐘 - 測試或重播時固定、快轉時間"""
+    def __init__(self, start_ts):
+        self.ts = float(start_ts)
+    
+    def now_ts(self):
+        return self.ts
+    
+    def advance(self, seconds):
+        self.ts += seconds
+
+@st.cache_resource
+def _clock_holder():
+    """目前使用的時鐘（程序共用，可替換）"""
+    return {'clock': SystemClock()}
+
+@st.cache_resource
+def _iso_ts_cache():
+    """ISO時間字串 → 時間戳的快取（程序共用）"""
+    return {}
+
+def set_clock(clock):
+    """替換時鐘（例如 ManualClock），回傳原本的時鐘"""
+    holder = _clock_holder()
+    previous, holder['clock'] = holder['clock'], clock
+    return previous
+
+def get_taiwan_timestamp():
+    """獲取現在的時間戳"""
+    return _clock_holder()['clock'].now_ts()
 
 def get_taiwan_time():
     """獲取台灣時間"""
-    return datetime.now(TW_TZ)
+    return datetime.fromtimestamp(get_taiwan_timestamp(), TW_TZ)
+
+def format_ts(ts, fmt='%m/%d %H:%M:%S'):
+    """以台灣時間格式化時間戳"""
+    return time.strftime(fmt, time.gmtime(ts + TW_OFFSET_SECONDS))
+
+def _iso_to_ts(value):
+    """ISO時間字串轉時間戳（不經過快取）"""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TW_TZ)
+    return dt.timestamp()
+
+def parse_iso_ts(value):
+    """ISO時間字串轉時間戳（沒有時區資訊時視為台灣時間）"""
+    cache = _iso_ts_cache()
+    ts = cache.get(value)
+    if ts is None:
+        ts = _iso_to_ts(value)
+        if len(cache) >= 10000:
+            cache.clear()
+        cache[value] = ts
+    return ts
 
 # 頁面配置
 st.set_page_config(
@@ -20,7 +108,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 群組配置
+# 預設群組配置（groups.json 不存在時使用）
 GROUPS = {
     "艾瑞卡1": {"icon": "⚔️", "color": "#e74c3c", "file_prefix": "erika1"},
     "艾瑞卡2": {"icon": "🛡️", "color": "#3498db", "file_prefix": "erika2"},
@@ -34,7 +122,20 @@ GROUPS = {
 }
 
 # CSS 樣式
-def get_group_css(group_name, group_config):
+@st.cache_resource
+def _group_css_cache():
+    """群組CSS快取（程序共用）"""
+    return {}
+
+def get_group_css(group_name, group_config, cache=None):
+    """群組專屬CSS（依設定快取，啟動時預先產生）"""
+    key = (group_name, group_config['file_prefix'], group_config['color'])
+    cache = _group_css_cache() if cache is None else cache
+    if key not in cache:
+        cache[key] = _build_group_css(group_name, group_config)
+    return cache[key]
+
+def _build_group_css(group_name, group_config):
     return f"""
 <style>
     .main-header-{group_config['file_prefix']} {{
@@ -150,283 +251,3361 @@ def get_group_css(group_name, group_config):
         100% {{ box-shadow: 0 4px 15px rgba(255, 107, 107, 0.3); }}
     }}
     
-    .no-upcoming {{
-        background: #f8f9fa;
-        color: #6c757d;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        text-align: center;
-        border: 2px dashed #dee2e6;
-    }}
+    .no-upcoming {{
+        background: #f8f9fa;
+        color: #6c757d;
+        padding: 1rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+        text-align: center;
+        border: 2px dashed #dee2e6;
+    }}
+    
+    /* 通知設定樣式 */
+    .notification-settings {{
+        background: #e3f2fd;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 1rem 0;
+        border: 1px solid #bbdefb;
+    }}
+    
+    .notification-enabled {{
+        background: #d5f4e6;
+        border-color: #82c8a0;
+    }}
+    
+    .notification-disabled {{
+        background: #ffebee;
+        border-color: #ffab91;
+    }}
+</style>
+"""
+
+def format_kill_time(value):
+    """格式化擊殺時間字串"""
+    try:
+        return format_ts(parse_iso_ts(value), '%Y/%m/%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return "格式錯誤"
+
+# 只有時間（或月日）的輸入若比現在晚超過此秒數，視為最近一次已過去的日期
+TIME_PARSE_FUTURE_GRACE_SECONDS = 300
+
+def _nearest_past(now, candidate, step):
+    """若候選時間在未來，往前推一個週期（前一天或前一年）"""
+    if candidate - now > timedelta(seconds=TIME_PARSE_FUTURE_GRACE_SECONDS):
+        return step(candidate)
+    return candidate
+
+def _previous_year(candidate):
+    """前一年的同月同日（2/29 則往前找到閏年）"""
+    for years_back in range(1, 5):
+        try:
+            return candidate.replace(year=candidate.year - years_back)
+        except ValueError:
+            continue
+    return candidate
+
+def _month_day_time(now, month, day, hour, minute, second):
+    """月日時間 - 取最近一次已過去的年份"""
+    for years_back in range(0, 5):
+        try:
+            candidate = datetime(now.year - years_back, month, day, hour, minute, second, tzinfo=TW_TZ)
+            break
+        except ValueError:
+            # 2/29 在非閏年不存在，月日本身錯誤時五次都會失敗
+            continue
+    else:
+        raise ValueError("無效的日期")
+    return _nearest_past(now, candidate, _previous_year)
+
+def _time_of_day(now, hour, minute, second):
+    """時分秒 - 取最近一次已過去的日期"""
+    candidate = datetime.combine(now.date(), datetime(1900, 1, 1, hour, minute, second).time(), tzinfo=TW_TZ)
+    return _nearest_past(now, candidate, lambda dt: dt - timedelta(days=1))
+
+def _parse_just_now(match, now):
+    return now
+
+def _parse_relative(match, now):
+    hours, minutes, seconds = (int(value or 0) for value in match.group('h', 'm', 's'))
+    return now - timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+def _parse_full_date(match, now):
+    year, month, day, hour, minute = (int(value) for value in match.group('year', 'month', 'day', 'hour', 'minute'))
+    return datetime(year, month, day, hour, minute, int(match.group('second') or 0), tzinfo=TW_TZ)
+
+def _parse_month_day(match, now):
+    month, day, hour, minute = (int(value) for value in match.group('month', 'day', 'hour', 'minute'))
+    return _month_day_time(now, month, day, hour, minute, int(match.group('second') or 0))
+
+def _parse_time_of_day(match, now):
+    hour, minute = int(match.group('hour')), int(match.group('minute'))
+    return _time_of_day(now, hour, minute, int(match.group('second') or 0))
+
+class TimeExpressionParser:
+    """時間表達式解析器 - 依序套用已編譯的規則，可擴充新格式"""
+    def __init__(self):
+        self._rules = []
+    
+    def add_rule(self, pattern, handler):
+        """新增規則：pattern 需完整比對輸入，handler(match, now) 回傳台灣時區的 datetime"""
+        self._rules.append((re.compile(pattern, re.IGNORECASE), handler))
+    
+    def parse(self, text, now):
+        """以指定的現在時間解析單一輸入，無法解析時回傳None"""
+        text = text.strip()
+        for regex, handler in self._rules:
+            match = regex.fullmatch(text)
+            if match:
+                try:
+                    return handler(match, now)
+                except (ValueError, OverflowError):
+                    # 超出 datetime 範圍的數值（例如 -99999999999h）視為無法解析
+                    return None
+        return None
+    
+    def parse_many(self, texts, now=None):
+        """批次解析，所有輸入共用同一個現在時間"""
+        if now is None:
+            now = get_taiwan_time()
+        return [self.parse(text, now) for text in texts]
+
+@st.cache_resource
+def get_time_parser():
+    """建立時間解析器（每個程序只編譯一次）"""
+    parser = TimeExpressionParser()
+    # 剛剛 / 現在
+    parser.add_rule(r"剛剛|剛才|現在|now", _parse_just_now)
+    # -5m / -1h30m / -90s
+    parser.add_rule(r"-\s*(?=\d)(?:(?P<h>\d+)\s*h)?\s*(?:(?P<m>\d+)\s*m(?:in)?)?\s*(?:(?P<s>\d+)\s*s)?", _parse_relative)
+    # 5分鐘前 / 1小時20分前 / 30秒前
+    parser.add_rule(r"(?=\d)(?:(?P<h>\d+)\s*(?:個)?小時)?\s*(?:(?P<m>\d+)\s*分(?:鐘)?)?\s*(?:(?P<s>\d+)\s*秒(?:鐘)?)?\s*前", _parse_relative)
+    # 2025/08/11 16:30[:45] 或 2025-08-11T16:30[:45]
+    parser.add_rule(r"(?P<year>\d{4})[/-](?P<month>\d{1,2})[/-](?P<day>\d{1,2})[ T](?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?", _parse_full_date)
+    # 0811/163045
+    parser.add_rule(r"(?P<month>\d{2})(?P<day>\d{2})/(?P<hour>\d{2})(?P<minute>\d{2})(?P<second>\d{2})", _parse_month_day)
+    # 08/11 16:30[:45]
+    parser.add_rule(r"(?P<month>\d{1,2})/(?P<day>\d{1,2})\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?", _parse_month_day)
+    # 16:30[:45]
+    parser.add_rule(r"(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?", _parse_time_of_day)
+    # 163045 / 1630
+    parser.add_rule(r"(?P<hour>\d{2})(?P<minute>\d{2})(?P<second>\d{2})?", _parse_time_of_day)
+    return parser
+
+# 歷史快照間隔（每記錄幾筆擊殺事件寫入一次完整快照）
+HISTORY_SNAPSHOT_INTERVAL = 50
+
+class KillHistory:
+    """擊殺歷史 - 事件日誌加上定期快照，支援任意時間點回溯"""
+    def __init__(self, group_prefix):
+        self.log_file = f"{group_prefix}_history.jsonl"
+        self.snapshot_file = f"{group_prefix}_snapshots.jsonl"
+        self._snapshot_ts = None       # 快照時間戳（遞增）
+        self._snapshot_offsets = None  # 快照在檔案中的位置
+        self._events_since_snapshot = 0
+    
+    def preload(self):
+        """預先建立快照索引，之後第一次查詢或記錄時不需要讀取快照檔"""
+        self._load_snapshot_index()
+        return len(self._snapshot_ts)
+    
+    def _load_snapshot_index(self):
+        """建立快照索引（只讀取時間與位置，不解析完整內容）"""
+        if self._snapshot_ts is not None:
+            return
+        self._snapshot_ts = []
+        self._snapshot_offsets = []
+        last_log_offset = None
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'rb') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        snapshot = json.loads(line)
+                        self._snapshot_ts.append(_iso_to_ts(snapshot['ts']))
+                        self._snapshot_offsets.append(offset)
+                        last_log_offset = snapshot['log_offset']
+                    except (ValueError, KeyError):
+                        pass
+                    offset += len(line)
+        # 計算最後一個快照之後的事件數
+        if last_log_offset is not None and os.path.exists(self.log_file):
+            with open(self.log_file, 'rb') as f:
+                f.seek(last_log_offset)
+                self._events_since_snapshot = sum(1 for _ in f)
+    
+    def _log_size(self):
+        return os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+    
+    def _write_snapshot(self, bosses, ts):
+        """寫入完整快照"""
+        with open(self.snapshot_file, 'ab') as f:
+            offset = f.tell()
+            line = json.dumps({
+                'ts': ts,
+                'log_offset': self._log_size(),
+                'bosses': bosses
+            }, ensure_ascii=False) + "\n"
+            f.write(line.encode('utf-8'))
+        self._snapshot_ts.append(_iso_to_ts(ts))
+        self._snapshot_offsets.append(offset)
+        self._events_since_snapshot = 0
+    
+    def append(self, events, bosses_before):
+        """依序寫入一批擊殺事件 [(ISO時間, BOSS名稱, 擊殺時間或None)]，bosses_before 為事件前的狀態；
+        每 HISTORY_SNAPSHOT_INTERVAL 筆寫入一次當時的完整快照"""
+        if not events:
+            return
+        self._load_snapshot_index()
+        bosses = {name: dict(data) for name, data in bosses_before.items()}
+        # 第一次記錄時先保存變更前的狀態作為起點
+        if not self._snapshot_ts:
+            self._write_snapshot(bosses, events[0][0])
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            for ts, boss_name, last_killed in events:
+                f.write(json.dumps({'ts': ts, 'boss': boss_name, 'last_killed': last_killed}, ensure_ascii=False) + "\n")
+                if boss_name in bosses:
+                    bosses[boss_name]['last_killed'] = last_killed
+                self._events_since_snapshot += 1
+                if self._events_since_snapshot >= HISTORY_SNAPSHOT_INTERVAL:
+                    f.flush()
+                    self._write_snapshot(bosses, ts)
+    
+    def last_event_ts(self):
+        """最後一筆事件或快照的時間戳（沒有記錄時為None）"""
+        self._load_snapshot_index()
+        last_ts = self._snapshot_ts[-1] if self._snapshot_ts else None
+        size = self._log_size()
+        if size:
+            with open(self.log_file, 'rb') as f:
+                f.seek(max(0, size - 4096))
+                for line in reversed(f.read().splitlines()):
+                    try:
+                        event_ts = _iso_to_ts(json.loads(line)['ts'])
+                    except (ValueError, KeyError):
+                        continue
+                    return event_ts if last_ts is None else max(last_ts, event_ts)
+        return last_ts
+    
+    def state_at(self, when):
+        """回溯指定時間點的BOSS狀態（最近快照 + 重播之後的事件），無記錄時回傳None"""
+        self._load_snapshot_index()
+        target = when.timestamp()
+        pos = bisect_right(self._snapshot_ts, target) - 1
+        if pos < 0:
+            return None
+        
+        with open(self.snapshot_file, 'rb') as f:
+            f.seek(self._snapshot_offsets[pos])
+            snapshot = json.loads(f.readline())
+        bosses = snapshot['bosses']
+        
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'rb') as f:
+                f.seek(snapshot['log_offset'])
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                        event_ts = parse_iso_ts(event['ts'])
+                        boss_name, last_killed = event['boss'], event['last_killed']
+                    except (ValueError, KeyError, TypeError):
+                        continue  # 不完整或格式錯誤的行
+                    if event_ts > target:
+                        break
+                    if boss_name in bosses:
+                        bosses[boss_name]['last_killed'] = last_killed
+        return bosses
+    
+    def diff(self, start, end):
+        """比較兩個時間點之間擊殺記錄的差異"""
+        before = self.state_at(start) or {}
+        after = self.state_at(end) or {}
+        changes = []
+        for boss_name in after:
+            old = before.get(boss_name, {}).get('last_killed')
+            new = after[boss_name].get('last_killed')
+            if old != new:
+                changes.append((boss_name, old, new))
+        return changes
+
+class BossNameIndex:
+    """BOSS名稱索引 - 以字首樹查詢名稱、別名與縮寫"""
+    def __init__(self, bosses, aliases=None):
+        # 依重生時間排序的名稱（表格與下拉選單共用）
+        self.sorted_names = [name for name, _ in sorted(bosses.items(), key=lambda x: x[1]['respawn_minutes'])]
+        self.positions = {name: i for i, name in enumerate(self.sorted_names)}
+        self.aliases = {alias: name for alias, name in (aliases or {}).items() if name in self.positions}
+        # 節點: [子節點, 經過此節點的BOSS位置]
+        self._root = [{}, set()]
+        for name in self.sorted_names:
+            self._insert_suffixes(name, self.positions[name])
+        for alias, name in self.aliases.items():
+            self._insert_suffixes(alias, self.positions[name])
+    
+    def _insert_suffixes(self, key, position):
+        """插入鍵的所有後綴，讓名稱中間的片段也能查到"""
+        key = key.lower()
+        for start in range(len(key)):
+            node = self._root
+            for char in key[start:]:
+                node = node[0].setdefault(char, [{}, set()])
+                node[1].add(position)
+    
+    def search(self, text):
+        """查詢名稱或別名包含該文字的BOSS位置（依重生時間排序）"""
+        node = self._root
+        for char in text.strip().lower():
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return sorted(node[1])
+    
+    def candidates(self, text):
+        """查詢符合的BOSS名稱，開頭相符者優先"""
+        text = text.strip().lower()
+        if not text:
+            return []
+        names = [self.sorted_names[i] for i in self.search(text)]
+        starts = {self.aliases[alias] for alias in self.aliases if alias.lower().startswith(text)}
+        return sorted(names, key=lambda name: not (name.lower().startswith(text) or name in starts))
+    
+    def resolve(self, text):
+        """將輸入解析為唯一的BOSS名稱，無法確定時回傳None"""
+        text = text.strip()
+        if text in self.positions:
+            return text
+        if text in self.aliases:
+            return self.aliases[text]
+        names = self.candidates(text)
+        if len(names) == 1:
+            return names[0]
+        prefixed = [name for name in names if name.lower().startswith(text.lower())]
+        return prefixed[0] if len(prefixed) == 1 else None
+    
+    def mask(self, names):
+        """名稱集合轉為位元遮罩（第i位對應 sorted_names[i]，不在名冊中的名稱忽略）"""
+        mask = 0
+        for name in names:
+            position = self.positions.get(name)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+def positions_mask(positions):
+    """位置清單轉為位元遮罩"""
+    mask = 0
+    for position in positions:
+        mask |= 1 << position
+    return mask
+
+def spread_mask(mask, blocks, block_size):
+    """將一個區塊的遮罩複製到每個頻道區塊（多頻道表格依頻道串接）"""
+    spread = 0
+    for block in range(blocks):
+        spread |= mask << (block * block_size)
+    return spread
+
+def mask_positions(mask):
+    """位元遮罩轉為遞增的位置清單"""
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+def mask_array(mask, size):
+    """位元遮罩轉為長度為 size 的布林陣列"""
+    data = np.frombuffer(mask.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(data, bitorder='little')[:size].astype(bool)
+
+def upcoming_entry(boss_name, respawn_ts, now_ts):
+    """即將重生清單的項目（剩餘時間以 now_ts 計算）"""
+    time_until_respawn = respawn_ts - now_ts
+    minutes_left = int(time_until_respawn / 60)
+    seconds_left = int(time_until_respawn % 60)
+    return {
+        'name': boss_name,
+        'respawn_ts': respawn_ts,
+        'respawn_time': format_ts(respawn_ts, '%H:%M:%S'),
+        'time_left': f"{minutes_left}m{seconds_left}s" if minutes_left > 0 else f"{seconds_left}s",
+        'minutes_left': minutes_left,
+        'seconds_left': seconds_left
+    }
+
+# 預設BOSS名冊 {名稱: 重生分鐘}（base_roster.json 不存在時使用）
+DEFAULT_ROSTER = {
+    "佩爾利斯": 120,
+    "巴實那": 150,
+    "采爾圖巴": 180,
+    "潘納洛德": 180,
+    "安庫拉": 210,
+    "坦佛斯特": 210,
+    "史坦": 240,
+    "布賴卡": 240,
+    "魔圖拉": 240,
+    "特倫巴": 270,
+    "提米特利斯": 300,
+    "塔金": 300,
+    "雷比魯": 300,
+    "凱索思": 360,
+    "巨蟻女王": 360,
+    "卡雷斯": 360,
+    "貝希莫斯": 360,
+    "希瑟雷蒙": 360,
+    "塔拉金": 420,
+    "沙勒卡": 420,
+    "梅杜莎": 420,
+    "賽魯": 450,
+    "潘柴特": 480,
+    "突變克魯瑪": 480,
+    "被汙染的克魯瑪": 480,
+    "卡坦": 480,
+    "提米妮爾": 480,
+    "瓦柏": 480,
+    "克拉奇": 480,
+    "弗林特": 480,
+    "蘭多勒": 480,
+    "費德": 540,
+    "寇倫": 600,
+    "瑪杜克": 600,
+    "薩班": 720,
+    "核心基座": 720,
+    "猛龍獸": 720,
+    "黑色蕾爾莉": 720,
+    "司穆艾爾": 720,
+    "卡布里歐": 720,
+    "安德拉斯": 720,
+    "忘卻之鏡": 720,
+    "納伊阿斯": 720,
+    "希拉": 720,
+    "姆夫": 720,
+    "諾勒姆斯": 1080,
+    "烏坎巴": 1080,
+    "伊波斯": 1080,
+    "凱都都": 1080,
+    "伊格尼思": 1080,
+    "奧爾芬": 1440,
+    "哈普": 1440,
+    "歐克斯": 1440,
+    "塔那透斯": 1440,
+    "鳳凰": 1440,
+    "摩德烏斯": 1440,
+    "霸拉克": 1440,
+    "薩拉克斯": 1440,
+    "巴倫": 1440,
+    "黑卡頓": 1440,
+    "拉何": 1980
+}
+
+# 所有群組共用的基礎名冊
+BASE_ROSTER_FILE = "base_roster.json"
+
+class RosterStore:
+    """BOSS名冊 - 共用基礎名冊加上各群組的差異設定，合併結果依檔案快取，版本由有效名冊的內容推導"""
+    def __init__(self, base_file=BASE_ROSTER_FILE):
+        self.base_file = base_file
+        self._files = {}      # 檔案路徑 -> (修改時間, 內容)
+        self._effective = {}  # 群組 -> (基礎名冊, 群組差異, 版本, 有效名冊)
+        self._lock = threading.RLock()
+    
+    def _overlay_file(self, group_prefix):
+        return f"{group_prefix}_roster.json"
+    
+    def _read(self, path, default):
+        """讀取名冊檔案（檔案未變更時使用快取）"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = self._files.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        data = default()
+        if mtime is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"名冊載入錯誤 {path}: {e}")  # 使用預設值
+        self._files[path] = (mtime, data)
+        return data
+    
+    def base(self):
+        """基礎名冊 {'bosses': {名稱: 重生分鐘}}"""
+        with self._lock:
+            return self._read(self.base_file, lambda: {'bosses': dict(DEFAULT_ROSTER)})
+    
+    def overlay(self, group_prefix):
+        """群組差異 {'add': {名稱: 分鐘}, 'remove': [名稱], 'respawn': {名稱: 分鐘}}"""
+        with self._lock:
+            return self._read(self._overlay_file(group_prefix), lambda: {'add': {}, 'remove': [], 'respawn': {}})
+    
+    def effective(self, group_prefix):
+        """群組的有效名冊，回傳 (名冊版本, {名稱: 重生分鐘})"""
+        with self._lock:
+            base = self.base()
+            overlay = self.overlay(group_prefix)
+            cached = self._effective.get(group_prefix)
+            if cached is not None and cached[0] is base and cached[1] is overlay:
+                return cached[2], cached[3]
+            
+            roster = dict(base['bosses'])
+            for name in overlay.get('remove', []):
+                roster.pop(name, None)
+            roster.update(overlay.get('add', {}))
+            for name, minutes in overlay.get('respawn', {}).items():
+                if name in roster:
+                    roster[name] = minutes
+            # 版本是有效名冊內容的雜湊：手動編輯檔案也會改變，內容相同時不變
+            version = hashlib.sha1(json.dumps(roster, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+            self._effective[group_prefix] = (base, overlay, version, roster)
+            return version, roster
+    
+    def _write(self, path, data):
+        data.pop('version', None)  # 舊格式的手動版本號，版本改由內容推導
+        # 先寫暫存檔再替換，中斷時不會留下不完整的名冊（基礎名冊由所有群組共用）
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    
+    def set_base_respawn(self, boss_name, minutes):
+        """修改基礎名冊的重生時間（所有群組一起生效）"""
+        with self._lock:
+            base = json.loads(json.dumps(self.base()))
+            base['bosses'][boss_name] = minutes
+            self._write(self.base_file, base)
+    
+    def update_overlay(self, group_prefix, add=None, remove=None, respawn=None, reset=None):
+        """修改群組差異：新增BOSS、移除BOSS、覆寫重生時間或還原為基礎名冊"""
+        with self._lock:
+            overlay = json.loads(json.dumps(self.overlay(group_prefix)))
+            overlay.setdefault('add', {})
+            overlay.setdefault('remove', [])
+            overlay.setdefault('respawn', {})
+            for name, minutes in (add or {}).items():
+                overlay['add'][name] = minutes
+                if name in overlay['remove']:
+                    overlay['remove'].remove(name)
+            for name in remove or []:
+                overlay['add'].pop(name, None)
+                overlay['respawn'].pop(name, None)
+                if name not in overlay['remove']:
+                    overlay['remove'].append(name)
+            overlay['respawn'].update(respawn or {})
+            for name in reset or []:
+                overlay['add'].pop(name, None)
+                overlay['respawn'].pop(name, None)
+                if name in overlay['remove']:
+                    overlay['remove'].remove(name)
+            self._write(self._overlay_file(group_prefix), overlay)
+
+@st.cache_resource
+def get_roster_store():
+    """程序共用的BOSS名冊"""
+    return RosterStore()
+
+WATCHLIST_FILE = "watchlists.json"
+
+def valid_member_id(member_id):
+    """成員代號：1-32個英數字、底線或連字號"""
+    return re.fullmatch(r"[\w-]{1,32}", member_id or "") is not None
+
+class WatchlistStore:
+    """成員關注清單 - {'members': {成員代號: {群組: [BOSS名稱]}}}，檔案未變更時使用快取"""
+    def __init__(self, path=WATCHLIST_FILE):
+        self.path = path
+        self._cache = (None, {'members': {}})
+        self._lock = threading.RLock()
+    
+    def _read(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._cache[0]:
+            data = {'members': {}}
+            if mtime is not None:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"關注清單載入錯誤: {e}")
+            self._cache = (mtime, data)
+        return self._cache[1]
+    
+    def get(self, member_id, group_prefix):
+        """成員在群組的關注BOSS名稱"""
+        with self._lock:
+            return list(self._read()['members'].get(member_id, {}).get(group_prefix, []))
+    
+    def set(self, member_id, group_prefix, names):
+        """保存成員在群組的關注清單（空清單會移除）"""
+        with self._lock:
+            data = json.loads(json.dumps(self._read()))
+            groups = data['members'].setdefault(member_id, {})
+            if names:
+                groups[group_prefix] = list(names)
+            else:
+                groups.pop(group_prefix, None)
+                if not groups:
+                    del data['members'][member_id]
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+
+@st.cache_resource
+def get_watchlist_store():
+    """程序共用的成員關注清單"""
+    return WatchlistStore()
+
+# 預設頻道（舊數據與只有一個頻道的群組都記錄在此頻道）
+DEFAULT_CHANNEL = 1
+
+def channel_label(channel):
+    """頻道顯示名稱"""
+    return f"{channel}頻"
+
+# 是否同時寫入二進位快照（載入速度較快，JSON 仍是主要與匯出格式）
+BINARY_SNAPSHOT_ENABLED = os.environ.get("BOSS_BINARY_SNAPSHOT", "0") == "1"
+# 二進位快照：檔頭 + BOSS名稱表 + 每筆一個 int64 擊殺時間（微秒，未擊殺為最小值）+ 每筆一個 int64 頻道
+# （第1版沒有頻道欄位，全部屬於預設頻道）
+SNAPSHOT_MAGIC = b"L2MB"
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('<4sHHIII')  # magic, 格式版本, 保留, 記錄數, 名稱表長度, CRC32
+SNAPSHOT_NO_KILL = -2 ** 63
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+class BossDataError(ValueError):
+    """BOSS數據檔案格式錯誤"""
+
+def validate_boss_data(data):
+    """驗證BOSS數據檔案內容，回傳 ({頻道: {BOSS名稱: ISO時間}}, 是否為舊格式)"""
+    if not isinstance(data, dict):
+        raise BossDataError("最外層必須是物件")
+    if isinstance(data.get('last_killed'), dict):
+        kills, legacy = data['last_killed'], False
+    else:
+        # 舊格式：每個BOSS都存了重生時間
+        kills, legacy = {}, True
+        for name, boss_data in data.items():
+            if not isinstance(boss_data, dict) or 'last_killed' not in boss_data:
+                raise BossDataError(f"{name}: 缺少 last_killed")
+            minutes = boss_data.get('respawn_minutes')
+            if not isinstance(minutes, int) or isinstance(minutes, bool) or minutes <= 0:
+                raise BossDataError(f"{name}: respawn_minutes 必須是正整數")
+            kills[name] = boss_data['last_killed']
+    channel_kills = {DEFAULT_CHANNEL: kills}
+    # 其他頻道：{"channels": {"2": {BOSS名稱: ISO時間}}}
+    channels = {} if legacy else data.get('channels', {})
+    if not isinstance(channels, dict):
+        raise BossDataError("channels 必須是物件")
+    for channel, kills in channels.items():
+        if not channel.isdigit() or int(channel) < 1 or not isinstance(kills, dict):
+            raise BossDataError(f"頻道 {channel}: 格式錯誤")
+        channel_kills[int(channel)] = kills
+    for channel, kills in channel_kills.items():
+        for name, value in kills.items():
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                raise BossDataError(f"{channel_label(channel)} {name}: 擊殺時間必須是字串")
+            try:
+                parse_iso_ts(value)
+            except ValueError:
+                raise BossDataError(f"{channel_label(channel)} {name}: 無法解析擊殺時間 {value!r}")
+    return channel_kills, legacy
+
+def write_boss_snapshot(path, channel_kills):
+    """寫入二進位快照 channel_kills: {頻道: {BOSS名稱: ISO時間}}（先寫暫存檔再替換，避免留下不完整的檔案）"""
+    entries = [(channel, name, value) for channel, kills in sorted(channel_kills.items()) for name, value in kills.items()]
+    names = [name for _, name, _ in entries]
+    names_block = "\0".join(names).encode('utf-8')
+    names_block += b"\0" * (-(SNAPSHOT_HEADER.size + len(names_block)) % 8)
+    records = array('q', (
+        SNAPSHOT_NO_KILL if value is None else round(parse_iso_ts(value) * 1_000_000)
+        for _, _, value in entries
+    ))
+    channels = array('q', (channel for channel, _, _ in entries))
+    body = names_block + records.tobytes() + channels.tobytes()
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, 0, len(names), len(names_block), zlib.crc32(body)))
+        f.write(body)
+    os.replace(temp_path, path)
+
+def read_boss_snapshot(path):
+    """以 mmap 讀取二進位快照，回傳 {頻道: {BOSS名稱: ISO時間或None}}"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < SNAPSHOT_HEADER.size:
+            raise BossDataError("快照檔案不完整")
+        magic, version, _, count, names_len, checksum = SNAPSHOT_HEADER.unpack_from(mm, 0)
+        if magic != SNAPSHOT_MAGIC or version not in (1, SNAPSHOT_FORMAT_VERSION):
+            raise BossDataError("不是可識別的快照檔案")
+        records_start = SNAPSHOT_HEADER.size + names_len
+        record_size = 8 if version == 1 else 16
+        if names_len % 8 != (-SNAPSHOT_HEADER.size) % 8 or len(mm) != records_start + count * record_size:
+            raise BossDataError("快照檔案長度不符")
+        if zlib.crc32(mm[SNAPSHOT_HEADER.size:]) != checksum:
+            raise BossDataError("快照檔案校驗失敗")
+        try:
+            names = mm[SNAPSHOT_HEADER.size:records_start].rstrip(b"\0").decode('utf-8').split("\0") if count else []
+        except UnicodeDecodeError:
+            raise BossDataError("BOSS名稱編碼錯誤")
+        if len(names) != count:
+            raise BossDataError("BOSS數量不符")
+        records = array('q')
+        records.frombytes(mm[records_start:records_start + count * 8])
+        channels = array('q')
+        if version == 1:
+            channels.extend([DEFAULT_CHANNEL] * count)
+        else:
+            channels.frombytes(mm[records_start + count * 8:])
+    channel_kills = {DEFAULT_CHANNEL: {}}
+    try:
+        for name, micros, channel in zip(names, records, channels):
+            if channel < 1:
+                raise BossDataError("頻道編號錯誤")
+            channel_kills.setdefault(channel, {})[name] = (
+                None if micros == SNAPSHOT_NO_KILL else (_EPOCH + timedelta(microseconds=micros)).astimezone(TW_TZ).isoformat()
+            )
+    except OverflowError:
+        raise BossDataError("擊殺時間超出範圍")
+    return channel_kills
+
+# 即將重生提醒的時間範圍（分鐘）
+RENDER_UPCOMING_MINUTES = 5
+# 渲染快取最多保留的項目數
+RENDER_CACHE_MAX_ENTRIES = 64
+# 表格每頁行數（只傳送目前頁面的資料）
+TABLE_PAGE_SIZE = int(os.environ.get("TABLE_PAGE_SIZE", 50))
+# 表格排序方式（排序索引隨畫面數據快取，由伺服器排序後分頁）
+TABLE_SORT_OPTIONS = {
+    "default": "📋 預設（重生時間長短）",
+    "next_respawn": "⏰ 下次重生",
+    "last_killed": "🗡️ 最近擊殺",
+    "name": "🔤 BOSS名稱",
+}
+
+def table_sort_orders(df, countdown):
+    """表格各排序方式的行順序（未記錄的BOSS排在最後）"""
+    respawn = np.array([np.inf if respawn_ts is None else respawn_ts for _, respawn_ts, _ in countdown], dtype=np.float64)
+    killed = np.array([np.inf if respawn_ts is None else minutes * 60 - respawn_ts for _, respawn_ts, minutes in countdown], dtype=np.float64)
+    return {
+        'default': np.arange(len(df)),
+        'next_respawn': np.argsort(respawn, kind='stable'),
+        'last_killed': np.argsort(killed, kind='stable'),
+        'name': np.argsort(df['BOSS名稱'].to_numpy(dtype=str), kind='stable'),
+    }
+
+class RenderCache:
+    """群組畫面快取 - 以 (群組, 數據版本, 分鐘) 為鍵跨 session 共用，LRU 淘汰"""
+    def __init__(self, max_entries=RENDER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._building = {}  # 鍵 -> 建立中的 Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+    
+    def get_or_build(self, key, build):
+        """取得快取內容，沒有時呼叫 build() 建立（同一個鍵只建立一次，其他 session 等待同一個結果；建立時不持有快取的鎖）"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            future = self._building.get(key)
+            building = future is None
+            if building:
+                future = self._building[key] = Future()
+            else:
+                self.hits += 1
+        if not building:
+            return future.result()
+        try:
+            value = build()
+        except BaseException as e:
+            with self._lock:
+                del self._building[key]
+            future.set_exception(e)  # 等待中的 session 也收到錯誤，下一次重新建立
+            raise
+        with self._lock:
+            del self._building[key]
+            self.builds += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+    
+    def sizes(self):
+        """各群組快取內容的估算大小 {群組: 位元組}"""
+        with self._lock:
+            entries = list(self._entries.items())
+        sizes = {}
+        for key, value in entries:
+            sizes[key[0]] = sizes.get(key[0], 0) + deep_getsizeof(value)
+        return sizes
+    
+    def invalidate(self, group_prefix):
+        """群組數據保存後移除該群組的快取"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == group_prefix]:
+                del self._entries[key]
+
+@st.cache_resource
+def get_render_cache():
+    """程序共用的渲染快取"""
+    return RenderCache()
+
+# 即時倒數表格（在瀏覽器每秒更新，只有數據變更時才重新傳送）
+COUNTDOWN_TABLE_TEMPLATE = """
+<style>
+    body { margin: 0; font-family: "Source Sans Pro", sans-serif; font-size: 14px; }
+    table { width: 100%; border-collapse: collapse; }
+    th { position: sticky; top: 0; background: #f0f2f6; text-align: left; padding: 6px 8px; }
+    td { padding: 6px 8px; border-bottom: 1px solid #eee; }
+    tr.ready td.status { color: #1e8e3e; font-weight: bold; }
+    tr.soon td.status { color: #d93025; font-weight: bold; }
+    tr.waiting td.status { color: #e37400; }
+    tr.normal td { color: #888; }
+</style>
+<table>
+    <thead><tr><th>BOSS名稱</th><th>重生時間</th><th>下次重生</th><th>狀態</th></tr></thead>
+    <tbody id="rows"></tbody>
+</table>
+<script>
+(function() {
+    // [名稱, 重生時間戳(秒, 未記錄為null), 重生分鐘]
+    const bosses = __DATA__;
+    const statusFilter = __FILTER__;
+    const tbody = document.getElementById('rows');
+    const pad = n => String(n).padStart(2, '0');
+    // 以台灣時間 (UTC+8) 格式化
+    const formatTime = ts => {
+        const d = new Date((ts + 8 * 3600) * 1000);
+        return `${pad(d.getUTCMonth() + 1)}/${pad(d.getUTCDate())} ${pad(d.getUTCHours())}:${pad(d.getUTCMinutes())}:${pad(d.getUTCSeconds())}`;
+    };
+    const formatPeriod = m => m >= 60 ? (m % 60 ? `${Math.floor(m / 60)}h${m % 60}m` : `${m / 60}h`) : `${m}m`;
+    const rows = bosses.map(([name, respawn, minutes]) => {
+        const tr = document.createElement('tr');
+        tr.innerHTML = `<td></td><td>${formatPeriod(minutes)}</td><td>${respawn === null ? '等待擊殺' : formatTime(respawn)}</td><td class="status"></td>`;
+        tr.cells[0].textContent = name;
+        return {tr, respawn};
+    });
+    
+    function tick() {
+        const now = Date.now() / 1000;
+        for (const row of rows) {
+            if (row.respawn === null) {
+                row.type = 'normal'; row.text = '⚪ 未記錄'; row.order = Infinity;
+            } else if (now >= row.respawn) {
+                row.type = 'ready'; row.text = '✅ 已重生'; row.order = -1e12 + row.respawn;
+            } else {
+                const left = Math.floor(row.respawn - now);
+                const h = Math.floor(left / 3600), m = Math.floor(left % 3600 / 60), s = left % 60;
+                row.type = 'waiting';
+                row.text = h > 0 ? `⏳ ${h}h${m}m${pad(s)}s` : `⏳ ${m}m${pad(s)}s`;
+                row.order = row.respawn;
+            }
+            row.tr.className = row.type === 'waiting' && row.respawn - now <= 300 ? 'soon' : row.type;
+            row.tr.cells[3].textContent = row.text;
+        }
+        const visible = rows.filter(row => !statusFilter.length || statusFilter.includes(row.type));
+        visible.sort((a, b) => a.order - b.order);
+        tbody.replaceChildren(...visible.map(row => row.tr));
+    }
+    tick();
+    setInterval(tick, 1000);
+})();
+</script>
+"""
+
+def get_countdown_table_html(countdown_rows, status_filter):
+    """即時倒數表格的 HTML（內容只隨數據與篩選條件改變）"""
+    return (COUNTDOWN_TABLE_TEMPLATE
+            .replace("__DATA__", json.dumps(countdown_rows, ensure_ascii=False).replace("</", "<\\/"))
+            .replace("__FILTER__", json.dumps(list(status_filter))))
+
+OFFLINE_SYNC_TEMPLATE = """
+<style>
+    body { margin: 0; font-family: "Source Sans Pro", sans-serif; font-size: 14px; }
+    .row { display: flex; gap: 8px; }
+    select { flex: 1; padding: 8px; font-size: 15px; }
+    button { padding: 8px 14px; font-size: 15px; border: none; border-radius: 6px; background: #ff4b4b; color: white; }
+    #status { margin: 8px 0 4px; color: #555; }
+    ul { margin: 0; padding-left: 18px; color: #888; max-height: 80px; overflow-y: auto; }
+</style>
+<div class="row">
+    <select id="channel"></select>
+    <select id="boss"></select>
+    <button id="record">📍 記錄現在時間</button>
+</div>
+<div id="status"></div>
+<ul id="queue"></ul>
+<script>
+(function() {
+    const names = __NAMES__;
+    const channels = __CHANNELS__;
+    const syncUrl = __SYNC_URL__;
+    const storageKey = __STORAGE_KEY__;
+    const select = document.getElementById('boss');
+    for (const name of names) {
+        const option = document.createElement('option');
+        option.textContent = name;
+        select.appendChild(option);
+    }
+    const channelSelect = document.getElementById('channel');
+    for (const channel of channels) {
+        const option = document.createElement('option');
+        option.value = channel;
+        option.textContent = `${channel}頻`;
+        channelSelect.appendChild(option);
+    }
+    if (channels.length < 2) channelSelect.style.display = 'none';
+    const pad = n => String(n).padStart(2, '0');
+    // 以台灣時間 (UTC+8) 格式化
+    const formatTime = ts => {
+        const d = new Date((ts + 8 * 3600) * 1000);
+        return `${pad(d.getUTCHours())}:${pad(d.getUTCMinutes())}:${pad(d.getUTCSeconds())}`;
+    };
+    // 佇列項目: [冪等鍵, BOSS名稱, 擊殺時間戳(秒), 頻道]
+    const load = () => { try { return JSON.parse(localStorage.getItem(storageKey)) || []; } catch (e) { return []; } };
+    const store = queue => localStorage.setItem(storageKey, JSON.stringify(queue));
+    const newKey = () => (crypto.randomUUID ? crypto.randomUUID() : Date.now().toString(36) + Math.random().toString(36).slice(2));
+    let syncing = false;
+    
+    function render(message) {
+        const queue = load();
+        document.getElementById('status').textContent = message ||
+            (queue.length ? `🟠 ${queue.length} 筆待同步` : '🟢 已全部同步');
+        const list = document.getElementById('queue');
+        list.innerHTML = '';
+        for (const [, name, ts, channel] of queue) {
+            const li = document.createElement('li');
+            li.textContent = channels.length > 1 ? `${name} (${channel}頻) ${formatTime(ts)}` : `${name} ${formatTime(ts)}`;
+            list.appendChild(li);
+        }
+    }
+    
+    async function flush() {
+        const batch = load().slice(0, __MAX_BATCH__);
+        if (syncing || !batch.length || !navigator.onLine) return render();
+        syncing = true;
+        try {
+            // text/plain 不會觸發 CORS 預檢，少一次往返
+            const response = await fetch(syncUrl, {method: 'POST', body: JSON.stringify({kills: batch}), keepalive: true,
+                                                   headers: {'Content-Type': 'text/plain'}});
+            if (!response.ok) throw new Error(response.status);
+            const acked = new Set((await response.json()).acked);
+            store(load().filter(item => !acked.has(item[0])));
+            syncing = false;
+            if (load().length && acked.size) return flush();
+            render();
+        } catch (e) {
+            syncing = false;
+            render(`🔴 離線中，${load().length} 筆待同步`);
+        }
+    }
+    
+    document.getElementById('record').addEventListener('click', () => {
+        const queue = load();
+        queue.push([newKey(), select.value, Math.floor(Date.now() / 1000), Number(channelSelect.value)]);
+        store(queue);
+        render();
+        flush();
+    });
+    window.addEventListener('online', flush);
+    setInterval(flush, __RETRY_MS__);
+    flush();
+})();
+</script>
+"""
+
+# 同一BOSS在此秒數內的多筆擊殺回報視為同一次擊殺（保留最早的時間，其餘記為確認）
+KILL_DEDUP_SECONDS = int(os.environ.get("BOSS_KILL_DEDUP_SECONDS", 60))
+# 早於此天數的擊殺回報不接受（離線佇列最多保留這麼久）
+REPORT_MAX_AGE_DAYS = int(os.environ.get("BOSS_REPORT_MAX_AGE_DAYS", 7))
+# 記住的擊殺回報冪等鍵數量（重送的回報不會重複套用）
+REPORT_KEY_MEMORY = 4096
+
+def get_offline_sync_html(group_prefix, boss_names, channels=(DEFAULT_CHANNEL,)):
+    """離線記錄模式的 HTML（擊殺先存在裝置上，連線時批次同步）"""
+    return (OFFLINE_SYNC_TEMPLATE
+            .replace("__NAMES__", json.dumps(list(boss_names), ensure_ascii=False).replace("</", "<\\/"))
+            .replace("__CHANNELS__", json.dumps(list(channels)))
+            .replace("__SYNC_URL__", json.dumps(f"{API_PUBLIC_URL}/sync/{group_prefix}?token={api_token(group_prefix)}"))
+            .replace("__STORAGE_KEY__", json.dumps(f"l2m_kill_queue_{group_prefix}"))
+            .replace("__MAX_BATCH__", str(SYNC_MAX_BATCH))
+            .replace("__RETRY_MS__", str(SYNC_RETRY_SECONDS * 1000)))
+
+class KillIndex:
+    """頻道×BOSS 重生時間索引 - 陣列保存並依頻道排序，統計與即將重生查詢以二分搜尋完成"""
+    NO_RESPAWN = np.iinfo(np.int64).max  # 未記錄，排序後在最後
+    
+    def __init__(self, channel_bosses, names):
+        # channel_bosses: {頻道: {BOSS名稱: {respawn_minutes, last_killed}}}；names: 欄位順序
+        self.names = list(names)
+        self.channels = sorted(channel_bosses)
+        self.rows = {channel: i for i, channel in enumerate(self.channels)}
+        respawn = np.full((len(self.channels), len(self.names)), self.NO_RESPAWN, dtype=np.int64)
+        for i, channel in enumerate(self.channels):
+            bosses = channel_bosses[channel]
+            for j, name in enumerate(self.names):
+                boss_data = bosses.get(name)
+                if boss_data and boss_data['last_killed']:
+                    try:
+                        respawn[i, j] = int(parse_iso_ts(boss_data['last_killed'])) + boss_data['respawn_minutes'] * 60
+                    except ValueError:
+                        pass
+        self.respawn = respawn
+        self.order = np.argsort(respawn, axis=1, kind='stable')
+        self.sorted_respawn = np.take_along_axis(respawn, self.order, axis=1)
+        self.recorded = (respawn != self.NO_RESPAWN).sum(axis=1)
+    
+    def counts(self, now_ts, channels):
+        """指定頻道的狀態統計 {total, ready, waiting, unrecorded}"""
+        rows = [self.rows[channel] for channel in channels if channel in self.rows]
+        ready = sum(int(np.searchsorted(self.sorted_respawn[i], now_ts, side='right')) for i in rows)
+        recorded = int(self.recorded[rows].sum()) if rows else 0
+        total = len(channels) * len(self.names)
+        return {'total': total, 'ready': ready, 'waiting': recorded - ready, 'unrecorded': total - recorded}
+    
+    def upcoming(self, now_ts, seconds, channels):
+        """指定頻道在 [now_ts, now_ts + seconds] 內重生的 (重生時間戳, 頻道, BOSS名稱)，依時間排序"""
+        result = []
+        for channel in channels:
+            i = self.rows.get(channel)
+            if i is None:
+                continue
+            lo = np.searchsorted(self.sorted_respawn[i], now_ts, side='left')
+            hi = np.searchsorted(self.sorted_respawn[i], now_ts + seconds, side='right')
+            result.extend((int(self.sorted_respawn[i, k]), channel, self.names[self.order[i, k]]) for k in range(lo, hi))
+        result.sort()
+        return result
+
+# 儲存 I/O：數據檔案與歷史的讀寫交給背景執行緒，畫面不等待磁碟
+STORAGE_IO_WORKERS = int(os.environ.get("STORAGE_IO_WORKERS", 2))
+# 排隊中的儲存工作上限（超過時提交會等待，避免寫入速度跟不上時無限累積）
+STORAGE_IO_QUEUE = int(os.environ.get("STORAGE_IO_QUEUE", 64))
+# 等待載入完成或寫入確認的時間上限（秒）
+STORAGE_IO_TIMEOUT_SECONDS = float(os.environ.get("STORAGE_IO_TIMEOUT_SECONDS", 10))
+# 模擬緩慢的儲存裝置：每個儲存工作前延遲的秒數（測試用，0 為停用）
+STORAGE_IO_DELAY_SECONDS = float(os.environ.get("BOSS_STORAGE_DELAY_SECONDS", 0))
+# 寫入失敗後自動重試的間隔（秒）
+STORAGE_RETRY_SECONDS = float(os.environ.get("STORAGE_RETRY_SECONDS", 5))
+
+class StorageIO:
+    """有上限的儲存執行緒池 - 工作回傳 Future，同一 key（群組）的工作依提交順序執行，不同群組可同時進行"""
+    def __init__(self, workers=STORAGE_IO_WORKERS, queue_size=STORAGE_IO_QUEUE, delay=STORAGE_IO_DELAY_SECONDS):
+        self.delay = delay
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-io")
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._queues = {}  # key -> 等待執行的 (future, 函式, 參數)
+        self._lock = threading.Lock()
+        self.pending = 0
+    
+    def submit(self, key, fn, *args):
+        """排入一個儲存工作，回傳 Future（排隊已滿時等待空位）"""
+        future = Future()
+        self._slots.acquire()
+        with self._lock:
+            self.pending += 1
+            queue = self._queues.get(key)
+            idle = queue is None
+            if idle:
+                queue = self._queues[key] = deque()
+            queue.append((future, fn, args))
+        if idle:
+            self._executor.submit(self._drain, key)
+        return future
+    
+    def flush(self, key, timeout=STORAGE_IO_TIMEOUT_SECONDS):
+        """等待同一 key 已排隊的工作完成，逾時回傳False"""
+        try:
+            self.submit(key, int).result(timeout)
+            return True
+        except FutureTimeout:
+            return False
+    
+    def _drain(self, key):
+        """依序執行同一 key 的工作直到佇列清空"""
+        while True:
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                future, fn, args = queue.popleft()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        if self.delay:
+                            time.sleep(self.delay)
+                        future.set_result(fn(*args))
+                    except Exception as e:
+                        future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                self._slots.release()
+
+@st.cache_resource
+def get_storage_io():
+    """程序共用的儲存執行緒池"""
+    return StorageIO()
+
+class BossTracker:
+    def __init__(self, group_prefix, roster_store=None, channel_count=1, storage=None):
+        self.group_prefix = group_prefix
+        self.channel_count = channel_count  # 群組設定的頻道數
+        self.roster_store = roster_store or get_roster_store()
+        self.storage = storage or get_storage_io()  # 寫入在儲存執行緒進行
+        self.lock = threading.RLock()  # tracker由所有 session 共用
+        self.data_file = f"{group_prefix}_boss_data.json"
+        self.snapshot_file = f"{group_prefix}_boss_data.bin"
+        self.load_error = None        # 載入失敗的原因（顯示給成員）
+        self.quarantined_file = None  # 損毀檔案隔離後的檔名
+        self.alias_file = f"{group_prefix}_aliases.json"
+        self.retired_kills = {}  # 頻道 -> {已從名冊移除的BOSS: 擊殺時間}，保留在數據檔案中，BOSS加回名冊時恢復
+        self.roster_version, roster = self.roster_store.effective(group_prefix)
+        self.channels = self.load_boss_data(roster)  # 頻道 -> {BOSS名稱: {respawn_minutes, last_killed}}
+        self.data_version = (self._file_version(), self.roster_version)
+        self.history = KillHistory(group_prefix)  # 預設頻道的歷史
+        self._channel_histories = {DEFAULT_CHANNEL: self.history}
+        self._name_index = None
+        self._kill_index = None
+        self._report_keys = OrderedDict()  # 已處理的擊殺回報冪等鍵
+        self._report_lock = threading.Lock()  # 冪等鍵另外上鎖（寫入失敗時在儲存執行緒移除，不需要tracker的鎖）
+        self.confirmations = {}  # (頻道, BOSS名稱) -> 目前擊殺記錄的回報人數（只存在記憶體）
+        self.save_error = None      # 最近一次寫入失敗的原因（之後的寫入成功時清除）
+        # 寫入狀態（_save_lock 保護）：變更只標記待寫入，每個tracker最多排入一個寫入工作，執行時寫入當下最新的數據
+        self._save_lock = threading.Lock()
+        self._save_seq = 0          # 已標記的變更序號
+        self._dirty = False         # 有尚未交給寫入工作的變更
+        self._write_scheduled = False
+        self._save_waiters = []     # (序號, Future)：寫入涵蓋該序號時完成
+        self._pending_since = None  # 最早一筆未完成寫入的提交時間
+        self._last_save = None      # 最後標記的變更（完成時之前的變更都已寫入）
+        self._pending_history = []  # 待寫入的擊殺歷史 (KillHistory, 事件, 事件前的狀態)
+        # 各頻道的變更序號：寫入與畫面只重新處理有變更的頻道
+        self._channel_versions = {}  # 頻道 -> 序號
+        self._saved_channels = {}    # 頻道 -> (序號, 擊殺記錄, 序列化的JSON)
+        self._channel_tables = {}    # 頻道 -> (快取鍵, 表格, 倒數數據)
+        self._history_floor = {}    # 頻道 -> 歷史（含待寫入）最後一筆事件的時間戳
+    
+    @property
+    def bosses(self):
+        """預設頻道的BOSS數據"""
+        return self.channels[DEFAULT_CHANNEL]
+    
+    def channel_list(self):
+        """群組的頻道（設定的頻道數加上檔案中已有記錄的頻道）"""
+        return sorted(set(range(1, self.channel_count + 1)) | set(self.channels))
+    
+    def channel_bosses(self, channel=DEFAULT_CHANNEL):
+        """指定頻道的BOSS數據（第一次使用時建立）"""
+        if channel not in self.channels:
+            with self.lock:
+                roster = {name: boss_data['respawn_minutes'] for name, boss_data in self.bosses.items()}
+                self.channels.setdefault(channel, self._merge_roster(roster, {}))
+        return self.channels[channel]
+    
+    def history_for(self, channel=DEFAULT_CHANNEL):
+        """指定頻道的擊殺歷史（其他頻道使用 {群組}_ch{頻道}_history.jsonl）"""
+        if channel not in self._channel_histories:
+            self._channel_histories[channel] = KillHistory(f"{self.group_prefix}_ch{channel}")
+        return self._channel_histories[channel]
+    
+    @property
+    def kill_index(self):
+        """頻道×BOSS 重生時間索引（數據版本變更時重建，每次保存最多一次）"""
+        index = self._kill_index
+        if index is None or index[0] != self.data_version or index[1].channels != self.channel_list():
+            with self.lock:
+                channel_bosses = {channel: self.channels.get(channel, {}) for channel in self.channel_list()}
+                index = (self.data_version, KillIndex(channel_bosses, self.name_index.sorted_names))
+                self._kill_index = index
+        return index[1]
+    
+    def load_boss_data(self, roster):
+        """載入各頻道BOSS數據（擊殺記錄與有效名冊合併），損毀的檔案會被隔離而不是直接覆蓋"""
+        kills = None
+        # 二進位快照不比JSON舊時優先使用
+        if BINARY_SNAPSHOT_ENABLED and self._snapshot_is_current():
+            kills = self._read_snapshot()
+        
+        if kills is None and os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                kills, legacy = validate_boss_data(data)
+                if legacy:
+                    roster = self._migrate_roster(data, roster)
+            except (OSError, ValueError) as e:
+                self._quarantine(e)
+                # 有快照時從快照復原
+                kills = self._read_snapshot() if os.path.exists(self.snapshot_file) else None
+        channel_kills = kills or {DEFAULT_CHANNEL: {}}
+        self.retired_kills = self._retired(roster, channel_kills)
+        return {channel: self._merge_roster(roster, channel_kills.get(channel, {}))
+                for channel in sorted(set(channel_kills) | {DEFAULT_CHANNEL})}
+    
+    def _snapshot_is_current(self):
+        try:
+            return os.stat(self.snapshot_file).st_mtime_ns >= os.stat(self.data_file).st_mtime_ns
+        except FileNotFoundError:
+            return os.path.exists(self.snapshot_file)
+    
+    def _read_snapshot(self):
+        try:
+            return read_boss_snapshot(self.snapshot_file)
+        except (OSError, ValueError) as e:
+            print(f"快照載入錯誤 {self.snapshot_file}: {e}")  # 改用JSON
+            return None
+    
+    def _quarantine(self, error):
+        """將無法載入的數據檔案改名保留，並記錄原因"""
+        self.load_error = str(error)
+        quarantined = f"{self.data_file}.corrupt-{format_ts(get_taiwan_timestamp(), '%Y%m%d_%H%M%S')}"
+        try:
+            os.replace(self.data_file, quarantined)
+            self.quarantined_file = quarantined
+        except OSError as e:
+            print(f"隔離數據檔案失敗: {e}")
+        print(f"數據檔案損毀 {self.data_file}: {error}")
+    
+    def _merge_roster(self, roster, kills):
+        """有效名冊加上擊殺記錄"""
+        return {name: {"respawn_minutes": minutes, "last_killed": kills.get(name)} for name, minutes in roster.items()}
+    
+    def _retired(self, roster, channel_kills):
+        """不在名冊中但有擊殺記錄的BOSS"""
+        retired = {channel: {name: value for name, value in kills.items() if value and name not in roster}
+                   for channel, kills in channel_kills.items()}
+        return {channel: kills for channel, kills in retired.items() if kills}
+    
+    def _migrate_roster(self, data, roster):
+        """舊格式檔案中群組自行修改過的重生時間轉為群組差異設定"""
+        if os.path.exists(self.roster_store._overlay_file(self.group_prefix)):
+            return roster
+        # 舊檔案是從預設名冊複製的，與預設名冊不同的才是群組自己的設定
+        add = {name: boss_data['respawn_minutes'] for name, boss_data in data.items()
+               if name not in roster and name not in DEFAULT_ROSTER}
+        respawn = {name: boss_data['respawn_minutes'] for name, boss_data in data.items()
+                   if name in roster and boss_data['respawn_minutes'] != DEFAULT_ROSTER.get(name, roster[name])}
+        if not add and not respawn:
+            return roster
+        self.roster_store.update_overlay(self.group_prefix, add=add, respawn=respawn)
+        self.roster_version, roster = self.roster_store.effective(self.group_prefix)
+        return roster
+    
+    def sync_roster(self):
+        """名冊版本變更時重新合併（保留擊殺記錄，移除的BOSS加回名冊時恢復原本的記錄）"""
+        version, roster = self.roster_store.effective(self.group_prefix)
+        if version == self.roster_version:
+            return
+        with self.lock:
+            channel_kills = {
+                channel: {**self.retired_kills.get(channel, {}),
+                          **{name: boss_data['last_killed'] for name, boss_data in bosses.items() if boss_data['last_killed']}}
+                for channel, bosses in self.channels.items()
+            }
+            self.channels = {channel: self._merge_roster(roster, kills) for channel, kills in channel_kills.items()}
+            self.retired_kills = self._retired(roster, channel_kills)
+            for channel in self.channels:
+                self._channel_changed(channel)
+            self.roster_version = version
+            self.data_version = (self._file_version(), version)
+            self._name_index = None
+    
+    def load_aliases(self):
+        """載入成員自訂的BOSS別名 {別名: BOSS名稱}"""
+        if os.path.exists(self.alias_file):
+            try:
+                with open(self.alias_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+    
+    def save_aliases(self, aliases):
+        """保存BOSS別名並重建名稱索引"""
+        try:
+            with open(self.alias_file, 'w', encoding='utf-8') as f:
+                json.dump(aliases, f, ensure_ascii=False, indent=2)
+            self._name_index = None
+            return True
+        except Exception as e:
+            st.error(f"保存別名失敗: {e}")
+            return False
+    
+    @property
+    def name_index(self):
+        """BOSS名稱索引（名冊或別名變更時才重建）"""
+        if self._name_index is None:
+            self._name_index = BossNameIndex(self.bosses, self.load_aliases())
+        return self._name_index
+    
+    def get_default_bosses(self):
+        """獲取默認BOSS列表（目前的有效名冊，皆未擊殺）"""
+        _, roster = self.roster_store.effective(self.group_prefix)
+        return {name: {"respawn_minutes": minutes, "last_killed": None} for name, minutes in roster.items()}
+    
+    def _file_version(self):
+        """數據版本（以檔案修改時間表示，未建立檔案時為0）"""
+        try:
+            return os.stat(self.data_file).st_mtime_ns
+        except OSError:
+            return 0
+    
+    def save_boss_data(self):
+        """保存BOSS數據：記憶體中的數據立即生效，檔案在儲存執行緒寫入，回傳 Future（寫入成功為True）"""
+        with self.lock:
+            future = self._mark_dirty()
+        self._schedule_write()
+        return future
+    
+    def _mark_dirty(self):
+        """標記有變更待寫入（呼叫者持有tracker的鎖），回傳寫入完成時的 Future；之後需在鎖外呼叫 _schedule_write"""
+        future = Future()
+        with self._save_lock:
+            self._save_seq += 1
+            self._dirty = True
+            self._save_waiters.append((self._save_seq, future))
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            self._last_save = future
+        # 數據版本在標記時就更新，畫面立即使用新的數據
+        self.data_version = (max(time.time_ns(), self.data_version[0] + 1), self.roster_version)
+        return future
+    
+    def _schedule_write(self):
+        """有待寫入的變更且沒有排隊中的寫入工作時排入一個（不可持有tracker的鎖：排隊已滿時會等待）"""
+        with self._save_lock:
+            if not self._dirty:
+                return
+            scheduled, self._write_scheduled = self._write_scheduled, True
+        # 渲染快取建立時會取得tracker的鎖，在鎖外移除舊版本的快取
+        get_render_cache().invalidate(self.group_prefix)
+        if scheduled:
+            return
+        self.storage.submit(self.group_prefix, self._flush_writes)
+    
+    def _retry_write(self):
+        """寫入失敗後的自動重試（在計時器執行緒執行，不呼叫 Streamlit 快取函式）；已有排隊的寫入或已寫入時不重複排入"""
+        with self._save_lock:
+            if not self._dirty or self._write_scheduled:
+                return
+            self._write_scheduled = True
+        self.storage.submit(self.group_prefix, self._flush_writes)
+    
+    def _flush_writes(self):
+        """寫入工作（在儲存執行緒執行）：寫入當下最新的數據，成功後才寫入累積的擊殺歷史"""
+        with self.lock:
+            with self._save_lock:
+                self._write_scheduled = False
+                self._dirty = False
+                seq = self._save_seq
+            saved = self._saved_channel_data()
+            pending_history, self._pending_history = self._pending_history, []
+        error = self._write_boss_data(saved)
+        if error is None:
+            for history, events, bosses_before in pending_history:
+                try:
+                    history.append(events, bosses_before)
+                except Exception as e:
+                    print(f"歷史記錄錯誤: {e}")  # 歷史失敗不影響主要數據
+        else:
+            # 數據沒有寫入時歷史也不寫入，留到下次寫入成功時依原順序記錄
+            with self.lock:
+                self._pending_history[:0] = pending_history
+        with self._save_lock:
+            self.save_error = error
+            if error is not None:
+                self._dirty = True  # 數據仍在記憶體中，保持待寫入狀態並在稍後自動重試
+            elif seq == self._save_seq:
+                self._pending_since = None
+            done = [future for waiter_seq, future in self._save_waiters if waiter_seq <= seq]
+            self._save_waiters = [waiter for waiter in self._save_waiters if waiter[0] > seq]
+        for future in done:
+            future.set_result(error is None)
+        if error is not None:
+            retry = threading.Timer(STORAGE_RETRY_SECONDS, self._retry_write)
+            retry.daemon = True
+            retry.start()
+    
+    def _saved_channel_data(self):
+        """各頻道要寫入的 (擊殺記錄, JSON)，只重新序列化上次寫入後有變更的頻道（呼叫者持有tracker的鎖）"""
+        saved = {}
+        for channel, bosses in sorted(self.channels.items()):
+            version = self._channel_versions.get(channel, 0)
+            cached = self._saved_channels.get(channel)
+            if cached is None or cached[0] != version:
+                # 已移除BOSS的記錄也寫回檔案，不會因為暫時移除而遺失
+                kills = {**self.retired_kills.get(channel, {}),
+                         **{name: boss_data['last_killed'] for name, boss_data in bosses.items() if boss_data['last_killed']}}
+                cached = self._saved_channels[channel] = (version, kills, json.dumps(kills, ensure_ascii=False))
+            saved[channel] = cached[1:]
+        return saved
+    
+    def _write_boss_data(self, saved):
+        """寫入數據檔案（以各頻道已序列化的JSON組成），回傳錯誤訊息（成功時為None）"""
+        try:
+            # 沒有記錄的頻道不寫入
+            channels = [f'"{channel}": {text}' for channel, (kills, text) in saved.items() if channel != DEFAULT_CHANNEL and kills]
+            content = '{"last_killed": ' + saved[DEFAULT_CHANNEL][1]
+            if channels:
+                content += ',\n "channels": {' + ",\n  ".join(channels) + '}'
+            content += "}\n"
+            # 先寫暫存檔再替換，避免中斷時留下不完整的檔案
+            temp_file = self.data_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_file, self.data_file)
+            if BINARY_SNAPSHOT_ENABLED:
+                write_boss_snapshot(self.snapshot_file, {channel: kills for channel, (kills, _) in saved.items()})
+            return None
+        except Exception as e:
+            print(f"保存失敗: {e}")
+            return str(e) or type(e).__name__
+    
+    def save_status(self):
+        """寫入狀態 (最早未完成寫入已等待的秒數或None, 最近一次寫入失敗的原因或None)"""
+        with self._save_lock:
+            pending = time.monotonic() - self._pending_since if self._pending_since is not None else None
+            return pending, self.save_error
+    
+    def wait_saved(self, timeout=STORAGE_IO_TIMEOUT_SECONDS):
+        """等待目前為止的變更寫入檔案，成功回傳True（失敗或逾時為False）"""
+        future = self._last_save
+        if future is None:
+            return True
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            return False
+
+    def reload(self):
+        """在tracker的鎖內重新讀取數據檔案（原地替換，所有使用者繼續使用同一個tracker），有尚未寫入的變更時不載入並回傳False"""
+        with self.lock:
+            if self.save_status()[0] is not None or self._dirty:
+                return False
+            self.load_error = None
+            self.quarantined_file = None
+            self.roster_version, roster = self.roster_store.effective(self.group_prefix)
+            self.channels = self.load_boss_data(roster)
+            self.data_version = (max(self._file_version(), self.data_version[0] + 1), self.roster_version)
+            self.history = KillHistory(self.group_prefix)
+            self._channel_histories = {DEFAULT_CHANNEL: self.history}
+            self._history_floor = {}
+            self._saved_channels = {}
+            self._channel_tables = {}
+            for channel in self.channels:
+                self._channel_changed(channel)
+            self._name_index = None
+            self._kill_index = None
+            self.confirmations = {}
+        return True
+
+    def kill_records(self):
+        """各頻道已記錄的擊殺時間 {頻道: {BOSS名稱: ISO時間}}"""
+        return {
+            channel: {name: boss_data['last_killed'] for name, boss_data in bosses.items() if boss_data['last_killed']}
+            for channel, bosses in sorted(self.channels.items())
+        }
+    
+    def estimated_size(self):
+        """估算tracker佔用的記憶體（位元組，各部分的總和）"""
+        with self.lock:
+            return sum(self.memory_breakdown().values())
+    
+    def memory_breakdown(self):
+        """tracker各部分的估算大小（位元組）"""
+        kill_index = self._kill_index[1] if self._kill_index else None
+        return {
+            '擊殺記錄': deep_getsizeof(self.channels),
+            '名稱索引': deep_getsizeof(vars(self._name_index)) if self._name_index else 0,
+            '頻道索引': deep_getsizeof(vars(kill_index)) if kill_index else 0,
+            '歷史索引': deep_getsizeof([vars(history) for history in self._channel_histories.values()]),
+            '回報記錄': deep_getsizeof(self._report_keys) + deep_getsizeof(self.confirmations),
+            '頻道快取': deep_getsizeof(self._saved_channels) + deep_getsizeof(self._channel_tables),
+        }
+    
+    def update_kill_times(self, updates, now=None, channel=DEFAULT_CHANNEL):
+        """更新擊殺時間、記錄歷史並保存 updates: {boss_name: ISO時間或None}，回傳寫入完成時的 Future"""
+        with self.lock:
+            future = self._update_kill_times({channel: updates}, now)
+        self._schedule_write()
+        return future
+    
+    def clear_kill_times(self, channels, now=None):
+        """清除指定頻道的所有擊殺記錄（只寫入一次）"""
+        with self.lock:
+            future = self._update_kill_times({channel: {name: None for name in self.channel_bosses(channel)} for channel in channels}, now)
+        self._schedule_write()
+        return future
+    
+    def import_kills(self, kills, now=None, channel=DEFAULT_CHANNEL):
+        """匯入一批依時間排序的擊殺 [(時間戳, BOSS名稱)]：不早於歷史最後一筆事件的依擊殺時間補記到歷史，
+        其餘只保留各BOSS最新且比目前記錄新的擊殺（以匯入時間記錄）；整批只寫入一次，回傳 (更新的BOSS數, 補記的歷史筆數)"""
+        history = self.history_for(channel)
+        # 日誌尾端在鎖外讀取（每個頻道只讀一次，之後以待寫入的事件更新）
+        if channel not in self._history_floor:
+            floor = history.last_event_ts()
+            with self.lock:
+                self._history_floor.setdefault(channel, floor)
+        with self.lock:
+            bosses = self.channel_bosses(channel)
+            bosses_before = {name: dict(data) for name, data in bosses.items()}
+            floor = self._history_floor[channel]
+            current_ts = {name: parse_iso_ts(bosses[name]['last_killed']) if bosses[name]['last_killed'] else None
+                          for name in {name for _, name in kills}}
+            events = []
+            late = {}  # 早於歷史最後一筆事件、無法依時間補記的擊殺
+            for killed_ts, boss_name in kills:
+                if current_ts[boss_name] is not None and killed_ts <= current_ts[boss_name]:
+                    continue
+                current_ts[boss_name] = killed_ts
+                killed = datetime.fromtimestamp(killed_ts, TW_TZ).isoformat()
+                if floor is None or killed_ts >= floor:
+                    bosses[boss_name]['last_killed'] = killed
+                    self.confirmations.pop((channel, boss_name), None)
+                    events.append((killed, boss_name, killed))
+                    late.pop(boss_name, None)
+                    floor = killed_ts
+                else:
+                    late[boss_name] = killed
+            if events:
+                self._channel_changed(channel)
+                self._pending_history.append((history, events, bosses_before))
+                self._history_floor[channel] = floor
+            updated = {name for _, name, _ in events} | set(late)
+            if not updated:
+                return 0, 0
+            if late:
+                self._update_kill_times({channel: late}, now)
+            else:
+                self._mark_dirty()
+        self._schedule_write()
+        return len(updated), len(events)
+    
+    def restore_kill_times(self, channel_kills, now=None):
+        """還原為指定的擊殺記錄 {頻道: {BOSS名稱: ISO時間}}，沒有記錄的BOSS清除（所有頻道只寫入一次）"""
+        with self.lock:
+            channels = sorted(set(self.channels) | set(channel_kills))
+            future = self._update_kill_times({
+                channel: {name: channel_kills.get(channel, {}).get(name) for name in self.channel_bosses(channel)}
+                for channel in channels
+            }, now)
+        self._schedule_write()
+        return future
+    
+    def _channel_changed(self, channel):
+        """頻道的擊殺記錄有變更（呼叫者持有tracker的鎖）"""
+        self._channel_versions[channel] = self._channel_versions.get(channel, 0) + 1
+    
+    def _update_kill_times(self, channel_updates, now, confirmations=None):
+        """套用擊殺時間變更並標記待寫入（呼叫者持有tracker的鎖，之後在鎖外呼叫 _schedule_write）"""
+        now = now or get_taiwan_time()
+        for channel, updates in channel_updates.items():
+            bosses = self.channel_bosses(channel)
+            bosses_before = {name: dict(data) for name, data in bosses.items()}
+            # 事件時間在鎖內決定且不早於前一筆事件，歷史日誌依時間遞增（各 session 的 now 可能前後顛倒）
+            floor = self._history_floor.get(channel)
+            stamp = now if floor is None or now.timestamp() >= floor else datetime.fromtimestamp(floor, TW_TZ)
+            changes = []
+            for boss_name, last_killed in updates.items():
+                if boss_name in bosses and bosses[boss_name]['last_killed'] != last_killed:
+                    bosses[boss_name]['last_killed'] = last_killed
+                    changes.append((stamp.isoformat(), boss_name, last_killed))
+                    self.confirmations.pop((channel, boss_name), None)
+            if changes:
+                self._channel_changed(channel)
+                # 歷史在數據檔案寫入成功後才由同一個寫入工作寫入
+                self._pending_history.append((self.history_for(channel), changes, bosses_before))
+                self._history_floor[channel] = stamp.timestamp()
+        self.confirmations.update(confirmations or {})
+        return self._mark_dirty()
+    
+    def _merge_report(self, key, channel, boss_name, killed_ts, updates, confirmations):
+        """合併一筆已驗證的擊殺回報到 updates，回傳 duplicate / confirmed / recorded / stale"""
+        if key is not None:
+            with self._report_lock:
+                if key in self._report_keys:
+                    return "duplicate"
+        outcome = self._merge_kill(channel, boss_name, killed_ts, updates, confirmations)
+        if key is not None:
+            # 回報處理完才記住冪等鍵，處理失敗的回報可以重送
+            with self._report_lock:
+                self._report_keys[key] = None
+                if len(self._report_keys) > REPORT_KEY_MEMORY:
+                    self._report_keys.popitem(last=False)
+        return outcome
+    
+    def _merge_kill(self, channel, boss_name, killed_ts, updates, confirmations):
+        pending = updates.setdefault(channel, {})
+        slot = (channel, boss_name)
+        current = pending.get(boss_name) or self.channel_bosses(channel)[boss_name]['last_killed']
+        current_ts = parse_iso_ts(current) if current else None
+        if current_ts is not None and abs(killed_ts - current_ts) <= KILL_DEDUP_SECONDS:
+            # 同一次擊殺的其他回報：只增加確認數，較早的時間更接近實際擊殺時間
+            confirmations[slot] = confirmations.get(slot, self.confirmations.get(slot, 1)) + 1
+            if killed_ts < current_ts:
+                pending[boss_name] = datetime.fromtimestamp(killed_ts, TW_TZ).isoformat()
+            return "confirmed"
+        if current_ts is not None and killed_ts < current_ts:
+            # 比現有記錄舊的擊殺不覆蓋（例如離線期間別人已記錄了新的擊殺）
+            return "stale"
+        pending[boss_name] = datetime.fromtimestamp(killed_ts, TW_TZ).isoformat()
+        confirmations[slot] = 1
+        return "recorded"
+    
+    def _apply_reports(self, reports, now):
+        """套用一批 (冪等鍵, BOSS名稱, 時間戳, 頻道) 擊殺回報，有新時間才標記寫入一次（呼叫者持有tracker的鎖），回傳各筆結果"""
+        latest_allowed = now.timestamp() + TIME_PARSE_FUTURE_GRACE_SECONDS
+        earliest_allowed = now.timestamp() - REPORT_MAX_AGE_DAYS * 86400
+        channels = set(self.channel_list())
+        updates = {}
+        confirmations = {}
+        outcomes = []
+        for key, boss_name, killed_ts, channel in reports:
+            if channel not in channels or boss_name not in self.bosses or not earliest_allowed <= killed_ts <= latest_allowed:
+                outcomes.append("rejected")
+            else:
+                outcomes.append(self._merge_report(key, channel, boss_name, killed_ts, updates, confirmations))
+        if any(updates.values()):
+            saved = self._update_kill_times(updates, now, confirmations)
+            # 寫入失敗時忘記這些冪等鍵，讓回報可以重送（在儲存執行緒執行，只使用冪等鍵的鎖）
+            keys = [report[0] for report in reports]
+            saved.add_done_callback(lambda future: future.result() or self._forget_report_keys(keys))
+        else:
+            self.confirmations.update(confirmations)  # 只有確認時不寫入磁碟
+        return outcomes
+    
+    def _forget_report_keys(self, keys):
+        with self._report_lock:
+            for key in keys:
+                self._report_keys.pop(key, None)
+    
+    def report_kill(self, boss_name, killed_ts, key=None, now=None, channel=DEFAULT_CHANNEL):
+        """回報一次擊殺，回傳 (結果, 目前回報人數)；結果為 duplicate / confirmed / recorded / stale / rejected"""
+        if now is None:
+            now = get_taiwan_time()
+        with self.lock:
+            outcomes = self._apply_reports([(key, boss_name, killed_ts, channel)], now)
+            reporters = self.confirmations.get((channel, boss_name), 0)
+        self._schedule_write()
+        return outcomes[0], reporters
+    
+    def apply_kill_batch(self, reports, now=None):
+        """套用離線佇列的一批擊殺 reports: [(冪等鍵, BOSS名稱, 時間戳, 頻道)]，整批只寫入一次，回傳 (已確認的冪等鍵, 寫入的BOSS數)"""
+        if now is None:
+            now = get_taiwan_time()
+        with self.lock:
+            last_save = self._last_save
+            outcomes = self._apply_reports(reports, now)
+            if self.save_error and self._last_save is last_save:
+                self._mark_dirty()  # 上次寫入失敗：重送時再寫入一次
+        self._schedule_write()
+        # 寫入確認後才回覆（裝置收到確認就會移除記錄），失敗或逾時不確認，讓裝置稍後重送
+        if not self.wait_saved():
+            return [], 0
+        # 未知BOSS或時間異常的記錄也確認，避免裝置無限重送
+        return [report[0] for report in reports], outcomes.count("recorded")
+    
+    def calculate_respawn_info(self, boss_name, boss_data, now_ts=None):
+        """計算重生資訊"""
+        if boss_data['last_killed'] is None:
+            return "未擊殺", "等待擊殺", "⚪ 未記錄", "normal"
+        
+        try:
+            killed_ts = parse_iso_ts(boss_data['last_killed'])
+            respawn_ts = killed_ts + boss_data['respawn_minutes'] * 60
+            if now_ts is None:
+                now_ts = get_taiwan_timestamp()
+            
+            last_killed_str = format_ts(killed_ts)
+            respawn_time_str = format_ts(respawn_ts)
+            
+            if now_ts >= respawn_ts:
+                return last_killed_str, respawn_time_str, "✅ 已重生", "ready"
+            else:
+                time_left = respawn_ts - now_ts
+                hours = int(time_left // 3600)
+                minutes = int((time_left % 3600) // 60)
+                if hours > 0:
+                    status = f"⏳ {hours}h{minutes}m"
+                else:
+                    status = f"⏳ {minutes}m"
+                return last_killed_str, respawn_time_str, status, "waiting"
+                
+        except Exception as e:
+            return "錯誤", "錯誤", "❌ 錯誤", "error"
+    
+    def get_boss_dataframe(self, bosses=None, now_ts=None, channel=DEFAULT_CHANNEL):
+        """獲取BOSS數據框（可指定頻道、歷史狀態與時間點）"""
+        if now_ts is None:
+            now_ts = get_taiwan_timestamp()
+        # 按重生時間排序（使用名稱索引預先排好的順序）
+        if bosses is None:
+            bosses = self.channel_bosses(channel)
+            sorted_bosses = [(name, bosses[name]) for name in self.name_index.sorted_names]
+        else:
+            sorted_bosses = sorted(bosses.items(), key=lambda x: x[1]['respawn_minutes'])
+        
+        data = []
+        status_rows = {}
+        for index, (boss_name, boss_data) in enumerate(sorted_bosses, 1):
+            respawn_minutes = boss_data['respawn_minutes']
+            hours = respawn_minutes // 60
+            minutes = respawn_minutes % 60
+            
+            if hours > 0:
+                respawn_time_str = f"{hours}h{minutes}m" if minutes > 0 else f"{hours}h"
+            else:
+                respawn_time_str = f"{minutes}m"
+            
+            last_killed_str, respawn_time_str_full, status, status_type = self.calculate_respawn_info(boss_name, boss_data, now_ts)
+            
+            data.append({
+                '編號': f"{index:02d}",
+                'BOSS名稱': boss_name,
+                '重生時間': respawn_time_str,
+                '上次擊殺': last_killed_str,
+                '下次重生': respawn_time_str_full,
+                '狀態': status,
+                '_status_type': status_type,  # 用於樣式
+                '_channel': channel
+            })
+            status_rows.setdefault(status_type, []).append(index - 1)
+        
+        df = pd.DataFrame(data)
+        # 各狀態的行位置，供統計與篩選使用
+        df.attrs['status_rows'] = status_rows
+        return df
+    
+    def get_upcoming_bosses(self, minutes_ahead=5, now_ts=None, channels=(DEFAULT_CHANNEL,)):
+        """獲取指定頻道在指定時間內即將重生的BOSS（依重生時間排序）"""
+        if now_ts is None:
+            now_ts = get_taiwan_timestamp()
+        upcoming_bosses = []
+        for respawn_ts, channel, boss_name in self.kill_index.upcoming(now_ts, minutes_ahead * 60, channels):
+            entry = upcoming_entry(self.display_name(boss_name, channel), respawn_ts, now_ts)
+            entry['channel'] = channel
+            entry['position'] = self.name_index.positions[boss_name]
+            upcoming_bosses.append(entry)
+        return upcoming_bosses
+    
+    def display_name(self, boss_name, channel):
+        """BOSS顯示名稱（有多個頻道時加上頻道）"""
+        return f"{boss_name} ({channel_label(channel)})" if len(self.channel_list()) > 1 else boss_name
+    
+    def get_countdown_rows(self, channel=DEFAULT_CHANNEL):
+        """即時倒數表格數據 [名稱, 重生時間戳或None, 重生分鐘]（依重生時間排序）"""
+        rows = []
+        bosses = self.channel_bosses(channel)
+        for name in self.name_index.sorted_names:
+            boss_data = bosses[name]
+            respawn_ts = None
+            if boss_data['last_killed']:
+                try:
+                    respawn_ts = int(parse_iso_ts(boss_data['last_killed'])) + boss_data['respawn_minutes'] * 60
+                except ValueError:
+                    pass
+            rows.append([self.display_name(name, channel), respawn_ts, boss_data['respawn_minutes']])
+        return rows
+    
+    def _channel_table(self, channel, now_ts):
+        """單一頻道的 (表格, 倒數數據)，同一時間點只重建有變更的頻道"""
+        key = (self._channel_versions.get(channel, 0), self.roster_version, self.name_index, len(self.channel_list()) > 1, now_ts)
+        with self.lock:
+            cached = self._channel_tables.get(channel)
+            if cached is None or cached[0] != key:
+                cached = (key, self.get_boss_dataframe(now_ts=now_ts, channel=channel), self.get_countdown_rows(channel))
+                self._channel_tables[channel] = cached
+            return cached[1], cached[2]
+    
+    def build_render_snapshot(self, now_ts, channels=(DEFAULT_CHANNEL,)):
+        """建立可共用的畫面數據：表格、狀態統計與即將重生清單（多個頻道時依頻道串接）"""
+        channel_tables = [self._channel_table(channel, now_ts) for channel in channels]
+        tables = [table for table, _ in channel_tables]
+        # 各狀態的行位置（串接後依頻道區塊位移）
+        status_rows = {}
+        for block, table in enumerate(tables):
+            for status_type, positions in table.attrs['status_rows'].items():
+                status_rows.setdefault(status_type, []).extend(block * len(table) + p for p in positions)
+        df = tables[0].copy() if len(tables) == 1 else pd.concat(tables, ignore_index=True)
+        if len(self.channel_list()) > 1:
+            df.insert(1, '頻道', [channel_label(channel) for channel in df['_channel']])
+        df.attrs['status_rows'] = status_rows
+        countdown = [row for _, rows in channel_tables for row in rows]
+        return {
+            'table': df,
+            'sort_orders': table_sort_orders(df, countdown),
+            # 各狀態的行位元遮罩，篩選時與名稱、關注遮罩做位元運算
+            'status_bits': {status_type: positions_mask(positions) for status_type, positions in status_rows.items()},
+            'counts': self.kill_index.counts(now_ts, channels),
+            # 即時倒數表格用的精簡數據（與表格同順序）
+            'countdown': countdown,
+            # 多取一分鐘，讓同一分鐘內的每次執行都能以實際時間重新篩選
+            'upcoming': self.get_upcoming_bosses(RENDER_UPCOMING_MINUTES + 1, now_ts, channels)
+        }
+    
+    def get_kill_state(self):
+        """獲取所有頻道已記錄BOSS的 (名稱, 擊殺時間戳, 重生分鐘) 供時間軸推算"""
+        state = []
+        for channel, bosses in sorted(self.channels.items()):
+            for boss_name, boss_data in bosses.items():
+                if boss_data['last_killed'] is None:
+                    continue
+                try:
+                    killed_ts = int(parse_iso_ts(boss_data['last_killed']))
+                except ValueError:
+                    continue
+                state.append((self.display_name(boss_name, channel), killed_ts, boss_data['respawn_minutes']))
+        return tuple(state)
+    
+    def parse_time_string(self, time_str, now=None):
+        """解析時間字串 - 支援相對時間、時分(秒)、月日與完整日期，只有時間時取最近一次已過去的時間"""
+        if now is None:
+            now = get_taiwan_time()
+        return get_time_parser().parse(time_str, now)
+
+# 重生時段長度（分鐘）- 用於判斷不同BOSS的重生時段是否重疊
+TIMELINE_SPAWN_WINDOW_MINUTES = 10
+
+class SpawnTimeline:
+    """跨群組重生時間軸 - 向量化推算重生事件並建立區間索引"""
+    def __init__(self, group_states, start_ts, horizon_hours=24):
+        # group_states: ((群組名稱, ((BOSS名稱, 擊殺時間戳, 重生分鐘), ...)), ...)
+        self.start_ts = start_ts
+        self.end_ts = start_ts + horizon_hours * 3600
+        self.window = TIMELINE_SPAWN_WINDOW_MINUTES * 60
+        
+        self.group_names = [group_name for group_name, _ in group_states]
+        rows = [
+            (group_idx, boss_name, killed_ts, respawn_minutes * 60)
+            for group_idx, (_, bosses) in enumerate(group_states)
+            for boss_name, killed_ts, respawn_minutes in bosses
+        ]
+        self.boss_names = [row[1] for row in rows]
+        group_idx = np.array([row[0] for row in rows], dtype=np.int64)
+        killed = np.array([row[2] for row in rows], dtype=np.int64)
+        period = np.array([row[3] for row in rows], dtype=np.int64)
+        
+        # 每個BOSS在區間內的第一次與最後一次重生（第k次重生 = 擊殺時間 + k * 週期）
+        k_first = np.maximum(1, -((killed - self.start_ts) // period))
+        k_last = (self.end_ts - killed) // period
+        counts = np.maximum(k_last - k_first + 1, 0)
+        
+        source = np.repeat(np.arange(len(rows)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        spawn = killed[source] + (k_first[source] + offsets) * period[source]
+        
+        # 區間索引：依重生時間排序，所有時段等長，可用二分搜尋查詢
+        order = np.argsort(spawn, kind='stable')
+        self.spawn = spawn[order]
+        self.source = source[order]
+        self.group_idx = group_idx[self.source]
+    
+    def __len__(self):
+        return len(self.spawn)
+    
+    def between(self, start_ts, end_ts):
+        """查詢重生時段與 [start_ts, end_ts) 重疊的事件位置"""
+        lo = np.searchsorted(self.spawn, start_ts - self.window, side='right')
+        hi = np.searchsorted(self.spawn, end_ts, side='left')
+        return np.arange(lo, hi)
+    
+    def densest_window(self, minutes=30):
+        """找出重生事件最密集的時段，回傳 (開始時間戳, 事件數)"""
+        if not len(self.spawn):
+            return None, 0
+        counts = np.searchsorted(self.spawn, self.spawn + minutes * 60, side='left') - np.arange(len(self.spawn))
+        best = int(np.argmax(counts))
+        return int(self.spawn[best]), int(counts[best])
+    
+    def overlaps(self):
+        """找出重生時段互相重疊的事件群組（連續事件間隔小於時段長度）"""
+        if len(self.spawn) < 2:
+            return []
+        cluster = np.concatenate(([0], np.cumsum(np.diff(self.spawn) >= self.window)))
+        sizes = np.bincount(cluster)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        return [np.arange(s, s + n) for s, n in zip(starts, sizes) if n > 1]
+    
+    def to_dataframe(self, positions=None):
+        """轉換為數據框（供表格與甘特圖使用）"""
+        if positions is None:
+            positions = np.arange(len(self.spawn))
+        spawn = self.spawn[positions]
+        return pd.DataFrame({
+            '群組': [self.group_names[i] for i in self.group_idx[positions]],
+            'BOSS名稱': [self.boss_names[i] for i in self.source[positions]],
+            '重生時間': pd.to_datetime(spawn, unit='s', utc=True).tz_convert(TW_TZ),
+            '時段結束': pd.to_datetime(spawn + self.window, unit='s', utc=True).tz_convert(TW_TZ),
+        })
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def build_spawn_timeline(group_states, start_ts, horizon_hours):
+    """建立（並快取）跨群組重生時間軸"""
+    return SpawnTimeline(group_states, start_ts, horizon_hours)
+
+def read_kill_state(data_file, roster, channel_count=1):
+    """直接從數據檔案讀取 (名稱, 擊殺時間戳, 重生分鐘)，格式與 BossTracker.get_kill_state 相同（不建立tracker）"""
+    try:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            channel_kills, _ = validate_boss_data(json.load(f))
+    except (OSError, ValueError):
+        return ()
+    multi_channel = len(set(range(1, channel_count + 1)) | set(channel_kills) | {DEFAULT_CHANNEL}) > 1
+    state = []
+    for channel, kills in sorted(channel_kills.items()):
+        for boss_name, last_killed in kills.items():
+            if not last_killed or boss_name not in roster:
+                continue
+            try:
+                killed_ts = int(parse_iso_ts(last_killed))
+            except ValueError:
+                continue
+            state.append((f"{boss_name} ({channel_label(channel)})" if multi_channel else boss_name, killed_ts, roster[boss_name]))
+    return tuple(state)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _disk_kill_state(group_prefix, file_version, roster_version, channel_count):
+    """未載入群組的擊殺狀態（以檔案與名冊版本快取，檔案變更時才重新讀取）"""
+    _, roster = get_roster_store().effective(group_prefix)
+    return read_kill_state(f"{group_prefix}_boss_data.json", roster, channel_count)
+
+def timeline_group_states(registry, roster_store):
+    """各群組的擊殺狀態：已載入的群組使用tracker，其他群組直接讀取數據檔案，不載入tracker也不影響記憶體上限"""
+    group_states = []
+    for group_name, group_config in registry.groups().items():
+        tracker = registry.loaded_tracker(group_name)
+        if tracker is not None:
+            group_states.append((group_name, tracker.get_kill_state()))
+            continue
+        group_prefix = group_config['file_prefix']
+        try:
+            file_version = os.stat(f"{group_prefix}_boss_data.json").st_mtime_ns
+        except OSError:
+            continue
+        roster_version, _ = roster_store.effective(group_prefix)
+        group_states.append((group_name, _disk_kill_state(group_prefix, file_version, roster_version, group_config.get('channels', 1))))
+    return tuple(group_states)
+
+def timeline_window(now, window_start, window_end):
+    """查詢時段（結束早於開始時視為跨日），回傳目前進行中或下一個時段的 (開始, 結束)"""
+    window_length = (datetime.combine(now.date(), window_end) - datetime.combine(now.date(), window_start)) % timedelta(days=1)
+    if not window_length:
+        window_length = timedelta(days=1)
+    window_from = datetime.combine(now.date() - timedelta(days=1), window_start, tzinfo=TW_TZ)
+    while window_from + window_length <= now:
+        window_from += timedelta(days=1)
+    return window_from, window_from + window_length
+
+# 群組設定檔（執行中修改會自動重新載入）
+GROUPS_FILE = "groups.json"
+# 閒置多久（秒）後釋放群組的tracker
+GROUP_IDLE_SECONDS = int(os.environ.get("GROUP_IDLE_SECONDS", 1800))
+# 所有已載入tracker的記憶體上限（位元組，估算值）
+TRACKER_MEMORY_CAP_BYTES = int(os.environ.get("TRACKER_MEMORY_CAP_BYTES", 64 * 1024 * 1024))
+
+def deep_getsizeof(obj, seen=None):
+    """估算物件（含內容）佔用的記憶體"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) if obj.base is None else obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_getsizeof(key, seen) + deep_getsizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_getsizeof(item, seen) for item in obj)
+    return size
+
+# 群組設定的格式：file_prefix 用於檔名與網址，color 直接放進 CSS
+GROUP_PREFIX_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+GROUP_COLOR_PATTERN = re.compile(r"#[0-9A-Fa-f]{6}")
+GROUP_MAX_CHANNELS = 99
+
+def validate_groups(data):
+    """檢查群組設定，回傳格式正確的群組（錯誤的群組記錄原因後略過）"""
+    if not isinstance(data, dict):
+        raise ValueError("最外層必須是物件")
+    groups = {}
+    prefixes = set()
+    for group_name, config in data.items():
+        if not isinstance(config, dict):
+            error = "設定必須是物件"
+        elif not isinstance(config.get('file_prefix'), str) or not GROUP_PREFIX_PATTERN.fullmatch(config['file_prefix']):
+            error = "file_prefix 只能使用英數字、底線或連字號"
+        elif config['file_prefix'] in prefixes:
+            error = f"file_prefix {config['file_prefix']} 重複"
+        elif not isinstance(config.get('color'), str) or not GROUP_COLOR_PATTERN.fullmatch(config['color']):
+            error = "color 必須是 #RRGGBB"
+        elif not isinstance(config.get('icon'), str):
+            error = "缺少 icon"
+        elif 'channels' in config and (not isinstance(config['channels'], int) or isinstance(config['channels'], bool)
+                                       or not 1 <= config['channels'] <= GROUP_MAX_CHANNELS):
+            error = f"channels 必須是 1~{GROUP_MAX_CHANNELS} 的整數"
+        else:
+            groups[group_name] = config
+            prefixes.add(config['file_prefix'])
+            continue
+        print(f"群組設定錯誤，略過 {group_name}: {error}")
+    return groups
+
+class GroupRegistry:
+    """群組註冊表 - 從設定檔載入群組，tracker 首次使用時載入，閒置或超過記憶體上限時釋放"""
+    def __init__(self, groups_file=GROUPS_FILE, roster_store=None, storage=None):
+        self.groups_file = groups_file
+        self.roster_store = roster_store  # 傳給各 tracker 的名冊（None 時使用程序共用名冊）
+        self.storage = storage            # 傳給各 tracker 的儲存執行緒池（None 時使用程序共用的）
+        self._groups = dict(GROUPS)
+        self._groups_mtime = None
+        self._trackers = OrderedDict()  # 群組名稱 -> tracker（最近使用的在最後）
+        self._last_access = {}
+        self._sizes = {}
+        self._size_versions = {}  # 群組名稱 -> 估算大小時的數據版本（數據變更後重新估算）
+        self._loading = {}  # 群組名稱 -> 載入鎖
+        self._load_futures = {}  # 群組名稱 -> 背景載入
+        self._in_use = {}  # 群組名稱 -> 正在使用的次數（使用中的tracker不會被釋放）
+        self._lock = threading.RLock()
+    
+    def groups(self):
+        """目前的群組設定（設定檔有變更時重新載入）"""
+        with self._lock:
+            try:
+                mtime = os.stat(self.groups_file).st_mtime_ns
+            except OSError:
+                return self._groups
+            if mtime != self._groups_mtime:
+                self._groups_mtime = mtime
+                try:
+                    with open(self.groups_file, 'r', encoding='utf-8') as f:
+                        self._groups = validate_groups(json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"群組設定載入錯誤: {e}")  # 保留上一次的設定
+                # 移除已刪除群組的tracker（使用中或有未寫入變更的，之後由 _evict 釋放）
+                for group_name in [name for name in self._trackers if name not in self._groups]:
+                    if self._evictable(group_name, keep=None):
+                        self._release(group_name)
+            return self._groups
+    
+    def get_tracker(self, group_name):
+        """取得群組的tracker（尚未載入時建立；不同群組可同時載入）"""
+        with self._lock:
+            group_config = self.groups()[group_name]
+            tracker = self._trackers.get(group_name)
+            load_lock = self._loading.setdefault(group_name, threading.Lock())
+        if tracker is None:
+            # 讀檔在註冊表鎖外進行，同一群組只載入一次
+            with load_lock:
+                tracker = self._trackers.get(group_name)
+                if tracker is None:
+                    tracker = BossTracker(group_config['file_prefix'], roster_store=self.roster_store,
+                                          channel_count=group_config.get('channels', 1), storage=self.storage)
+                    with self._lock:
+                        self._trackers[group_name] = tracker
+                        self._last_access[group_name] = time.monotonic()  # 其他執行緒的 _evict 可能在此之後立即檢查
+        else:
+            tracker.channel_count = group_config.get('channels', 1)
+            tracker.sync_roster()
+        with self._lock:
+            now = time.monotonic()
+            if group_name in self._trackers:
+                self._trackers.move_to_end(group_name)
+                self._last_access[group_name] = now
+            self._evict(now, keep=group_name)
+            return tracker
+    
+    @contextmanager
+    def in_use(self, group_name):
+        """with 區塊內群組的tracker不會因閒置或記憶體上限被釋放，避免同一群組同時存在兩個tracker互相覆蓋寫入"""
+        with self._lock:
+            self._in_use[group_name] = self._in_use.get(group_name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[group_name] -= 1
+                if not self._in_use[group_name]:
+                    del self._in_use[group_name]
+    
+    def loaded_tracker(self, group_name):
+        """已載入的tracker（尚未載入時回傳None，不讀取檔案）"""
+        with self._lock:
+            return self._trackers.get(group_name)
+    
+    def load_async(self, group_name):
+        """在儲存執行緒載入群組的tracker，回傳 Future（排在該群組尚未完成的寫入之後；載入中時共用同一個）"""
+        with self._lock:
+            future = self._load_futures.get(group_name)
+            if future is not None and not future.done():
+                return future
+            group_prefix = self.groups()[group_name]['file_prefix']
+        # 載入工作需要註冊表的鎖，在鎖外排入（排隊已滿時會等待）
+        future = (self.storage or get_storage_io()).submit(group_prefix, self.get_tracker, group_name)
+        with self._lock:
+            current = self._load_futures.get(group_name)
+            if current is not None and not current.done():
+                return current  # 同時有其他載入，get_tracker 只會建立一次
+            self._load_futures[group_name] = future
+            return future
+    
+    def reload(self, group_name):
+        """重新從檔案載入群組數據（在儲存執行緒排在尚未完成的寫入之後原地重新讀取），回傳 Future（有未寫入的變更時結果為False）"""
+        with self._lock:
+            tracker = self._trackers.get(group_name)
+            group_prefix = self.groups()[group_name]['file_prefix']
+        if tracker is None:
+            return self.load_async(group_name)
+        return (self.storage or get_storage_io()).submit(group_prefix, tracker.reload)
+    
+    def loaded_groups(self):
+        """已載入的群組與估算大小"""
+        with self._lock:
+            self._refresh_sizes()
+            return dict(self._sizes)
+    
+    def memory_breakdown(self):
+        """已載入群組的記憶體明細 {群組: {項目: 位元組}}"""
+        with self._lock:
+            trackers = dict(self._trackers)
+        return {group_name: tracker.memory_breakdown() for group_name, tracker in trackers.items()}
+    
+    def _release(self, group_name):
+        self._trackers.pop(group_name, None)
+        self._last_access.pop(group_name, None)
+        self._sizes.pop(group_name, None)
+        self._size_versions.pop(group_name, None)
+    
+    def _refresh_sizes(self):
+        """重新估算載入後數據有變更（擊殺、頻道、名冊或重新載入）的tracker大小"""
+        for group_name, tracker in self._trackers.items():
+            version = (tracker.data_version, len(tracker.channels))
+            if self._size_versions.get(group_name) != version:
+                self._sizes[group_name] = tracker.estimated_size()
+                self._size_versions[group_name] = version
+    
+    def _evictable(self, group_name, keep):
+        """沒有在使用中、也沒有尚未寫入的變更的tracker才能釋放"""
+        return (group_name != keep and group_name not in self._in_use
+                and self._trackers[group_name].save_status()[0] is None)
+    
+    def _evict(self, now, keep):
+        """釋放已刪除或閒置的tracker，並從最久未使用的開始釋放直到低於記憶體上限（使用中的不釋放，可能暫時超過上限）"""
+        for group_name in list(self._trackers):
+            stale = group_name not in self._groups or now - self._last_access[group_name] > GROUP_IDLE_SECONDS
+            if stale and self._evictable(group_name, keep):
+                self._release(group_name)
+        self._refresh_sizes()
+        for group_name in list(self._trackers):
+            if sum(self._sizes.values()) <= TRACKER_MEMORY_CAP_BYTES:
+                break
+            if self._evictable(group_name, keep):
+                self._release(group_name)
+
+@st.cache_resource
+def get_group_registry():
+    """程序共用的群組註冊表"""
+    return GroupRegistry(roster_store=get_roster_store(), storage=get_storage_io())
+
+# 啟動預先載入使用的執行緒數
+WARM_START_WORKERS = int(os.environ.get("WARM_START_WORKERS", 4))
+# 啟動時預先載入的群組數（依數據檔案最近更新排序，0 表示全部）；其餘群組第一次使用時才載入
+WARM_START_GROUPS = int(os.environ.get("WARM_START_GROUPS", 4))
+
+def process_uptime_seconds():
+    """程序已執行的秒數（無法取得時回傳None）"""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return round(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 3)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class WarmStart:
+    """啟動預先載入 - 以執行緒池平行載入最近使用的群組並預先建立索引與畫面數據，記錄就緒狀態與首次畫面時間"""
+    def __init__(self):
+        self.ready = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+        self.timings = {}  # 群組 -> 載入秒數
+        self.errors = {}   # 群組 -> 錯誤訊息
+        self.skipped = []  # 超過預先載入數量或記憶體上限、留待第一次使用時載入的群組
+        self._registry = None
+        self.first_render_uptime = None  # 程序啟動到第一次畫面完成的秒數
+        self._lock = threading.Lock()
+    
+    def run(self, wait=False):
+        """開始預先載入（只執行一次），wait=True 時等待完成"""
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+                # 程序共用資源在呼叫端取得，背景執行緒不直接呼叫 Streamlit 快取函式
+                get_time_parser()
+                _iso_ts_cache()
+                self._registry = get_group_registry()
+                resources = (self._registry, get_render_cache(), _group_css_cache())
+                threading.Thread(target=self._preload_all, args=resources, name="warm-start", daemon=True).start()
+        if wait:
+            self.ready.wait()
+        return self
+    
+    def _preload_all(self, registry, render_cache, css_cache):
+        try:
+            groups = self._select_groups(registry.groups())
+            preload = lambda item: self._preload_group(item, registry, render_cache, css_cache)
+            with ThreadPoolExecutor(max_workers=WARM_START_WORKERS, thread_name_prefix="warm-start") as pool:
+                for group_name, result in zip(groups, pool.map(preload, groups.items())):
+                    if isinstance(result, Exception):
+                        self.errors[group_name] = str(result)
+                    elif result is None:
+                        self.skipped.append(group_name)
+                    else:
+                        self.timings[group_name] = result
+        except Exception as e:
+            self.errors['*'] = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+            self.ready.set()
+            print(f"預先載入完成：{len(self.timings)} 個群組，{self.finished_at - self.started_at:.2f} 秒" +
+                  (f"，失敗 {list(self.errors)}" if self.errors else "") +
+                  (f"，{len(self.skipped)} 個群組留待使用時載入" if self.skipped else ""))
+    
+    def _select_groups(self, groups):
+        """要預先載入的群組：數據檔案最近更新的 WARM_START_GROUPS 個，其他記為略過"""
+        def last_update(item):
+            try:
+                return os.stat(f"{item[1]['file_prefix']}_boss_data.json").st_mtime_ns
+            except OSError:
+                return 0
+        ordered = sorted(groups.items(), key=last_update, reverse=True)
+        count = WARM_START_GROUPS or len(ordered)
+        self.skipped.extend(group_name for group_name, _ in ordered[count:])
+        return dict(ordered[:count])
+    
+    def _preload_group(self, item, registry, render_cache, css_cache):
+        """載入群組並建立名稱索引、頻道索引、歷史索引、CSS 與目前這一分鐘的預設畫面數據"""
+        group_name, group_config = item
+        started = time.monotonic()
+        # 已載入的群組達到記憶體上限時不再預先載入，避免預先載入的群組互相釋放
+        if sum(registry.loaded_groups().values()) >= TRACKER_MEMORY_CAP_BYTES:
+            return None
+        try:
+            tracker = registry.get_tracker(group_name)
+            get_group_css(group_name, group_config, css_cache)
+            # 以指定方式觸發延遲建立的索引（單獨的運算式會被 Streamlit magic 當成輸出）
+            indexes = (tracker.name_index, tracker.kill_index, tracker.history.preload())
+            channels = tracker.channel_list()
+            view_channels = tuple(channels) if len(channels) > 1 else (DEFAULT_CHANNEL,)
+            minute = int(get_taiwan_timestamp() // 60)
+            render_cache.get_or_build(
+                (group_config['file_prefix'], tracker.data_version, view_channels, minute),
+                lambda: tracker.build_render_snapshot(minute * 60, view_channels)
+            )
+            return round(time.monotonic() - started, 3)
+        except Exception as e:
+            return e
+    
+    def mark_first_render(self):
+        """記錄第一次畫面完成的時間（程序啟動後秒數）"""
+        if self.first_render_uptime is None:
+            self.first_render_uptime = process_uptime_seconds()
+            print(f"首次畫面完成：程序啟動後 {self.first_render_uptime} 秒")
+    
+    def status(self):
+        """就緒狀態（供健康檢查）"""
+        return {
+            'ready': self.ready.is_set(),
+            'preload_seconds': round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+            'groups': self.timings,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'loaded_groups': len(self._registry.loaded_groups()) if self._registry else 0,
+            'uptime_seconds': process_uptime_seconds(),
+            'first_render_uptime_seconds': self.first_render_uptime,
+        }
+
+@st.cache_resource
+def get_warm_start():
+    """程序共用的預先載入狀態"""
+    return WarmStart()
+
+# 記憶體摘要寫入的檔案與間隔（秒，0 表示不寫入）
+MEMORY_LOG_FILE = "memory_usage.jsonl"
+MEMORY_LOG_INTERVAL_SECONDS = int(os.environ.get("MEMORY_LOG_INTERVAL_SECONDS", 600))
+# 每個 session 估算大小的最短間隔（秒）；估算需要走訪整個 session_state，不在每次執行時進行
+SESSION_SAMPLE_SECONDS = int(os.environ.get("SESSION_SAMPLE_SECONDS", 60))
+# 記憶體分析顯示的項目數
+MEMORY_TOP_ENTRIES = 15
+# 管理頁面金鑰（設定後以 ?admin=金鑰 開啟管理資訊）
+ADMIN_KEY = os.environ.get("BOSS_ADMIN_KEY", "")
+
+def process_rss_bytes():
+    """目前程序的常駐記憶體（位元組，無法取得時回傳None）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _trace_owner(filename):
+    """依檔案路徑歸類記憶體配置的來源（套件名稱、app.py 或標準庫）"""
+    if os.path.basename(filename) == "app.py":
+        return "app.py"
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1].split(os.sep, 1)[0]
+    return "Python標準庫/其他"
+
+class MemoryMonitor:
+    """記憶體統計 - 依群組、渲染快取與 session 估算用量，按需以 tracemalloc 取樣，並定期寫入摘要"""
+    def __init__(self, registry, render_cache, log_file=MEMORY_LOG_FILE, interval=MEMORY_LOG_INTERVAL_SECONDS):
+        # 程序共用資源由呼叫端傳入，背景執行緒不直接呼叫 Streamlit 快取函式
+        self.registry = registry
+        self.render_cache = render_cache
+        self.log_file = log_file
+        self.interval = interval
+        self._sessions = {}  # session 代號 -> (最後使用時間, {鍵: 位元組}, 估算時間)
+        self._lock = threading.Lock()
+        if interval > 0:
+            threading.Thread(target=self._log_loop, name="memory-log", daemon=True).start()
+    
+    def record_session(self, session_tag, session_state, force=False):
+        """記錄 session 中各鍵的估算大小（每次執行結束時呼叫，同一 session 每 SESSION_SAMPLE_SECONDS 秒最多估算一次）"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._sessions.get(session_tag)
+            if last is not None and not force and now - last[2] < SESSION_SAMPLE_SECONDS:
+                self._sessions[session_tag] = (now, last[1], last[2])
+                return
+        sizes = {str(key): deep_getsizeof(value) for key, value in session_state.items()}
+        with self._lock:
+            self._sessions[session_tag] = (now, sizes, now)
+            for tag in [tag for tag, (seen, _, _) in self._sessions.items() if now - seen > GROUP_IDLE_SECONDS]:
+                del self._sessions[tag]
+    
+    def sessions(self):
+        """{session 代號: {鍵: 位元組}}"""
+        with self._lock:
+            return {tag: dict(sizes) for tag, (_, sizes, _) in self._sessions.items()}
+    
+    def summary(self):
+        """目前的記憶體摘要（位元組）"""
+        sessions = self.sessions()
+        return {
+            'ts': get_taiwan_time().isoformat(timespec='seconds'),
+            'rss': process_rss_bytes(),
+            'groups': {group_name: sum(parts.values()) for group_name, parts in self.registry.memory_breakdown().items()},
+            'render_cache': self.render_cache.sizes(),
+            'sessions': len(sessions),
+            'session_bytes': sum(sum(sizes.values()) for sizes in sessions.values()),
+            'traced': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        }
+    
+    def write_summary(self):
+        """寫入一行記憶體摘要"""
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.summary(), ensure_ascii=False) + "\n")
+    
+    def _log_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_summary()
+            except Exception as e:
+                print(f"記憶體摘要寫入錯誤: {e}")
+    
+    def start_tracing(self):
+        """開始 tracemalloc 追蹤（只記錄開始之後的配置）"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def stop_tracing(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def sample(self, top=MEMORY_TOP_ENTRIES):
+        """tracemalloc 取樣，回傳 {'by_owner': [(來源, 位元組)], 'by_line': [(位置, 位元組, 次數)]}；未追蹤時為None"""
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+        by_owner = {}
+        for stat in snapshot.statistics('filename'):
+            owner = _trace_owner(stat.traceback[0].filename)
+            by_owner[owner] = by_owner.get(owner, 0) + stat.size
+        by_line = [
+            (f"{_trace_owner(stat.traceback[0].filename)}:{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size, stat.count)
+            for stat in snapshot.statistics('lineno')[:top]
+        ]
+        return {'by_owner': sorted(by_owner.items(), key=lambda item: -item[1])[:top], 'by_line': by_line}
+
+@st.cache_resource
+def get_memory_monitor():
+    """程序共用的記憶體統計"""
+    return MemoryMonitor(get_group_registry(), get_render_cache())
+
+# 自動備份目錄與間隔（秒，0 表示停用）
+BACKUP_DIR = os.environ.get("BOSS_BACKUP_DIR", "backups")
+BACKUP_INTERVAL_SECONDS = int(os.environ.get("BACKUP_INTERVAL_SECONDS", 900))
+# 每幾次增量備份後寫一次完整備份（還原最多讀取一個完整備份加這麼多個增量）
+BACKUP_FULL_EVERY = int(os.environ.get("BACKUP_FULL_EVERY", 24))
+# 保留最近幾組完整備份（連同其後的增量）
+BACKUP_KEEP_FULL = int(os.environ.get("BACKUP_KEEP_FULL", 7))
+# 備份檔名：{台灣時間}_{full|inc}.json.gz
+BACKUP_NAME_PATTERN = re.compile(r"(\d{8}_\d{6})_(full|inc)\.json\.gz")
+
+def backup_changes(old, new):
+    """兩份擊殺記錄的差異 {頻道: {BOSS名稱: 新的ISO時間或None（已清除）}}"""
+    changes = {}
+    for channel in set(old) | set(new):
+        before, after = old.get(channel, {}), new.get(channel, {})
+        diff = {name: after.get(name) for name in set(before) | set(after) if before.get(name) != after.get(name)}
+        if diff:
+            changes[channel] = diff
+    return changes
+
+class BackupManager:
+    """定時增量備份 - 讀取各群組數據檔案，只寫入與上次備份的差異並定期寫完整備份（gzip 壓縮），依完整備份數量輪替"""
+    def __init__(self, registry, backup_dir=BACKUP_DIR, interval=BACKUP_INTERVAL_SECONDS,
+                 full_every=BACKUP_FULL_EVERY, keep_full=BACKUP_KEEP_FULL):
+        self.registry = registry
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.full_every = full_every
+        self.keep_full = keep_full
+        self._state = {}   # 群組 -> {'version': 數據檔版本, 'kills': 上次備份的擊殺記錄, 'incrementals': 增量數, 'ts': 上次備份時間}
+        self.errors = {}   # 群組 -> 錯誤訊息
+        self.last_run = None
+        self._lock = threading.Lock()
+        if interval > 0:
+            threading.Thread(target=self._backup_loop, name="backup", daemon=True).start()
+    
+    def _group_dir(self, group_prefix):
+        return os.path.join(self.backup_dir, group_prefix)
+    
+    def points(self, group_prefix):
+        """群組的備份點 [(時間戳, 'full'或'inc', 檔名)]（由舊到新）"""
+        try:
+            names = sorted(os.listdir(self._group_dir(group_prefix)))
+        except OSError:
+            return []
+        points = []
+        for name in names:
+            match = BACKUP_NAME_PATTERN.fullmatch(name)
+            if match:
+                ts = int(datetime.strptime(match[1], '%Y%m%d_%H%M%S').replace(tzinfo=TW_TZ).timestamp())
+                points.append((ts, match[2], name))
+        return points
+    
+    def _read(self, group_prefix, name):
+        with gzip.open(os.path.join(self._group_dir(group_prefix), name), 'rt', encoding='utf-8') as f:
+            return {int(channel): kills for channel, kills in json.load(f)['kills'].items()}
+    
+    def _write(self, group_prefix, kind, ts, kills):
+        group_dir = self._group_dir(group_prefix)
+        os.makedirs(group_dir, exist_ok=True)
+        name = f"{datetime.fromtimestamp(ts, TW_TZ).strftime('%Y%m%d_%H%M%S')}_{kind}.json.gz"
+        path = os.path.join(group_dir, name)
+        # 先寫暫存檔再替換，暫存檔不符合檔名格式，不會被當成備份點
+        temp_path = path + ".tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'kind': kind, 'ts': ts, 'kills': {str(channel): kills for channel, kills in sorted(kills.items())}}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return name
+    
+    def state_at(self, group_prefix, name):
+        """備份點當時的擊殺記錄 {頻道: {BOSS名稱: ISO時間}}（從之前最近的完整備份開始，只套用之後的增量）"""
+        points = self.points(group_prefix)
+        names = [point_name for _, _, point_name in points]
+        if name not in names:
+            raise BossDataError(f"找不到備份 {name}")
+        end = names.index(name)
+        fulls = [i for i in range(end + 1) if points[i][1] == 'full']
+        if not fulls:
+            raise BossDataError(f"{name} 之前沒有完整備份")
+        state = self._read(group_prefix, names[fulls[-1]])
+        for inc_name in names[fulls[-1] + 1:end + 1]:
+            for channel, changes in self._read(group_prefix, inc_name).items():
+                kills = state.setdefault(channel, {})
+                for boss_name, value in changes.items():
+                    if value is None:
+                        kills.pop(boss_name, None)
+                    else:
+                        kills[boss_name] = value
+        return state
+    
+    def _resume(self, group_prefix):
+        """程序重新啟動後從最新的備份鏈接續（讀不到時下次寫完整備份）"""
+        points = self.points(group_prefix)
+        fulls = [i for i, (_, kind, _) in enumerate(points) if kind == 'full']
+        if fulls:
+            try:
+                kills = self.state_at(group_prefix, points[-1][2])
+                return {'version': None, 'kills': kills, 'incrementals': len(points) - 1 - fulls[-1], 'ts': points[-1][0]}
+            except (OSError, ValueError, KeyError, BossDataError) as e:
+                print(f"備份鏈讀取錯誤（{group_prefix}）: {e}")
+        return {'version': None, 'kills': None, 'incrementals': 0, 'ts': 0}
+    
+    def backup_group(self, group_prefix, now_ts=None):
+        """備份一個群組（數據檔案未變更時略過），回傳寫入的備份檔名或None"""
+        data_file = f"{group_prefix}_boss_data.json"
+        # 等待該群組已排隊的寫入，備份到最新的數據
+        (self.registry.storage or get_storage_io()).flush(group_prefix)
+        try:
+            version = os.stat(data_file).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            if group_prefix not in self._state:
+                self._state[group_prefix] = self._resume(group_prefix)
+            state = self._state[group_prefix]
+            if version == state['version']:
+                return None
+            # 數據檔案以替換方式寫入，讀到的一定是完整的內容
+            with open(data_file, encoding='utf-8') as f:
+                channel_kills, _ = validate_boss_data(json.load(f))
+            kills = {channel: {name: value for name, value in records.items() if value} for channel, records in channel_kills.items()}
+            kills = {channel: records for channel, records in kills.items() if records}
+            # 同一秒內的備份往後順延，避免覆蓋前一個備份點
+            ts = max(int(get_taiwan_timestamp() if now_ts is None else now_ts), state['ts'] + 1)
+            if state['kills'] is None or state['incrementals'] >= self.full_every:
+                name = self._write(group_prefix, 'full', ts, kills)
+                incrementals = 0
+            else:
+                changes = backup_changes(state['kills'], kills)
+                if not changes:
+                    state['version'] = version
+                    return None
+                name = self._write(group_prefix, 'inc', ts, changes)
+                incrementals = state['incrementals'] + 1
+            self._state[group_prefix] = {'version': version, 'kills': kills, 'incrementals': incrementals, 'ts': ts}
+            self._rotate(group_prefix)
+            return name
+    
+    def _rotate(self, group_prefix):
+        """只保留最近 keep_full 組完整備份（連同其後的增量）"""
+        points = self.points(group_prefix)
+        fulls = [i for i, (_, kind, _) in enumerate(points) if kind == 'full']
+        if len(fulls) > self.keep_full:
+            for _, _, name in points[:fulls[-self.keep_full]]:
+                os.remove(os.path.join(self._group_dir(group_prefix), name))
+    
+    def run_once(self, now_ts=None):
+        """備份所有群組，回傳 {群組: 備份檔名}（只列出有寫入的群組）"""
+        written = {}
+        for group_name, group_config in self.registry.groups().items():
+            try:
+                name = self.backup_group(group_config['file_prefix'], now_ts)
+                self.errors.pop(group_name, None)
+            except Exception as e:
+                self.errors[group_name] = str(e)
+                print(f"備份錯誤（{group_name}）: {e}")
+                continue
+            if name:
+                written[group_name] = name
+        self.last_run = get_taiwan_time()
+        return written
+    
+    def _backup_loop(self):
+        # 啟動時先備份一次，之後定時備份（在背景執行，不影響頁面執行）
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"備份錯誤: {e}")
+            time.sleep(self.interval)
+
+@st.cache_resource
+def get_backup_manager():
+    """程序共用的自動備份"""
+    return BackupManager(get_group_registry())
+
+# 分析匯出：輸出目錄（BOSS_EXPORT_DIR）與每批寫入的行數（記憶體用量只與批次大小有關）
+EXPORT_DIR = os.environ.get("BOSS_EXPORT_DIR", "exports")
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 65536))
+# 匯出格式與副檔名（Arrow IPC 即 Feather v2，未壓縮可直接 memory-map）
+EXPORT_FORMATS = {'arrow': '.arrow', 'parquet': '.parquet', 'csv': '.csv'}
+# 匯出表格的欄位：dict 為字典編碼的字串，其餘為整數（時間為 epoch 秒，未記錄為空值）
+EXPORT_TABLES = {
+    'boss_state': [('group', 'dict'), ('channel', 'int16'), ('boss', 'dict'), ('respawn_minutes', 'int32'),
+                   ('last_killed', 'int64'), ('next_respawn', 'int64')],
+    'kill_history': [('group', 'dict'), ('channel', 'int16'), ('boss', 'dict'),
+                     ('event_ts', 'int64'), ('last_killed', 'int64')],
+}
+
+def available_export_formats():
+    """目前環境可用的匯出格式"""
+    return [fmt for fmt in EXPORT_FORMATS if pa is not None or fmt == 'csv']
+
+class ColumnarWriter:
+    """分批寫入欄式檔案 - 字串欄位以只增不減的字典編碼（Arrow IPC 只寫入字典差異），沒有 pyarrow 時寫 CSV"""
+    def __init__(self, path, fmt, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+        self.path = path
+        self.fmt = fmt
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._pending = []
+        self._codes = {name: {} for name, kind in columns if kind == 'dict'}  # 欄位 -> {字串: 字典索引}
+        self._dictionaries = {name: [] for name in self._codes}
+        self._tmp_path = f"{path}.{os.urandom(4).hex()}.tmp"  # 同時進行的匯出各自寫自己的暫存檔
+        if fmt == 'csv':
+            self._file = open(self._tmp_path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow([name for name, _ in columns])
+            return
+        self._schema = pa.schema([
+            (name, pa.dictionary(pa.int32(), pa.string()) if kind == 'dict' else getattr(pa, kind)())
+            for name, kind in columns
+        ])
+        if fmt == 'parquet':
+            self._file = None
+            self._writer = pa_parquet.ParquetWriter(self._tmp_path, self._schema)
+        else:
+            self._file = pa.OSFile(self._tmp_path, 'wb')
+            self._writer = pa_ipc.new_file(self._file, self._schema,
+                                           options=pa_ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+    
+    def write(self, rows):
+        """寫入一串資料列（可為產生器，每 chunk_rows 行寫出一批）"""
+        for row in rows:
+            self._pending.append(row)
+            if len(self._pending) >= self.chunk_rows:
+                self._flush()
+    
+    def _encode(self, name, values):
+        """字串轉字典索引（新字串加在字典最後，之前的批次索引不變）"""
+        codes = self._codes[name]
+        dictionary = self._dictionaries[name]
+        indices = []
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(dictionary, pa.string()))
+    
+    def _flush(self):
+        if not self._pending:
+            return
+        if self.fmt == 'csv':
+            self._writer.writerows(self._pending)
+        else:
+            arrays = [
+                self._encode(name, values) if kind == 'dict' else pa.array(values, getattr(pa, kind)())
+                for (name, kind), values in zip(self.columns, zip(*self._pending))
+            ]
+            self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        self.rows += len(self._pending)
+        self._pending = []
+    
+    def _close_files(self):
+        if self.fmt != 'csv':
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+    
+    def close(self):
+        """寫出剩餘資料並以完成的檔案取代舊檔"""
+        self._flush()
+        self._close_files()
+        os.replace(self._tmp_path, self.path)
+    
+    def _abort(self):
+        try:
+            self._close_files()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+def _export_group_kills(registry, group_config):
+    """直接讀取群組的數據檔案（不載入tracker），回傳 {頻道: {BOSS名稱: ISO時間}}；檔案損毀時回傳None"""
+    group_prefix = group_config['file_prefix']
+    # 等待該群組已排隊的寫入，匯出最新的數據
+    (registry.storage or get_storage_io()).flush(group_prefix)
+    channel_kills = {DEFAULT_CHANNEL: {}}
+    try:
+        with open(f"{group_prefix}_boss_data.json", encoding='utf-8') as f:
+            channel_kills, _ = validate_boss_data(json.load(f))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"匯出略過 {group_prefix}: {e}")
+        return None
+    for channel in range(1, group_config.get('channels', 1) + 1):
+        channel_kills.setdefault(channel, {})
+    return channel_kills
+
+def export_state_rows(registry):
+    """所有群組各頻道的目前狀態 (群組, 頻道, BOSS, 重生分鐘, 擊殺時間, 預估重生時間)"""
+    roster_store = registry.roster_store or get_roster_store()
+    for group_name, group_config in list(registry.groups().items()):
+        channel_kills = _export_group_kills(registry, group_config)
+        if channel_kills is None:
+            continue
+        _, roster = roster_store.effective(group_config['file_prefix'])
+        for channel, kills in sorted(channel_kills.items()):
+            for name, respawn_minutes in roster.items():
+                last_killed = kills.get(name)
+                killed_ts = int(parse_iso_ts(last_killed)) if last_killed else None
+                respawn_ts = killed_ts + respawn_minutes * 60 if killed_ts is not None else None
+                yield (group_name, channel, name, respawn_minutes, killed_ts, respawn_ts)
+
+def export_history_rows(registry):
+    """所有群組各頻道的擊殺歷史事件 (群組, 頻道, BOSS, 事件時間, 擊殺時間)，逐行讀取日誌"""
+    epochs = {}  # 同一批事件的時間字串相同，只解析一次
+    def epoch(value):
+        ts = epochs.get(value)
+        if ts is None:
+            if len(epochs) >= 10000:
+                epochs.clear()
+            ts = epochs[value] = int(_iso_to_ts(value))
+        return ts
+    
+    for group_name, group_config in list(registry.groups().items()):
+        channel_kills = _export_group_kills(registry, group_config)
+        for channel in sorted(channel_kills or {DEFAULT_CHANNEL: {}}):
+            group_prefix = group_config['file_prefix']
+            log_file = KillHistory(group_prefix if channel == DEFAULT_CHANNEL else f"{group_prefix}_ch{channel}").log_file
+            if not os.path.exists(log_file):
+                continue
+            with open(log_file, 'rb') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                        row = (group_name, channel, event['boss'], epoch(event['ts']),
+                               epoch(event['last_killed']) if event['last_killed'] else None)
+                    except (ValueError, KeyError):
+                        continue  # 寫到一半或損毀的行
+                    yield row
+
+def export_analytics(registry, fmt=None, out_dir=EXPORT_DIR, chunk_rows=EXPORT_CHUNK_ROWS):
+    """匯出所有群組的目前狀態與擊殺歷史為欄式檔案，回傳 {表格: (檔案路徑, 行數)}"""
+    fmt = fmt or ('arrow' if pa is not None else 'csv')
+    if fmt not in available_export_formats():
+        raise ValueError(f"無法使用的匯出格式: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    sources = {'boss_state': export_state_rows, 'kill_history': export_history_rows}
+    results = {}
+    for table, columns in EXPORT_TABLES.items():
+        path = os.path.join(out_dir, table + EXPORT_FORMATS[fmt])
+        with ColumnarWriter(path, fmt, columns, chunk_rows) as writer:
+            writer.write(sources[table](registry))
+        results[table] = (path, writer.rows)
+    return results
+
+# 聊天記錄匯入：每批寫入的擊殺數、保留的無法辨識行數
+IMPORT_BATCH_SIZE = 500
+IMPORT_UNMATCHED_SAMPLES = 20
+# LINE 匯出的日期行：2025/08/11（一）、2025.08.11 星期一
+CHAT_DATE_HEADER = re.compile(r"(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})\s*(?:[（(]\S+[）)]|星期\S|週\S)?")
+# 訊息時間：[2025/08/11 02:35]、[8/11/2025 2:35 AM]、02:35、下午2:35（沒有日期時沿用日期行）
+CHAT_MESSAGE_STAMP = re.compile(
+    r"\[?(?:(?:(?P<year>\d{4})[/.-](?P<month>\d{1,2})[/.-](?P<day>\d{1,2})|(?P<us_month>\d{1,2})/(?P<us_day>\d{1,2})/(?P<us_year>\d{4}))[ T,]+)?"
+    r"(?P<meridiem>上午|下午)?\s*(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?\s*(?P<ampm>AM|PM)?\]?\s*(?P<text>.*)",
+    re.IGNORECASE
+)
+# 擊殺關鍵字：有BOSS名稱加關鍵字或時間才視為擊殺回報，只有關鍵字時列為無法辨識
+CHAT_KILL_WORDS = re.compile(r"死|擊殺|击杀|殺|倒|掛|kill", re.IGNORECASE)
+# 可能是時間的片段（交給時間解析器判斷，前後不能緊接英數字，避免把使用者名稱當成時間）
+CHAT_TIME_TOKEN = re.compile(r"(?<![A-Za-z\d])(?:-?[\d:/]+(?:\d|min|[hms]|個?小時|分鐘?|秒鐘?)*前?|剛剛|剛才)(?![A-Za-z\d])")
+
+class ChatLogImporter:
+    """聊天記錄匯入 - 以產生器串接逐行讀取、辨識BOSS、解析時間、去除重複與分批寫入，記憶體用量與檔案大小無關"""
+    def __init__(self, tracker, channel=DEFAULT_CHANNEL, batch_size=IMPORT_BATCH_SIZE):
+        self.tracker = tracker
+        self.channel = channel
+        self.batch_size = batch_size
+        self._parser = get_time_parser()
+        # 名稱與別名以最長的優先比對
+        name_index = tracker.name_index
+        self._names = {name.lower(): name for name in name_index.sorted_names}
+        self._names.update({alias.lower(): name for alias, name in name_index.aliases.items()})
+        self._boss_pattern = re.compile("|".join(re.escape(key) for key in sorted(self._names, key=len, reverse=True)), re.IGNORECASE)
+        self._name_index = name_index
+        # 同一BOSS在重生時間內不可能再被擊殺，這段時間內的回報視為同一次擊殺
+        self._dedup_seconds = {
+            name: max(KILL_DEDUP_SECONDS, boss_data['respawn_minutes'] * 60 - KILL_DEDUP_SECONDS)
+            for name, boss_data in tracker.channel_bosses(channel).items()
+        }
+        self.stats = {'lines': 0, 'kills': 0, 'duplicates': 0, 'future': 0, 'unmatched': 0, 'updated': 0, 'backfilled': 0, 'batches': 0}
+        self.unmatched = []  # [(行號, 內容)]，最多 IMPORT_UNMATCHED_SAMPLES 筆
+    
+    def _unmatched(self, line_no, text):
+        self.stats['unmatched'] += 1
+        if len(self.unmatched) < IMPORT_UNMATCHED_SAMPLES:
+            self.unmatched.append((line_no, text[:200]))
+    
+    def _messages(self, lines):
+        """逐行產生 (行號, 訊息時間或None, 內容)；沒有時間的行沿用前一則訊息的時間"""
+        day = None
+        message_time = None
+        for line_no, line in enumerate(lines, 1):
+            self.stats['lines'] += 1
+            line = line.strip()
+            if not line:
+                continue
+            header = CHAT_DATE_HEADER.fullmatch(line)
+            if header:
+                day = tuple(int(value) for value in header.groups()[:3])
+                continue
+            stamp = CHAT_MESSAGE_STAMP.match(line)
+            if stamp:
+                if stamp['year']:
+                    day = (int(stamp['year']), int(stamp['month']), int(stamp['day']))
+                elif stamp['us_year']:
+                    day = (int(stamp['us_year']), int(stamp['us_month']), int(stamp['us_day']))
+                hour = int(stamp['hour']) % 12 if stamp['meridiem'] or stamp['ampm'] else int(stamp['hour'])
+                if stamp['meridiem'] == '下午' or (stamp['ampm'] or '').upper() == 'PM':
+                    hour += 12
+                try:
+                    message_time = datetime(*day, hour, int(stamp['minute']), int(stamp['second'] or 0), tzinfo=TW_TZ) if day else None
+                except ValueError:
+                    message_time = None
+                line = stamp['text']
+            yield line_no, message_time, line
+    
+    def _resolve_time(self, segment, message_time):
+        """內容中的擊殺時間（以訊息時間為現在時間解析），沒有寫時間時為訊息時間；不知道訊息日期時為None"""
+        if message_time is None:
+            return None
+        for token in CHAT_TIME_TOKEN.findall(segment):
+            parsed = self._parser.parse(token, message_time)
+            if parsed is not None:
+                return parsed
+        return message_time
+    
+    def _find_bosses(self, text):
+        """內容中的BOSS [(開始, 結束, BOSS名稱)]；沒有完整名稱或別名時，以名稱索引解析唯一的字首（例如「巨蟻」）"""
+        found = [(match.start(), match.end(), self._names[match.group().lower()]) for match in self._boss_pattern.finditer(text)]
+        if found or not CHAT_KILL_WORDS.search(text):
+            return found
+        for match in re.finditer(r"[^\s\d:/,，。!！?？]+", text):
+            word = CHAT_KILL_WORDS.split(match.group())[0]
+            boss_name = self._name_index.resolve(word) if word else None
+            if boss_name:
+                return [(match.start(), match.start() + len(word), boss_name)]
+        return []
+    
+    def _kills(self, messages):
+        """產生 (擊殺時間戳, BOSS名稱)；一行有多個BOSS時各自取到下一個BOSS之前的內容"""
+        for line_no, message_time, text in messages:
+            bosses = self._find_bosses(text)
+            if not bosses:
+                if CHAT_KILL_WORDS.search(text):
+                    self._unmatched(line_no, text)
+                continue
+            for i, (start, end, boss_name) in enumerate(bosses):
+                if len(bosses) > 1:
+                    segment = text[end:bosses[i + 1][0] if i + 1 < len(bosses) else len(text)]
+                else:
+                    segment = text[:start] + " " + text[end:]
+                if not CHAT_KILL_WORDS.search(segment) and not CHAT_TIME_TOKEN.search(segment):
+                    continue  # 只提到BOSS名稱的聊天
+                killed = self._resolve_time(segment, message_time)
+                if killed is None:
+                    self._unmatched(line_no, text)
+                    continue
+                yield int(killed.timestamp()), boss_name
+    
+    def _dedupe(self, kills, latest_allowed):
+        """同一次擊殺的多筆回報只保留第一筆（重生時間內的回報視為同一次），略過未來的時間"""
+        last_seen = {}
+        for killed_ts, boss_name in kills:
+            if killed_ts > latest_allowed:
+                self.stats['future'] += 1
+                continue
+            previous = last_seen.get(boss_name)
+            if previous is not None and abs(killed_ts - previous) <= self._dedup_seconds[boss_name]:
+                self.stats['duplicates'] += 1
+                continue
+            last_seen[boss_name] = killed_ts
+            self.stats['kills'] += 1
+            yield killed_ts, boss_name
     
-    /* 通知設定樣式 */
-    .notification-settings {{
-        background: #e3f2fd;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        border: 1px solid #bbdefb;
-    }}
+    def _batches(self, kills):
+        """每 batch_size 筆擊殺依時間排序成一批"""
+        batch = []
+        for kill in kills:
+            batch.append(kill)
+            if len(batch) >= self.batch_size:
+                yield sorted(batch)
+                batch = []
+        if batch:
+            yield sorted(batch)
     
-    .notification-enabled {{
-        background: #d5f4e6;
-        border-color: #82c8a0;
-    }}
+    def run(self, lines, now=None):
+        """匯入可逐行讀取的聊天記錄（檔案或字串清單），回傳統計與無法辨識的行"""
+        if now is None:
+            now = get_taiwan_time()
+        started = time.perf_counter()
+        errors = []
+        kills = self._dedupe(self._kills(self._messages(lines)), now.timestamp() + TIME_PARSE_FUTURE_GRACE_SECONDS)
+        for batch in self._batches(kills):
+            updated, backfilled = self.tracker.import_kills(batch, now, self.channel)
+            self.stats['batches'] += 1
+            self.stats['updated'] += updated
+            self.stats['backfilled'] += backfilled
+        if self.stats['batches'] and not self.tracker.wait_saved():
+            errors.append(self.tracker.save_error or "寫入尚未完成，結果會在背景寫入")
+        seconds = time.perf_counter() - started
+        return dict(self.stats, seconds=round(seconds, 3),
+                    lines_per_second=round(self.stats['lines'] / seconds) if seconds > 0 else None,
+                    unmatched_samples=list(self.unmatched), errors=errors)
+
+# 旁路 HTTP 服務（行事曆訂閱等），與 Streamlit 使用不同的埠
+API_PORT = int(os.environ.get("API_PORT", 8502))
+# 成員瀏覽器連得到的服務網址（例如反向代理轉發到 API_PORT 的 https 網址）；未設定時不提供離線記錄與行事曆訂閱
+API_PUBLIC_URL = os.environ.get("API_PUBLIC_URL", "").rstrip("/")
+# 產生各群組同步權杖的密鑰；未設定時不接受離線同步
+API_SECRET = os.environ.get("BOSS_API_SECRET", "")
+# 離線佇列單批最多筆數與重試間隔（秒）
+SYNC_MAX_BATCH = 200
+SYNC_RETRY_SECONDS = 10
+# 同步請求內容上限（位元組）
+SYNC_MAX_BODY_BYTES = 64 * 1024
+# 行事曆預設推算範圍（小時）與上限
+CALENDAR_DEFAULT_HOURS = 24
+CALENDAR_MAX_HOURS = 168
+
+def api_token(group_prefix):
+    """群組的同步權杖（由 BOSS_API_SECRET 推導，換密鑰即可讓舊網址全部失效）"""
+    return hmac.new(API_SECRET.encode('utf-8'), group_prefix.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+def api_sync_available():
+    return bool(API_PUBLIC_URL and API_SECRET)
+
+def _ics_time(ts):
+    return time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(ts))
+
+def _ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ics_fold(line):
+    """依 RFC 5545 將超過75位元組的行折行"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    current = ""
+    for char in line:
+        limit = 75 if not parts else 74
+        if len((current + char).encode('utf-8')) > limit:
+            parts.append(current)
+            current = char
+        else:
+            current += char
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+class CalendarFeed:
+    """行事曆訂閱 - 依擊殺記錄推算重生事件，按BOSS增量產生並快取整份內容"""
+    def __init__(self):
+        self._events = {}  # (群組, BOSS, 擊殺時間, 重生分鐘, 小時) -> VEVENT 文字
+        self._feeds = {}   # (群組, 數據版本, 小時) -> (內容, ETag, 最後修改時間)
+        self._lock = threading.Lock()
     
-    .notification-disabled {{
-        background: #ffebee;
-        border-color: #ffab91;
-    }}
-</style>
-"""
+    def _boss_events(self, group_prefix, group_name, boss_name, killed_ts, respawn_minutes, window):
+        """單一BOSS在時間窗內的重生事件（擊殺時間未變時直接使用快取）"""
+        key = (group_prefix, boss_name, killed_ts, respawn_minutes, window)
+        cached = self._events.get(key)
+        if cached is not None:
+            return cached
+        window_start, window_end = window
+        period = respawn_minutes * 60
+        uid_base = hashlib.sha1(f"{group_prefix}/{boss_name}".encode('utf-8')).hexdigest()[:12]
+        lines = []
+        # 推算到時間窗內的第一次重生（至少是擊殺後的第一次）
+        respawn_ts = killed_ts + max(1, -(-(window_start - killed_ts) // period)) * period
+        while respawn_ts <= window_end:
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{uid_base}-{respawn_ts}@l2m-boss-tracker",
+                "DTSTAMP:__DTSTAMP__",  # 產生整份內容時填入
+                f"DTSTART:{_ics_time(respawn_ts)}",
+                f"DTEND:{_ics_time(respawn_ts + TIMELINE_SPAWN_WINDOW_MINUTES * 60)}",
+                f"SUMMARY:{_ics_escape(f'🐉 {boss_name} 重生（{group_name}）')}",
+                f"DESCRIPTION:{_ics_escape(f'上次擊殺 {format_ts(killed_ts)}，重生週期 {respawn_minutes} 分鐘（預估）')}",
+                "BEGIN:VALARM",
+                "ACTION:DISPLAY",
+                "TRIGGER:-PT5M",
+                f"DESCRIPTION:{_ics_escape(f'{boss_name} 5分鐘後重生')}",
+                "END:VALARM",
+                "END:VEVENT",
+            ]
+            respawn_ts += period
+        text = "".join(_ics_fold(line) for line in lines)
+        self._events[key] = text
+        return text
+    
+    def render(self, group_name, group_prefix, tracker, hours, now_ts=None):
+        """回傳 (內容bytes, ETag, 最後修改時間戳)"""
+        if now_ts is None:
+            now_ts = get_taiwan_timestamp()
+        # 時間窗以整點對齊，同一小時內數據未變更時內容與 ETag 保持不變
+        window_start = int(now_ts // 3600 * 3600)
+        window = (window_start, window_start + hours * 3600)
+        key = (group_prefix, tracker.data_version, window)
+        with self._lock:
+            cached = self._feeds.get(key)
+            if cached is not None:
+                return cached
+            # 同一群組舊版本或舊時間窗的快取不再需要
+            for old_key in [k for k in self._feeds if k[0] == group_prefix and (k[1], k[2][0]) != (tracker.data_version, window_start)]:
+                del self._feeds[old_key]
+            for old_key in [k for k in self._events if k[0] == group_prefix and k[4][0] != window_start]:
+                del self._events[old_key]
+            chunks = [
+                self._boss_events(group_prefix, group_name, boss_name, killed_ts, respawn_minutes, window)
+                for boss_name, killed_ts, respawn_minutes in tracker.get_kill_state()
+            ]
+            
+            header = "".join(_ics_fold(line) for line in [
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "PRODID:-//Lineage2M Boss Tracker//ZH-TW",
+                "CALSCALE:GREGORIAN",
+                f"X-WR-CALNAME:{_ics_escape(f'{group_name} BOSS重生')}",
+                "X-WR-TIMEZONE:Asia/Taipei",
+            ])
+            # DTSTAMP 是這份內容產生的時間，內容快取期間保持不變，ETag 才會穩定
+            body = (header + "".join(chunks) + "END:VCALENDAR\r\n").replace("__DTSTAMP__", _ics_time(now_ts)).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            last_modified = max(int(tracker.data_version[0] // 1_000_000_000), window_start)
+            self._feeds[key] = (body, etag, last_modified)
+            return self._feeds[key]
 
-class BossTracker:
-    def __init__(self, group_prefix):
-        self.data_file = f"{group_prefix}_boss_data.json"
-        self.bosses = self.load_boss_data()
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """旁路 HTTP 服務的請求處理"""
+    server_version = "L2MBossTracker"
     
-    def load_boss_data(self):
-        """載入BOSS數據"""
-        if os.path.exists(self.data_file):
+    def log_message(self, format, *args):
+        pass  # 不輸出每個請求的日誌
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        match = re.fullmatch(r"/calendar/([\w-]+)\.ics", url.path)
+        if match:
+            return self._send_calendar(match.group(1), parse_qs(url.query))
+        if url.path == "/healthz":
+            return self._send_json(200, {"status": "ok"})
+        if url.path == "/readyz":
+            # 預先載入完成前回傳 503，平台可等到就緒後才導入流量
+            status = self.server.warm_start.status()
+            return self._send_json(200 if status['ready'] else 503, status)
+        self.send_error(404)
+    
+    def do_OPTIONS(self):
+        # 離線記錄在 srcdoc iframe 中執行（來源為 null），無法限定來源；寫入改以群組權杖驗證
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+    
+    def do_POST(self):
+        url = urlsplit(self.path)
+        match = re.fullmatch(r"/sync/([\w-]+)", url.path)
+        if match:
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return self.get_default_bosses()
-        else:
-            return self.get_default_bosses()
+                return self._receive_sync(match.group(1), parse_qs(url.query))
+            except Exception as e:
+                # 未確認的回報留在裝置上，下次重送
+                print(f"離線同步失敗（{match.group(1)}）: {e}")
+                return self._send_json(500, {"error": "sync failed"})
+        self.send_error(404)
     
-    def get_default_bosses(self):
-        """獲取默認BOSS列表"""
-        return {
-            "佩爾利斯": {"respawn_minutes": 120, "last_killed": None},
-            "巴實那": {"respawn_minutes": 150, "last_killed": None},
-            "采爾圖巴": {"respawn_minutes": 180, "last_killed": None},
-            "潘納洛德": {"respawn_minutes": 180, "last_killed": None},
-            "安庫拉": {"respawn_minutes": 210, "last_killed": None},
-            "坦佛斯特": {"respawn_minutes": 210, "last_killed": None},
-            "史坦": {"respawn_minutes": 240, "last_killed": None},
-            "布賴卡": {"respawn_minutes": 240, "last_killed": None},
-            "魔圖拉": {"respawn_minutes": 240, "last_killed": None},
-            "特倫巴": {"respawn_minutes": 270, "last_killed": None},
-            "提米特利斯": {"respawn_minutes": 300, "last_killed": None},
-            "塔金": {"respawn_minutes": 300, "last_killed": None},
-            "雷比魯": {"respawn_minutes": 300, "last_killed": None},
-            "凱索思": {"respawn_minutes": 360, "last_killed": None},
-            "巨蟻女王": {"respawn_minutes": 360, "last_killed": None},
-            "卡雷斯": {"respawn_minutes": 360, "last_killed": None},
-            "貝希莫斯": {"respawn_minutes": 360, "last_killed": None},
-            "希瑟雷蒙": {"respawn_minutes": 360, "last_killed": None},
-            "塔拉金": {"respawn_minutes": 420, "last_killed": None},
-            "沙勒卡": {"respawn_minutes": 420, "last_killed": None},
-            "梅杜莎": {"respawn_minutes": 420, "last_killed": None},
-            "賽魯": {"respawn_minutes": 450, "last_killed": None},
-            "潘柴特": {"respawn_minutes": 480, "last_killed": None},
-            "突變克魯瑪": {"respawn_minutes": 480, "last_killed": None},
-            "被汙染的克魯瑪": {"respawn_minutes": 480, "last_killed": None},
-            "卡坦": {"respawn_minutes": 480, "last_killed": None},
-            "提米妮爾": {"respawn_minutes": 480, "last_killed": None},
-            "瓦柏": {"respawn_minutes": 480, "last_killed": None},
-            "克拉奇": {"respawn_minutes": 480, "last_killed": None},
-            "弗林特": {"respawn_minutes": 480, "last_killed": None},
-            "蘭多勒": {"respawn_minutes": 480, "last_killed": None},
-            "費德": {"respawn_minutes": 540, "last_killed": None},
-            "寇倫": {"respawn_minutes": 600, "last_killed": None},
-            "瑪杜克": {"respawn_minutes": 600, "last_killed": None},
-            "薩班": {"respawn_minutes": 720, "last_killed": None},
-            "核心基座": {"respawn_minutes": 720, "last_killed": None},
-            "猛龍獸": {"respawn_minutes": 720, "last_killed": None},
-            "黑色蕾爾莉": {"respawn_minutes": 720, "last_killed": None},
-            "司穆艾爾": {"respawn_minutes": 720, "last_killed": None},
-            "卡布里歐": {"respawn_minutes": 720, "last_killed": None},
-            "安德拉斯": {"respawn_minutes": 720, "last_killed": None},
-            "忘卻之鏡": {"respawn_minutes": 720, "last_killed": None},
-            "納伊阿斯": {"respawn_minutes": 720, "last_killed": None},
-            "希拉": {"respawn_minutes": 720, "last_killed": None},
-            "姆夫": {"respawn_minutes": 720, "last_killed": None},
-            "諾勒姆斯": {"respawn_minutes": 1080, "last_killed": None},
-            "烏坎巴": {"respawn_minutes": 1080, "last_killed": None},
-            "伊波斯": {"respawn_minutes": 1080, "last_killed": None},
-            "凱都都": {"respawn_minutes": 1080, "last_killed": None},
-            "伊格尼思": {"respawn_minutes": 1080, "last_killed": None},
-            "奧爾芬": {"respawn_minutes": 1440, "last_killed": None},
-            "哈普": {"respawn_minutes": 1440, "last_killed": None},
-            "歐克斯": {"respawn_minutes": 1440, "last_killed": None},
-            "塔那透斯": {"respawn_minutes": 1440, "last_killed": None},
-            "鳳凰": {"respawn_minutes": 1440, "last_killed": None},
-            "摩德烏斯": {"respawn_minutes": 1440, "last_killed": None},
-            "霸拉克": {"respawn_minutes": 1440, "last_killed": None},
-            "薩拉克斯": {"respawn_minutes": 1440, "last_killed": None},
-            "巴倫": {"respawn_minutes": 1440, "last_killed": None},
-            "黑卡頓": {"respawn_minutes": 1440, "last_killed": None},
-            "拉何": {"respawn_minutes": 1980, "last_killed": None}
-        }
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
     
-    def save_boss_data(self):
-        """保存BOSS數據"""
+    def _receive_sync(self, group_prefix, query):
+        """離線佇列同步：{"kills": [[冪等鍵, BOSS名稱, 擊殺時間戳, 頻道(可省略)], ...]}，網址需帶群組的 ?token="""
+        token = query.get('token', [""])[0]
+        if not API_SECRET or not hmac.compare_digest(token, api_token(group_prefix)):
+            return self._send_json(403, {"error": "invalid token"})
+        group_name = self._find_group(group_prefix)
+        if group_name is None:
+            return self._send_json(404, {"error": "unknown group"})
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.bosses, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            st.error(f"保存失敗: {e}")
-            return False
-    
-    def calculate_respawn_info(self, boss_name, boss_data):
-        """計算重生資訊"""
-        if boss_data['last_killed'] is None:
-            return "未擊殺", "等待擊殺", "⚪ 未記錄", "normal"
-        
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            return self._send_json(400, {"error": "invalid content length"})
+        if length < 0:
+            return self._send_json(400, {"error": "invalid content length"})
+        if length > SYNC_MAX_BODY_BYTES:
+            return self._send_json(413, {"error": "batch too large"})
         try:
-            last_killed = datetime.fromisoformat(boss_data['last_killed'])
-            # 如果last_killed沒有時區資訊，假設它是台灣時間
-            if last_killed.tzinfo is None:
-                last_killed = TW_TZ.localize(last_killed)
-            respawn_time = last_killed + timedelta(minutes=boss_data['respawn_minutes'])
-            current_time = get_taiwan_time()
-            
-            last_killed_str = last_killed.strftime('%m/%d %H:%M:%S')
-            respawn_time_str = respawn_time.strftime('%m/%d %H:%M:%S')
-            
-            if current_time >= respawn_time:
-                return last_killed_str, respawn_time_str, "✅ 已重生", "ready"
-            else:
-                time_left = respawn_time - current_time
-                hours = int(time_left.total_seconds() // 3600)
-                minutes = int((time_left.total_seconds() % 3600) // 60)
-                if hours > 0:
-                    status = f"⏳ {hours}h{minutes}m"
-                else:
-                    status = f"⏳ {minutes}m"
-                return last_killed_str, respawn_time_str, status, "waiting"
-                
-        except Exception as e:
-            return "錯誤", "錯誤", "❌ 錯誤", "error"
+            kills = json.loads(self.rfile.read(length))["kills"]
+            reports = [
+                (str(kill[0])[:64], str(kill[1]), int(kill[2]), int(kill[3]) if len(kill) > 3 else DEFAULT_CHANNEL)
+                for kill in kills[:SYNC_MAX_BATCH]
+            ]
+        except (ValueError, KeyError, TypeError, IndexError):
+            return self._send_json(400, {"error": "invalid batch"})
+        with self.server.registry.in_use(group_name):
+            acked, applied = self.server.registry.get_tracker(group_name).apply_kill_batch(reports)
+        self._send_json(200, {"acked": acked, "applied": applied})
     
-    def get_boss_dataframe(self):
-        """獲取BOSS數據框"""
-        # 按重生時間排序
-        sorted_bosses = sorted(self.bosses.items(), key=lambda x: x[1]['respawn_minutes'])
-        
-        data = []
-        for index, (boss_name, boss_data) in enumerate(sorted_bosses, 1):
-            respawn_minutes = boss_data['respawn_minutes']
-            hours = respawn_minutes // 60
-            minutes = respawn_minutes % 60
-            
-            if hours > 0:
-                respawn_time_str = f"{hours}h{minutes}m" if minutes > 0 else f"{hours}h"
-            else:
-                respawn_time_str = f"{minutes}m"
-            
-            last_killed_str, respawn_time_str_full, status, status_type = self.calculate_respawn_info(boss_name, boss_data)
-            
-            data.append({
-                '編號': f"{index:02d}",
-                'BOSS名稱': boss_name,
-                '重生時間': respawn_time_str,
-                '上次擊殺': last_killed_str,
-                '下次重生': respawn_time_str_full,
-                '狀態': status,
-                '_status_type': status_type  # 用於樣式
-            })
-        
-        return pd.DataFrame(data)
+    def _find_group(self, group_prefix):
+        for group_name, group_config in self.server.registry.groups().items():
+            if group_config['file_prefix'] == group_prefix:
+                return group_name
+        return None
     
-    def get_upcoming_bosses(self, minutes_ahead=5):
-        """獲取指定時間內即將重生的BOSS"""
-        current_time = get_taiwan_time()
-        upcoming_bosses = []
+    def _send_calendar(self, group_prefix, query):
+        group_name = self._find_group(group_prefix)
+        if group_name is None:
+            return self.send_error(404, "Unknown group")
+        try:
+            hours = int(query.get('hours', [CALENDAR_DEFAULT_HOURS])[0])
+        except ValueError:
+            return self.send_error(400, "Invalid hours")
+        hours = max(1, min(hours, CALENDAR_MAX_HOURS))
+        with self.server.registry.in_use(group_name):
+            tracker = self.server.registry.get_tracker(group_name)
+            body, etag, last_modified = self.server.calendar.render(group_name, group_prefix, tracker, hours)
         
-        for boss_name, boss_data in self.bosses.items():
-            if boss_data['last_killed'] is None:
-                continue
-                
+        # 條件式請求：內容未變更時回傳 304
+        not_modified = False
+        if self.headers.get('If-None-Match'):
+            not_modified = etag in [tag.strip() for tag in self.headers['If-None-Match'].split(",")] or self.headers['If-None-Match'].strip() == "*"
+        elif self.headers.get('If-Modified-Since'):
             try:
-                last_killed = datetime.fromisoformat(boss_data['last_killed'])
-                # 如果last_killed沒有時區資訊，假設它是台灣時間
-                if last_killed.tzinfo is None:
-                    last_killed = TW_TZ.localize(last_killed)
-                
-                respawn_time = last_killed + timedelta(minutes=boss_data['respawn_minutes'])
-                time_until_respawn = respawn_time - current_time
-                
-                # 檢查是否在指定時間內重生
-                if timedelta(0) <= time_until_respawn <= timedelta(minutes=minutes_ahead):
-                    minutes_left = int(time_until_respawn.total_seconds() / 60)
-                    seconds_left = int(time_until_respawn.total_seconds() % 60)
-                    
-                    upcoming_bosses.append({
-                        'name': boss_name,
-                        'respawn_time': respawn_time.strftime('%H:%M:%S'),
-                        'time_left': f"{minutes_left}m{seconds_left}s" if minutes_left > 0 else f"{seconds_left}s",
-                        'minutes_left': minutes_left,
-                        'seconds_left': seconds_left
-                    })
-            except:
-                continue
+                not_modified = parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp() >= last_modified
+            except (TypeError, ValueError):
+                pass
         
-        # 按剩餘時間排序
-        upcoming_bosses.sort(key=lambda x: x['minutes_left'] * 60 + x['seconds_left'])
-        return upcoming_bosses
-    
-    def parse_time_string(self, time_str):
-        """解析時間字串 - 僅支援兩種格式：MMDD/HHMMSS 和 HHMMSS"""
-        try:
-            time_str = time_str.strip()
-            current_time = get_taiwan_time()
-            
-            # 格式1: MMDD/HHMMSS (例如: 0811/163045)
-            if "/" in time_str and len(time_str) == 11:
-                try:
-                    date_part, time_part = time_str.split("/")
-                    if len(date_part) == 4 and len(time_part) == 6:
-                        month = int(date_part[:2])
-                        day = int(date_part[2:])
-                        hour = int(time_part[:2])
-                        minute = int(time_part[2:4])
-                        second = int(time_part[4:])
-                        
-                        # 使用當前年份並設定時區
-                        year = current_time.year
-                        parsed = datetime(year, month, day, hour, minute, second)
-                        # 將解析的時間設定為台灣時區
-                        parsed = TW_TZ.localize(parsed)
-                        return parsed
-                except (ValueError, IndexError):
-                    pass
-            
-            # 格式2: HHMMSS (例如: 163045)
-            elif len(time_str) == 6 and time_str.isdigit():
-                try:
-                    hour = int(time_str[:2])
-                    minute = int(time_str[2:4])
-                    second = int(time_str[4:])
-                    
-                    # 使用今天的日期並設定時區
-                    today = current_time.date()
-                    parsed = datetime.combine(today, datetime(1900, 1, 1, hour, minute, second).time())
-                    # 將解析的時間設定為台灣時區
-                    parsed = TW_TZ.localize(parsed)
-                    return parsed
-                except ValueError:
-                    pass
-            
-            return None
-        except Exception as e:
-            print(f"時間解析錯誤: {e}")  # 調試用
-            return None
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(last_modified, usegmt=True))
+        self.send_header("Cache-Control", "max-age=60")
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "text/calendar; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@st.cache_resource
+def start_api_server():
+    """啟動旁路 HTTP 服務（每個程序一次），埠被占用時回傳None"""
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", API_PORT), ApiRequestHandler)
+    except OSError as e:
+        print(f"HTTP 服務啟動失敗（埠 {API_PORT}）: {e}")
+        return None
+    server.daemon_threads = True
+    server.registry = get_group_registry()
+    server.calendar = CalendarFeed()
+    server.warm_start = get_warm_start()
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    return server
 
 # 初始化session state
 if 'selected_group' not in st.session_state:
     st.session_state.selected_group = None
 
-if 'boss_trackers' not in st.session_state:
-    st.session_state.boss_trackers = {}
+def get_group_tracker(group_name):
+    """取得群組的tracker（所有 session 共用）；尚未載入時在儲存執行緒載入，逾時回傳None"""
+    registry = get_group_registry()
+    if registry.loaded_tracker(group_name) is None:
+        with st.spinner(f"⏳ 正在載入 {group_name} 的數據..."):
+            try:
+                registry.load_async(group_name).result(timeout=STORAGE_IO_TIMEOUT_SECONDS)
+            except FutureTimeout:
+                st.warning(f"⏳ {group_name} 的數據載入超過 {STORAGE_IO_TIMEOUT_SECONDS:.0f} 秒，仍在背景載入中")
+                if st.button("🔄 重試", key=f"load_retry_{group_name}"):
+                    st.rerun()
+                return None
+    return registry.get_tracker(group_name)
+
+def show_kill_report(tracker, boss_name, now, channel=DEFAULT_CHANNEL):
+    """回報「現在」擊殺並顯示結果，同一次擊殺的重複回報只記為確認，不寫入也不重新執行"""
+    # 同一個 session 同一秒的重複點擊使用相同的冪等鍵
+    reporter = st.session_state.setdefault('reporter_id', os.urandom(8).hex())
+    killed_ts = int(now.timestamp())
+    outcome, reporters = tracker.report_kill(boss_name, killed_ts, f"{reporter}:{channel}:{boss_name}:{killed_ts}", now, channel)
+    label = tracker.display_name(boss_name, channel)
+    if outcome == "recorded":
+        st.success(f"✅ 已記錄 {label} 擊殺於 {now.strftime('%H:%M:%S')}")
+        st.rerun()
+    elif outcome == "confirmed":
+        kept = format_kill_time(tracker.channel_bosses(channel)[boss_name]['last_killed'])
+        st.info(f"👥 {label} 已記錄於 {kept}，這次回報已計入確認（共 {reporters} 人回報）")
+    elif outcome == "duplicate":
+        st.info(f"ℹ️ 已記錄過這次 {label} 擊殺")
+    elif outcome == "stale":
+        kept = format_kill_time(tracker.channel_bosses(channel)[boss_name]['last_killed'])
+        st.warning(f"⚠️ {label} 已有較新的擊殺記錄（{kept}），這次回報沒有覆蓋")
+    else:
+        st.error(f"❌ 無法記錄 {label}：BOSS已不在名冊、頻道不存在或時間超出範圍，請重新整理頁面")
+
+def show_memory_admin():
+    """管理資訊：記憶體用量（群組、渲染快取、session 與 tracemalloc 取樣）"""
+    monitor = get_memory_monitor()
+    st.markdown("---")
+    st.markdown("### 🧠 記憶體使用（管理）")
+    to_mb = lambda size: round(size / 1024 / 1024, 2)
+    to_kb = lambda size: round(size / 1024, 1)
+    
+    summary = monitor.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("程序常駐記憶體 (MB)", to_mb(summary['rss']) if summary['rss'] else "-")
+    with col2:
+        st.metric("群組數據 (MB)", to_mb(sum(summary['groups'].values())))
+    with col3:
+        st.metric("渲染快取 (MB)", to_mb(sum(summary['render_cache'].values())))
+    with col4:
+        st.metric(f"Session ×{summary['sessions']} (MB)", to_mb(summary['session_bytes']))
+    
+    breakdown = get_group_registry().memory_breakdown()
+    if breakdown:
+        st.markdown("#### 群組")
+        st.dataframe(pd.DataFrame([
+            {'群組': group_name, '項目': part, 'KB': to_kb(size)}
+            for group_name, parts in breakdown.items() for part, size in parts.items()
+        ]).sort_values('KB', ascending=False), use_container_width=True, hide_index=True)
+    
+    sessions = monitor.sessions()
+    if sessions:
+        st.markdown("#### Session（最大的項目）")
+        st.dataframe(pd.DataFrame([
+            {'Session': tag, '鍵': key, 'KB': to_kb(size)}
+            for tag, sizes in sessions.items() for key, size in sizes.items()
+        ]).sort_values('KB', ascending=False).head(MEMORY_TOP_ENTRIES), use_container_width=True, hide_index=True)
+    
+    st.markdown("#### tracemalloc 取樣")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("▶️ 開始追蹤", use_container_width=True, disabled=tracemalloc.is_tracing()):
+            monitor.start_tracing()
+            st.rerun()
+    with col2:
+        take_sample = st.button("📸 取樣", use_container_width=True, disabled=not tracemalloc.is_tracing())
+    with col3:
+        if st.button("⏹️ 停止追蹤", use_container_width=True, disabled=not tracemalloc.is_tracing()):
+            monitor.stop_tracing()
+            st.rerun()
+    st.caption("追蹤期間會增加記憶體與CPU用量，只記錄開始追蹤之後的配置；摘要每 "
+               f"{MEMORY_LOG_INTERVAL_SECONDS} 秒寫入 `{MEMORY_LOG_FILE}`")
+    if take_sample:
+        sample = monitor.sample()
+        if sample:
+            st.dataframe(pd.DataFrame(sample['by_owner'], columns=['來源', '位元組']), use_container_width=True, hide_index=True)
+            st.dataframe(pd.DataFrame(sample['by_line'], columns=['位置', '位元組', '配置次數']), use_container_width=True, hide_index=True)
+
+def show_table_pager(total_rows, key, reset_on=None):
+    """分頁控制，回傳目前頁面的行範圍 (起點, 終點)；reset_on 改變時回到第一頁"""
+    pages = max(1, -(-total_rows // TABLE_PAGE_SIZE))
+    signature_key = f"{key}_signature"
+    if reset_on is not None and st.session_state.get(signature_key) != reset_on:
+        st.session_state[signature_key] = reset_on
+        st.session_state[key] = 1
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page = st.number_input(f"📄 頁數（共 {pages} 頁，{total_rows} 筆）", min_value=1, max_value=pages, step=1, key=key, disabled=pages == 1)
+    start = (page - 1) * TABLE_PAGE_SIZE
+    return start, min(start + TABLE_PAGE_SIZE, total_rows)
+
+def remember_table_selection(table_key, selection_key, page_rows):
+    """表格選取改變時記住選中的 (BOSS名稱, 頻道)，換頁、排序或篩選後仍保留"""
+    selected = st.session_state[table_key].selection.rows
+    st.session_state[selection_key] = page_rows[selected[0]] if selected else None
+
+# 跨群組重生時間軸
+def show_spawn_timeline(now):
+    st.markdown("### 📅 跨群組重生時間軸")
+    
+    if not st.toggle("顯示重生時間軸", key="show_spawn_timeline", help="依目前擊殺記錄推算所有群組的重生時間（假設每次重生後即被擊殺）"):
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        horizon_hours = st.slider("推算範圍（小時）", 6, 48, 24, step=6, key="timeline_horizon")
+    with col2:
+        window_start = st.time_input("查詢開始", value=datetime(1900, 1, 1, 20, 0).time(), step=1800, key="timeline_window_start")
+    with col3:
+        window_end = st.time_input("查詢結束", value=datetime(1900, 1, 1, 2, 0).time(), step=1800, key="timeline_window_end")
+    
+    group_states = timeline_group_states(get_group_registry(), get_roster_store())
+    # 以分鐘為單位對齊起點，讓同一分鐘內的重新執行共用快取
+    start_ts = int(now.timestamp()) // 60 * 60
+    timeline = build_spawn_timeline(group_states, start_ts, horizon_hours)
+    
+    if not len(timeline):
+        st.info("📭 尚無擊殺記錄可供推算")
+        return
+    
+    window_from, window_to = timeline_window(now, window_start, window_end)
+    positions = timeline.between(window_from.timestamp(), window_to.timestamp())
+    st.markdown(f"**{window_from.strftime('%m/%d %H:%M')} ~ {window_to.strftime('%m/%d %H:%M')} 共 {len(positions)} 次重生**")
+    
+    densest_ts, densest_count = timeline.densest_window(30)
+    if densest_count > 1:
+        st.info(f"🔥 最密集的30分鐘：{format_ts(densest_ts, '%m/%d %H:%M')} 起共 {densest_count} 次重生")
+    
+    if len(positions):
+        window_df = timeline.to_dataframe(positions)
+        chart = alt.Chart(window_df).mark_bar().encode(
+            x=alt.X('重生時間:T', title='時間'),
+            x2='時段結束:T',
+            y=alt.Y('BOSS名稱:N', sort=None, title=None),
+            color=alt.Color('群組:N'),
+            tooltip=['群組', 'BOSS名稱', alt.Tooltip('重生時間:T', format='%m/%d %H:%M:%S')]
+        ).properties(height=max(200, 18 * window_df['BOSS名稱'].nunique()))
+        st.altair_chart(chart, use_container_width=True)
+        
+        window_df['重生時間'] = window_df['重生時間'].dt.strftime('%m/%d %H:%M:%S')
+        st.dataframe(window_df.drop('時段結束', axis=1), use_container_width=True, hide_index=True)
+    
+    overlaps = [cluster for cluster in timeline.overlaps()
+                if timeline.spawn[cluster[0]] < window_to.timestamp() and timeline.spawn[cluster[-1]] >= window_from.timestamp()]
+    if overlaps:
+        st.markdown(f"#### ⚠️ 重生時段重疊（{TIMELINE_SPAWN_WINDOW_MINUTES}分鐘內）")
+        for cluster in overlaps:
+            cluster_df = timeline.to_dataframe(cluster)
+            names = "、".join(f"{group} {boss}" for group, boss in zip(cluster_df['群組'], cluster_df['BOSS名稱']))
+            st.write(f"🕐 **{cluster_df['重生時間'].iloc[0].strftime('%m/%d %H:%M')}** - {names}")
 
 # 群組選擇頁面
-def show_group_selector():
+def show_group_selector(now):
     st.markdown("""
     <div class="group-selector">
         <h1>🐉 天堂2M - 多群組BOSS追蹤器</h1>
@@ -435,7 +3614,7 @@ def show_group_selector():
     """, unsafe_allow_html=True)
     
     # 當前時間顯示
-    current_time = get_taiwan_time().strftime('%Y/%m/%d %H:%M:%S')
+    current_time = now.strftime('%Y/%m/%d %H:%M:%S')
     st.markdown(f"<div style='text-align: center; margin: 2rem 0; font-size: 1.2rem;'>⏰ 現在時間: {current_time}</div>", unsafe_allow_html=True)
     
     st.markdown("### 🎯 選擇您的群組")
@@ -443,7 +3622,7 @@ def show_group_selector():
     # 使用4列佈局顯示群組
     cols = st.columns(4)
     
-    for i, (group_name, group_config) in enumerate(GROUPS.items()):
+    for i, (group_name, group_config) in enumerate(get_group_registry().groups().items()):
         col_idx = i % 4
         
         with cols[col_idx]:
@@ -453,13 +3632,51 @@ def show_group_selector():
                 use_container_width=True
             ):
                 st.session_state.selected_group = group_name
-                # 初始化對應的tracker
-                if group_name not in st.session_state.boss_trackers:
-                    st.session_state.boss_trackers[group_name] = BossTracker(group_config['file_prefix'])
+                # 在背景開始載入對應的tracker
+                get_group_registry().load_async(group_name)
                 st.rerun()
+    
+    st.markdown("---")
+    show_spawn_timeline(now)
+    show_analytics_export()
+
+# 分析匯出（所有群組）
+def read_export_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def show_analytics_export():
+    with st.expander("📤 匯出分析資料"):
+        st.caption("匯出所有群組的目前狀態與擊殺歷史（群組、BOSS名稱為字典編碼，時間為 epoch 秒），可直接以 pandas 載入")
+        formats = available_export_formats()
+        if pa is None:
+            st.info("💡 伺服器沒有安裝 pyarrow，只能匯出 CSV")
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            fmt = st.selectbox("格式", formats, key="export_format",
+                               format_func=lambda f: {'arrow': 'Arrow IPC / Feather（.arrow）', 'parquet': 'Parquet（.parquet）', 'csv': 'CSV（.csv）'}[f])
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("📤 匯出", key="export_run", use_container_width=True):
+                started = time.perf_counter()
+                try:
+                    st.session_state.export_result = (export_analytics(get_group_registry(), fmt), time.perf_counter() - started)
+                except (OSError, ValueError) as e:
+                    st.error(f"匯出失敗: {e}")
+
+        result = st.session_state.get('export_result')
+        if result:
+            files, seconds = result
+            st.success(f"✅ 匯出完成（{seconds:.1f} 秒）")
+            for table, (path, rows) in files.items():
+                if not os.path.exists(path):
+                    continue
+                # 按下時才讀取檔案，不在每次重新執行時把匯出檔載入記憶體
+                st.download_button(f"⬇️ {os.path.basename(path)}（{rows} 筆）", lambda path=path: read_export_file(path),
+                                   file_name=os.path.basename(path), key=f"export_download_{table}")
 
 # BOSS追蹤頁面
-def show_boss_tracker(group_name, group_config):
+def show_boss_tracker(group_name, group_config, now):
     # 載入群組專屬CSS
     st.markdown(get_group_css(group_name, group_config), unsafe_allow_html=True)
     
@@ -472,9 +3689,40 @@ def show_boss_tracker(group_name, group_config):
             st.session_state.selected_group = None
             st.rerun()
         
+        # 成員代號（保存在網址中，書籤即可保留關注清單）
+        member_id = st.text_input("👤 成員代號", value=st.query_params.get("member", ""), placeholder="例如: yuki", help="用於保存個人的關注清單")
+        member_id = member_id.strip()
+        if member_id and not valid_member_id(member_id):
+            st.warning("成員代號只能使用英數字、底線或連字號（最多32字）")
+            member_id = ""
+        if member_id != st.query_params.get("member", ""):
+            if member_id:
+                st.query_params["member"] = member_id
+            else:
+                del st.query_params["member"]
     
     # 獲取對應的tracker
-    tracker = st.session_state.boss_trackers[group_name]
+    tracker = get_group_tracker(group_name)
+    if tracker is None:
+        return
+    
+    # 成員關注清單（以名稱索引位置表示的位元遮罩）
+    watchlist = get_watchlist_store().get(member_id, group_config['file_prefix']) if member_id else []
+    watch_mask = tracker.name_index.mask(watchlist)
+    watch_only = False
+    if member_id:
+        with st.sidebar.expander("⭐ 我的關注清單", expanded=not watch_mask):
+            watch_selection = st.multiselect(
+                "關注的BOSS",
+                tracker.name_index.sorted_names,
+                default=[tracker.name_index.sorted_names[p] for p in mask_positions(watch_mask)],
+                key=f"watchlist_{group_config['file_prefix']}_{member_id}"
+            )
+            if st.button("💾 保存關注清單", use_container_width=True):
+                get_watchlist_store().set(member_id, group_config['file_prefix'], watch_selection)
+                st.success("✅ 關注清單已保存")
+                st.rerun()
+            st.caption("表格、即將重生提醒與桌面通知只顯示關注的BOSS")
     
     # 主標題
     st.markdown(f"""
@@ -485,16 +3733,52 @@ def show_boss_tracker(group_name, group_config):
     """, unsafe_allow_html=True)
     
     # 當前時間顯示
-    current_time = get_taiwan_time().strftime('%Y/%m/%d %H:%M:%S')
+    current_time = now.strftime('%Y/%m/%d %H:%M:%S')
     st.markdown(f"<div style='text-align: center; margin: 1rem 0; font-size: 1.1rem;'>⏰ 現在時間: {current_time}</div>", unsafe_allow_html=True)
     
+    # 數據檔案損毀提示
+    if tracker.load_error:
+        st.error(f"⚠️ 數據檔案無法載入（{tracker.load_error}），原檔案已保留為 `{tracker.quarantined_file or tracker.data_file}`，請聯絡管理員確認或從備份還原")
+    
+    # 寫入狀態：畫面先顯示更新後的數據，寫入完成前或失敗時在此提示
+    pending_seconds, save_error = tracker.save_status()
+    if save_error:
+        st.error(f"❌ 保存失敗（{save_error}），變更仍保留在伺服器上，每 {STORAGE_RETRY_SECONDS:.0f} 秒自動重試寫入")
+        if st.button("🔁 重新保存", key=f"save_retry_{group_config['file_prefix']}"):
+            tracker.save_boss_data()
+            st.rerun()
+    elif pending_seconds is not None and pending_seconds > STORAGE_IO_TIMEOUT_SECONDS:
+        st.warning(f"⏳ 保存已等待 {pending_seconds:.0f} 秒仍未完成，儲存裝置可能過慢")
+    elif pending_seconds is not None:
+        st.caption("💾 保存中...")
+    
+    # 頻道選擇（只有一個頻道的群組不顯示）
+    channels = tracker.channel_list()
+    multi_channel = len(channels) > 1
+    view_channels = (DEFAULT_CHANNEL,)
+    if multi_channel:
+        channel_view = st.selectbox(
+            "📡 頻道",
+            [None] + channels,
+            format_func=lambda channel: "全部頻道" if channel is None else channel_label(channel),
+            key=f"channel_view_{group_config['file_prefix']}"
+        )
+        view_channels = tuple(channels) if channel_view is None else (channel_view,)
+    
     # 獲取BOSS數據
-    df = tracker.get_boss_dataframe()
+    # 同一群組、同一數據版本、同一組頻道在同一分鐘內的畫面數據由所有 session 共用
+    now_ts = now.timestamp()
+    minute = int(now_ts // 60)
+    render = get_render_cache().get_or_build(
+        (group_config['file_prefix'], tracker.data_version, view_channels, minute),
+        lambda: tracker.build_render_snapshot(minute * 60, view_channels)
+    )
+    df = render['table']
     
     # 統計信息
-    total_bosses = len(df)
-    ready_bosses = len(df[df['狀態'].str.contains('✅')])
-    waiting_bosses = len(df[df['狀態'].str.contains('⏳')])
+    total_bosses = render['counts']['total']
+    ready_bosses = render['counts']['ready']
+    waiting_bosses = render['counts']['waiting']
     
     # 響應式佈局
     col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
@@ -820,7 +4104,14 @@ def show_boss_tracker(group_name, group_config):
     st.markdown(notification_js, unsafe_allow_html=True)
     
     # 即將重生提醒
-    upcoming_bosses = tracker.get_upcoming_bosses(5)  # 5分鐘內即將重生
+    # 5分鐘內即將重生（以實際時間重新計算快取清單的剩餘時間）
+    # 有關注清單時只提醒關注的BOSS
+    upcoming_bosses = [
+        upcoming_entry(boss['name'], boss['respawn_ts'], now_ts)
+        for boss in render['upcoming']
+        if 0 <= boss['respawn_ts'] - now_ts <= RENDER_UPCOMING_MINUTES * 60
+        and (not watch_mask or watch_mask >> boss['position'] & 1)
+    ]
     
     if upcoming_bosses:
         st.markdown("### 🚨 即將重生提醒 (5分鐘內)")
@@ -885,63 +4176,116 @@ def show_boss_tracker(group_name, group_config):
     # BOSS表格顯示
     st.markdown("### 📊 BOSS狀態一覽")
     
+    # 名稱、狀態與關注篩選（名稱索引、狀態與關注清單都以位元遮罩表示，不需重新掃描表格）
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col3:
+        live_countdown = st.toggle("⏱️ 即時倒數", key=f"live_countdown_{group_config['file_prefix']}", help="在瀏覽器每秒更新倒數，不需重新整理（此模式無法點選表格）")
+        if watch_mask:
+            watch_only = st.toggle("⭐ 只看關注", value=True, key=f"watch_only_{group_config['file_prefix']}")
+    with col1:
+        name_filter = st.text_input("🔍 搜尋BOSS", placeholder="輸入名稱、別名或縮寫", key=f"name_filter_{group_config['file_prefix']}")
+    with col2:
+        status_filter = st.multiselect(
+            "狀態篩選",
+            ["ready", "waiting", "normal"],
+            format_func={"ready": "✅ 已重生", "waiting": "⏳ 等待中", "normal": "⚪ 未記錄"}.get,
+            key=f"status_filter_{group_config['file_prefix']}"
+        )
+    
+    all_rows = (1 << len(df)) - 1
+    rows = all_rows
+    # 名稱與關注清單的遮罩以BOSS位置表示，套用到每個頻道區塊
+    block_size = len(tracker.name_index.sorted_names)
+    if name_filter.strip():
+        rows &= spread_mask(positions_mask(tracker.name_index.search(name_filter)), len(view_channels), block_size)
+    if watch_only:
+        rows &= spread_mask(watch_mask, len(view_channels), block_size)
+    if status_filter and not live_countdown:
+        status_mask = 0
+        for status_type in status_filter:
+            status_mask |= render['status_bits'].get(status_type, 0)
+        rows &= status_mask
+    
+    # 依快取的排序索引排序、套用篩選後只取目前頁面（即時倒數依下次重生排序，狀態由瀏覽器篩選）
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        sort_key = st.selectbox("↕️ 排序", list(TABLE_SORT_OPTIONS), format_func=TABLE_SORT_OPTIONS.get,
+                                key=f"table_sort_{group_config['file_prefix']}", disabled=live_countdown)
+    order = render['sort_orders']['next_respawn' if live_countdown else sort_key]
+    if rows != all_rows:
+        order = order[mask_array(rows, len(df))[order]]
+    with col2:
+        start, stop = show_table_pager(
+            len(order), f"table_page_{group_config['file_prefix']}",
+            reset_on=(view_channels, sort_key, name_filter, tuple(status_filter), watch_only, live_countdown)
+        )
+    page_positions = order[start:stop]
+    
+    if live_countdown:
+        # 狀態由瀏覽器每秒計算，伺服器只在數據、篩選條件或頁面改變時送出新內容
+        countdown_rows = [render['countdown'][i] for i in page_positions]
+        components.html(get_countdown_table_html(countdown_rows, status_filter), height=min(600, 40 + 33 * len(countdown_rows)), scrolling=True)
+    
     # 使用原生顏色樣式，不額外設定避免衝突
-    display_df = df.drop('_status_type', axis=1)
+    df = df.iloc[page_positions]
+    display_df = df.drop(['_status_type', '_channel'], axis=1)
     
     # 可點擊的表格，支援選取行來更新擊殺時間
-    selected_rows = st.dataframe(
-        display_df,
-        use_container_width=True,
-        height=400,
-        selection_mode="single-row",
-        on_select="rerun",
-        column_config={
-            "編號": st.column_config.TextColumn("編號", width="small"),
-            "BOSS名稱": st.column_config.TextColumn("BOSS名稱", width="medium"), 
-            "重生時間": st.column_config.TextColumn("重生時間", width="small"),
-            "上次擊殺": st.column_config.TextColumn("上次擊殺", width="medium"),
-            "下次重生": st.column_config.TextColumn("下次重生", width="medium"),
-            "狀態": st.column_config.TextColumn("狀態", width="medium")
-        }
-    )
+    # 選取以 (BOSS名稱, 頻道) 記住，換頁、排序或篩選後仍保留；表格鍵隨頁面內容改變，避免舊的行位置對到別的BOSS
+    selection_key = f"table_selection_{group_config['file_prefix']}"
+    if not live_countdown:
+        page_rows = list(zip(df['BOSS名稱'], (int(channel) for channel in df['_channel'])))
+        table_key = f"boss_table_{group_config['file_prefix']}_{zlib.crc32(repr(page_rows).encode())}"
+        st.dataframe(
+            display_df,
+            use_container_width=True,
+            height=400,
+            selection_mode="single-row",
+            on_select=lambda: remember_table_selection(table_key, selection_key, page_rows),
+            key=table_key,
+            column_config={
+                "編號": st.column_config.TextColumn("編號", width="small"),
+                "頻道": st.column_config.TextColumn("頻道", width="small"),
+                "BOSS名稱": st.column_config.TextColumn("BOSS名稱", width="medium"), 
+                "重生時間": st.column_config.TextColumn("重生時間", width="small"),
+                "上次擊殺": st.column_config.TextColumn("上次擊殺", width="medium"),
+                "下次重生": st.column_config.TextColumn("下次重生", width="medium"),
+                "狀態": st.column_config.TextColumn("狀態", width="medium")
+            }
+        )
     
-    # 處理表格點擊選取
-    if selected_rows.selection.rows:
-        selected_row_idx = selected_rows.selection.rows[0]
-        selected_boss_name = display_df.iloc[selected_row_idx]['BOSS名稱']
+    # 處理表格點擊選取：選中的行不在目前頁面（換頁、被篩選掉、即時倒數模式或已從名冊移除）時不使用，避免更新到看不到的BOSS
+    table_selection = st.session_state.get(selection_key)
+    if table_selection and (live_countdown or tuple(table_selection) not in page_rows):
+        table_selection = None
+    if table_selection:
+        selected_boss_name, selected_channel = table_selection
+        selected_label = tracker.display_name(selected_boss_name, selected_channel)
         
         # 顯示快速更新按鈕
-        st.markdown(f"### 🎯 快速更新：{selected_boss_name}")
+        st.markdown(f"### 🎯 快速更新：{selected_label}")
         
         col1, col2, col3 = st.columns([2, 1, 1])
         
         with col1:
-            st.markdown(f"**選中BOSS**: {selected_boss_name}")
+            st.markdown(f"**選中BOSS**: {selected_label}")
             current_record = "無記錄"
-            if tracker.bosses[selected_boss_name]['last_killed']:
-                try:
-                    dt = datetime.fromisoformat(tracker.bosses[selected_boss_name]['last_killed'])
-                    # 如果沒有時區資訊，假設是台灣時間
-                    if dt.tzinfo is None:
-                        dt = TW_TZ.localize(dt)
-                    current_record = dt.strftime('%Y/%m/%d %H:%M:%S')
-                except:
-                    current_record = "格式錯誤"
+            selected_kill = tracker.channel_bosses(selected_channel)[selected_boss_name]['last_killed']
+            if selected_kill:
+                current_record = format_kill_time(selected_kill)
             st.markdown(f"**當前記錄**: {current_record}")
         
         with col2:
             if st.button("⚡ 更新為現在時間", use_container_width=True, type="primary", key="quick_update"):
-                tracker.bosses[selected_boss_name]['last_killed'] = get_taiwan_time().isoformat()
-                if tracker.save_boss_data():
-                    st.success(f"✅ 已更新 {selected_boss_name} 擊殺時間")
-                    st.rerun()
+                show_kill_report(tracker, selected_boss_name, now, selected_channel)
         
         with col3:
             if st.button("🗑️ 清除記錄", use_container_width=True, key="quick_clear"):
-                tracker.bosses[selected_boss_name]['last_killed'] = None
-                if tracker.save_boss_data():
+                if tracker.update_kill_times({selected_boss_name: None}, now, selected_channel):
                     st.success(f"✅ 已清除 {selected_boss_name} 記錄")
                     st.rerun()
+            st.button("✖️ 取消選取", use_container_width=True, key="quick_deselect",
+                      on_click=lambda: st.session_state.update({selection_key: None}))
         
         st.markdown("---")
     
@@ -958,47 +4302,86 @@ def show_boss_tracker(group_name, group_config):
     # 手動更新區域
     st.markdown("### 📝 更新BOSS擊殺時間")
     
+    # 記錄的頻道（預設為正在查看的頻道）
+    record_channel = view_channels[0]
+    if multi_channel:
+        record_channel = st.selectbox(
+            "📡 記錄頻道",
+            channels,
+            index=channels.index(view_channels[0]) if len(view_channels) == 1 else 0,
+            format_func=channel_label,
+            key=f"record_channel_{group_config['file_prefix']}"
+        )
+    record_bosses = tracker.channel_bosses(record_channel)
+    
     # 響應式佈局
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        # BOSS選擇
-        boss_names = list(tracker.bosses.keys())
+        # 快速輸入：BOSS名稱（或別名、縮寫）加時間，例如「巨蟻 1630」
+        quick_key = f"quick_entry_{group_config['file_prefix']}"
+        if st.session_state.pop(f"clear_{quick_key}", False):
+            st.session_state.pop(quick_key, None)
+        quick_entry = st.text_input(
+            "⚡ 快速輸入",
+            placeholder="例如: 巨蟻 1630 或 巨蟻（只選擇BOSS）",
+            key=quick_key
+        )
+        if quick_entry.strip():
+            name_part, _, time_part = quick_entry.strip().partition(" ")
+            quick_boss = tracker.name_index.resolve(name_part)
+            if quick_boss is None:
+                candidates = tracker.name_index.candidates(name_part)
+                if candidates:
+                    st.caption("符合的BOSS：" + "、".join(candidates[:10]))
+                else:
+                    st.caption(f"⚠️ 找不到符合「{name_part}」的BOSS")
+            elif not time_part.strip():
+                st.session_state["boss_selector"] = quick_boss
+            else:
+                quick_time = tracker.parse_time_string(time_part, now)
+                if quick_time is None:
+                    st.caption(f"⚠️ 無法解析時間「{time_part}」")
+                elif st.button(f"✅ 記錄 {quick_boss} 擊殺於 {quick_time.strftime('%m/%d %H:%M:%S')}", key="quick_entry_apply"):
+                    if tracker.update_kill_times({quick_boss: quick_time.isoformat()}, now, record_channel):
+                        st.session_state[f"clear_{quick_key}"] = True
+                        st.success(f"✅ 已記錄 {quick_boss} 擊殺於 {quick_time.strftime('%H:%M:%S')}")
+                        st.rerun()
         
-        # 根據重生時間排序BOSS名稱顯示
-        sorted_boss_items = sorted(tracker.bosses.items(), key=lambda x: x[1]['respawn_minutes'])
-        sorted_boss_names = [name for name, _ in sorted_boss_items]
+        # 離線記錄：擊殺時間先存在裝置上，連線時批次同步，不需等待頁面重新執行
+        with st.expander("📶 離線記錄模式（行動網路不穩時使用）"):
+            if api_sync_available():
+                components.html(get_offline_sync_html(group_config['file_prefix'], tracker.name_index.sorted_names, channels), height=170)
+                st.caption("記錄會先保存在這台裝置上，恢復連線後自動同步；同步的記錄在下次畫面更新時顯示")
+            else:
+                st.info("ℹ️ 需設定 `API_PUBLIC_URL`（成員瀏覽器連得到的同步服務網址）與 `BOSS_API_SECRET` 才能使用離線記錄")
         
+        # BOSS選擇（根據重生時間排序，順序由名稱索引預先計算）
         selected_boss = st.selectbox(
             "🎯 選擇要更新的BOSS",
-            sorted_boss_names,
+            tracker.name_index.sorted_names,
             index=0,
             key="boss_selector"
         )
         
         # 顯示選中BOSS信息
         if selected_boss:
-            boss_data = tracker.bosses[selected_boss]
+            boss_data = record_bosses[selected_boss]
             current_record = "無記錄"
             if boss_data['last_killed']:
-                try:
-                    dt = datetime.fromisoformat(boss_data['last_killed'])
-                    # 如果沒有時區資訊，假設是台灣時間
-                    if dt.tzinfo is None:
-                        dt = TW_TZ.localize(dt)
-                    current_record = dt.strftime('%Y/%m/%d %H:%M:%S')
-                except:
-                    current_record = "格式錯誤"
+                current_record = format_kill_time(boss_data['last_killed'])
             
             respawn_minutes = boss_data['respawn_minutes']
             hours = respawn_minutes // 60
             minutes = respawn_minutes % 60
             respawn_str = f"{hours}h{minutes}m" if minutes > 0 else f"{hours}h" if hours > 0 else f"{minutes}m"
+            reporters = tracker.confirmations.get((record_channel, selected_boss), 0)
+            confirmed_str = f"（{reporters} 人回報）" if reporters > 1 else ""
             
             st.markdown(f"""
             <div class="boss-info-card-{group_config['file_prefix']}">
-                <strong>🎯 {selected_boss}</strong><br>
-                <small>重生時間: {respawn_str} | 當前記錄: {current_record}</small>
+                <strong>🎯 {tracker.display_name(selected_boss, record_channel)}</strong><br>
+                <small>重生時間: {respawn_str} | 當前記錄: {current_record}{confirmed_str}</small>
             </div>
             """, unsafe_allow_html=True)
     
@@ -1008,15 +4391,11 @@ def show_boss_tracker(group_name, group_config):
         
         if st.button("🕐 記錄現在時間", use_container_width=True, type="primary"):
             if selected_boss:
-                tracker.bosses[selected_boss]['last_killed'] = get_taiwan_time().isoformat()
-                if tracker.save_boss_data():
-                    st.success(f"✅ 已記錄 {selected_boss} 擊殺於 {get_taiwan_time().strftime('%H:%M:%S')}")
-                    st.rerun()
+                show_kill_report(tracker, selected_boss, now, record_channel)
         
         if st.button("🗑️ 清除此BOSS記錄", use_container_width=True):
             if selected_boss:
-                tracker.bosses[selected_boss]['last_killed'] = None
-                if tracker.save_boss_data():
+                if tracker.update_kill_times({selected_boss: None}, now, record_channel):
                     st.success(f"✅ 已清除 {selected_boss} 的記錄")
                     st.rerun()
     
@@ -1027,9 +4406,11 @@ def show_boss_tracker(group_name, group_config):
     st.markdown("""
     <div style="background-color: #f0f8ff; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
         <strong>📋 支援的時間格式：</strong><br>
-        • <code>0811/163045</code> - 月日/時分秒 (8月11日 16:30:45)<br>
-        • <code>163045</code> - 時分秒 (今天 16:30:45)<br>
-        <small style="color: #666;">注意：所有數字必須是兩位數，例如 08 而非 8</small>
+        • <code>163045</code> / <code>1630</code> / <code>16:30:45</code> - 時分(秒)<br>
+        • <code>0811/163045</code> / <code>08/11 16:30</code> - 月日 時分(秒)<br>
+        • <code>2025/08/11 16:30:45</code> - 完整日期<br>
+        • <code>-5m</code> / <code>5分鐘前</code> / <code>剛剛</code> - 相對時間<br>
+        <small style="color: #666;">注意：沒有日期時取最近一次已過去的時間（例如凌晨輸入 2330 視為昨天）</small>
     </div>
     """, unsafe_allow_html=True)
     
@@ -1047,8 +4428,8 @@ def show_boss_tracker(group_name, group_config):
     
     time_input = st.text_input(
         "擊殺時間",
-        placeholder="例如: 163045 或 0811/163045",
-        help="輸入格式：時分秒(HHMMSS) 或 月日/時分秒(MMDD/HHMMSS)",
+        placeholder="例如: 163045、16:30、0811/163045 或 5分鐘前",
+        help="輸入格式：時分秒(HHMMSS)、時分(HHMM)、HH:MM[:SS]、月日/時分秒(MMDD/HHMMSS)、完整日期或相對時間",
         key=input_key
     )
     
@@ -1056,9 +4437,9 @@ def show_boss_tracker(group_name, group_config):
     if st.button("🎯 更新擊殺時間", use_container_width=True, type="secondary"):
         # 優先使用表格選擇的BOSS，如果沒有則使用下拉選單選擇的BOSS
         target_boss = None
-        if selected_rows.selection.rows:
-            selected_row_idx = selected_rows.selection.rows[0]
-            target_boss = display_df.iloc[selected_row_idx]['BOSS名稱']
+        target_channel = record_channel
+        if table_selection:
+            target_boss, target_channel = table_selection
         elif selected_boss:
             target_boss = selected_boss
         
@@ -1066,28 +4447,27 @@ def show_boss_tracker(group_name, group_config):
             st.error("⚠️ 請先點擊表格中的任一行選擇BOSS，或使用下拉選單選擇")
         elif not time_input.strip():
             # 清除記錄
-            tracker.bosses[target_boss]['last_killed'] = None
-            if tracker.save_boss_data():
+            if tracker.update_kill_times({target_boss: None}, now, target_channel):
                 st.success(f"✅ 已清除 {target_boss} 的擊殺記錄")
                 st.rerun()
         else:
             # 解析時間
-            parsed_time = tracker.parse_time_string(time_input)
+            parsed_time = tracker.parse_time_string(time_input, now)
             if parsed_time is None:
                 st.error(f"""
                 ⚠️ **時間格式不正確！**
                 
                 請使用以下格式之一：
-                - `0811/163045` (月日/時分秒)
-                - `163045` (時分秒，使用今天)
-                
-                **注意**：所有數字必須是兩位數
+                - `163045` / `1630` / `16:30:45` (時分秒，取最近一次已過去的時間)
+                - `0811/163045` / `08/11 16:30` (月日 時分秒)
+                - `2025/08/11 16:30:45` (完整日期)
+                - `-5m` / `5分鐘前` / `剛剛` (相對時間)
                 
                 **您輸入的**: `{time_input}`
                 """)
             else:
                 # 檢查時間是否合理（不能是太久以前或未來）
-                current_time = get_taiwan_time()
+                current_time = now
                 time_diff = current_time - parsed_time
                 
                 # 檢查時間合理性，但不阻止更新
@@ -1098,9 +4478,8 @@ def show_boss_tracker(group_name, group_config):
                 
                 # 執行更新
                 try:
-                    tracker.bosses[target_boss]['last_killed'] = parsed_time.isoformat()
-                    if tracker.save_boss_data():
-                        respawn_time = parsed_time + timedelta(minutes=tracker.bosses[target_boss]['respawn_minutes'])
+                    if tracker.update_kill_times({target_boss: parsed_time.isoformat()}, now, target_channel):
+                        respawn_time = parsed_time + timedelta(minutes=tracker.channel_bosses(target_channel)[target_boss]['respawn_minutes'])
                         time_until_respawn = respawn_time - current_time
                         
                         if time_until_respawn.total_seconds() > 0:
@@ -1133,6 +4512,50 @@ def show_boss_tracker(group_name, group_config):
                 except Exception as e:
                     st.error(f"❌ 更新失敗: {e}")
     
+    # 歷史回溯
+    st.markdown("### 📜 歷史回溯")
+    if multi_channel:
+        st.caption(f"顯示 {channel_label(record_channel)} 的歷史（依上方「記錄頻道」）")
+    
+    with st.expander("🔎 查詢指定時間點的BOSS狀態"):
+        col1, col2 = st.columns(2)
+        with col1:
+            query_date = st.date_input("日期", value=now.date(), key=f"history_date_{group_config['file_prefix']}")
+        with col2:
+            query_clock = st.time_input("時間", value=now.time().replace(second=0, microsecond=0), step=60, key=f"history_time_{group_config['file_prefix']}")
+        query_time = datetime.combine(query_date, query_clock, tzinfo=TW_TZ)
+        
+        history_state = tracker.history_for(record_channel).state_at(query_time)
+        if history_state is None:
+            st.info("📭 該時間點之前沒有歷史記錄")
+        else:
+            history_df = tracker.get_boss_dataframe(bosses=history_state, now_ts=query_time.timestamp())
+            st.markdown(f"**{query_time.strftime('%Y/%m/%d %H:%M')} 當時的BOSS狀態**")
+            start, stop = show_table_pager(len(history_df), f"history_page_{group_config['file_prefix']}", reset_on=(record_channel, query_time))
+            st.dataframe(history_df.iloc[start:stop].drop(['_status_type', '_channel'], axis=1), use_container_width=True, height=400, hide_index=True)
+        
+        st.markdown("#### 🔀 比較兩個時間點")
+        col1, col2 = st.columns(2)
+        with col1:
+            compare_date = st.date_input("比較日期", value=now.date(), key=f"history_compare_date_{group_config['file_prefix']}")
+        with col2:
+            compare_clock = st.time_input("比較時間", value=now.time().replace(second=0, microsecond=0), step=60, key=f"history_compare_time_{group_config['file_prefix']}")
+        compare_time = datetime.combine(compare_date, compare_clock, tzinfo=TW_TZ)
+        
+        start, end = sorted([query_time, compare_time])
+        changes = tracker.history_for(record_channel).diff(start, end)
+        if changes:
+            st.dataframe(pd.DataFrame([
+                {
+                    'BOSS名稱': boss_name,
+                    start.strftime('%m/%d %H:%M') + ' 擊殺': format_kill_time(old) if old else "無記錄",
+                    end.strftime('%m/%d %H:%M') + ' 擊殺': format_kill_time(new) if new else "無記錄"
+                }
+                for boss_name, old, new in changes
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info("兩個時間點之間沒有變更")
+    
     # 分隔線
     st.markdown("---")
     
@@ -1143,35 +4566,195 @@ def show_boss_tracker(group_name, group_config):
     
     with col1:
         if st.button("🔄 重新載入數據", use_container_width=True):
-            st.session_state.boss_trackers[group_name] = BossTracker(group_config['file_prefix'])
-            st.success("✅ 數據已重新載入")
-            st.rerun()
+            # 排在尚未完成的寫入之後原地重新讀取，其他 session 與 API 繼續使用同一個tracker
+            try:
+                reloaded = get_group_registry().reload(group_name).result(timeout=STORAGE_IO_TIMEOUT_SECONDS)
+            except FutureTimeout:
+                reloaded = False
+            if reloaded:
+                st.rerun()
+            st.warning("⏳ 還有變更尚未保存完成，請稍後再重新載入")
     
     with col2:
         if st.button("🗑️ 清除所有記錄", use_container_width=True, type="secondary"):
             # 二次確認
             if st.session_state.get(f'confirm_clear_all_{group_config["file_prefix"]}', False):
-                for boss_name in tracker.bosses:
-                    tracker.bosses[boss_name]['last_killed'] = None
-                if tracker.save_boss_data():
+                if tracker.clear_kill_times(view_channels, now):
                     st.success("✅ 已清除所有BOSS記錄")
                     st.session_state[f'confirm_clear_all_{group_config["file_prefix"]}'] = False
                     st.rerun()
             else:
                 st.session_state[f'confirm_clear_all_{group_config["file_prefix"]}'] = True
-                st.warning("⚠️ 請再次點擊確認清除所有記錄")
+                scope = "、".join(channel_label(channel) for channel in view_channels) if multi_channel else "所有"
+                st.warning(f"⚠️ 請再次點擊確認清除{scope}記錄")
     
     with col3:
         # 下載數據備份
-        backup_data = json.dumps(tracker.bosses, ensure_ascii=False, indent=2)
+        backup_data = json.dumps(tracker.channels if multi_channel else tracker.bosses, ensure_ascii=False, indent=2)
         st.download_button(
             "💾 下載備份",
             backup_data,
-            file_name=f"{group_config['file_prefix']}_backup_{get_taiwan_time().strftime('%Y%m%d_%H%M%S')}.json",
+            file_name=f"{group_config['file_prefix']}_backup_{now.strftime('%Y%m%d_%H%M%S')}.json",
             mime="application/json",
             use_container_width=True
         )
     
+    # 自動備份：還原時以完整備份加之後的增量推算，所有頻道一次寫入
+    with st.expander("🗄️ 自動備份與還原"):
+        backups = get_backup_manager()
+        if backups.interval > 0:
+            st.caption(f"每 {backups.interval // 60} 分鐘備份有變更的群組，每 {backups.full_every} 次增量備份寫一次完整備份，保留最近 {backups.keep_full} 組")
+        else:
+            st.caption("自動備份已停用（BACKUP_INTERVAL_SECONDS=0），可手動備份")
+        points = backups.points(group_config['file_prefix'])
+        if points:
+            point_labels = {
+                name: f"{datetime.fromtimestamp(ts, TW_TZ).strftime('%m/%d %H:%M:%S')} {'📦 完整' if kind == 'full' else '➕ 增量'}"
+                for ts, kind, name in points
+            }
+            point_name = st.selectbox(
+                "備份點", [name for _, _, name in reversed(points)],
+                format_func=point_labels.get, key=f"backup_point_{group_config['file_prefix']}"
+            )
+        else:
+            point_name = None
+            st.info("📭 尚無自動備份")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("📥 立即備份", use_container_width=True, key=f"backup_now_{group_config['file_prefix']}"):
+                try:
+                    name = backups.backup_group(group_config['file_prefix'])
+                    st.success(f"✅ 已備份 {name}" if name else "ℹ️ 自上次備份後沒有變更")
+                except (OSError, ValueError, BossDataError) as e:
+                    st.error(f"❌ 備份失敗: {e}")
+        with col2:
+            if point_name and st.button("♻️ 還原到此備份點", use_container_width=True, key=f"backup_restore_{group_config['file_prefix']}",
+                                        help="還原前會先備份目前的數據，還原也會記錄在擊殺歷史中"):
+                try:
+                    # 先備份目前的數據（等待尚未完成的寫入），還原後仍可回到還原前的狀態
+                    if not tracker.wait_saved():
+                        raise OSError("目前的數據尚未寫入完成，請稍後再試")
+                    backups.backup_group(group_config['file_prefix'])
+                    state = backups.state_at(group_config['file_prefix'], point_name)
+                    changes = backup_changes(tracker.kill_records(), state)
+                    if tracker.restore_kill_times(state, now):
+                        st.success(f"✅ 已還原到 {point_labels[point_name]}（{sum(len(diff) for diff in changes.values())} 筆變更）")
+                        st.rerun()
+                except (OSError, ValueError, BossDataError) as e:
+                    st.error(f"❌ 還原失敗: {e}")
+
+    # 匯入聊天記錄：逐行讀取上傳的檔案，不一次載入全部內容
+    with st.expander("📥 匯入聊天記錄（Discord / LINE）"):
+        st.caption("辨識「BOSS名稱 + 死/擊殺 或 時間」的訊息（例如「潘納洛德 死 0230」），時間以訊息的時間為準；"
+                   f"同一BOSS {KILL_DEDUP_SECONDS} 秒內的回報只算一次" + (f"，匯入到 {channel_label(record_channel)}" if multi_channel else ""))
+        report_key = f"import_report_{group_config['file_prefix']}"
+        chat_file = st.file_uploader("聊天記錄文字檔", type=["txt", "log", "csv"], key=f"import_file_{group_config['file_prefix']}")
+        if chat_file is not None and st.button("📥 開始匯入", key=f"import_start_{group_config['file_prefix']}"):
+            chat_file.seek(0)
+            lines = io.TextIOWrapper(chat_file, encoding='utf-8-sig', errors='replace')
+            st.session_state[report_key] = ChatLogImporter(tracker, record_channel).run(lines, now)
+            lines.detach()  # 上傳的檔案由 Streamlit 管理，不隨包裝關閉
+            st.rerun()
+        report = st.session_state.get(report_key)
+        if report:
+            st.success(f"✅ 讀取 {report['lines']} 行（{report['seconds']} 秒，每秒 {report['lines_per_second']} 行），"
+                       f"辨識 {report['kills']} 筆擊殺，更新 {report['updated']} 個BOSS，補記歷史 {report['backfilled']} 筆")
+            st.caption(f"重複回報 {report['duplicates']} 筆、未來時間 {report['future']} 筆、無法辨識 {report['unmatched']} 行，分 {report['batches']} 批寫入")
+            for error in report['errors']:
+                st.error(f"❌ {error}")
+            if report['unmatched_samples']:
+                st.dataframe(pd.DataFrame(report['unmatched_samples'], columns=['行號', '內容']), use_container_width=True, hide_index=True)
+    
+    # 行事曆訂閱
+    with st.expander("📆 訂閱重生行事曆"):
+        if API_PUBLIC_URL:
+            feed_url = f"{API_PUBLIC_URL}/calendar/{group_config['file_prefix']}.ics"
+            st.caption(f"在 Google 日曆 / Apple 日曆以網址訂閱，預設推算 {CALENDAR_DEFAULT_HOURS} 小時（可加 ?hours=N，最多 {CALENDAR_MAX_HOURS}）")
+            st.code(feed_url, language=None)
+            if feed_url.startswith("http"):
+                st.markdown(f"[📲 以 webcal 開啟](webcal{feed_url[feed_url.index(':'):]})")
+        else:
+            st.info("ℹ️ 需設定 `API_PUBLIC_URL`（日曆服務連得到、轉發到行事曆服務埠的網址）才能訂閱")
+
+    # BOSS別名設定
+    with st.expander("🏷️ BOSS別名設定"):
+        st.caption("設定群組常用的簡稱，可用於快速輸入與搜尋")
+        aliases = tracker.load_aliases()
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            new_alias = st.text_input("別名", placeholder="例如: 螞蟻", key=f"new_alias_{group_config['file_prefix']}")
+        with col2:
+            alias_target = st.selectbox("對應BOSS", tracker.name_index.sorted_names, key=f"alias_target_{group_config['file_prefix']}")
+        with col3:
+            st.write("")
+            if st.button("➕ 新增別名", use_container_width=True) and new_alias.strip():
+                aliases[new_alias.strip()] = alias_target
+                if tracker.save_aliases(aliases):
+                    st.success(f"✅ 已新增別名 {new_alias.strip()} → {alias_target}")
+                    st.rerun()
+        
+        for alias, boss_name in sorted(aliases.items()):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**{alias}** → {boss_name}")
+            with col2:
+                if st.button("🗑️", key=f"delete_alias_{group_config['file_prefix']}_{alias}"):
+                    del aliases[alias]
+                    if tracker.save_aliases(aliases):
+                        st.rerun()
+    
+    # BOSS名冊設定
+    with st.expander("🧬 BOSS名冊設定"):
+        roster_store = get_roster_store()
+        base_roster = roster_store.base()['bosses']
+        overlay = roster_store.overlay(group_config['file_prefix'])
+        st.caption(f"名冊版本 v{tracker.roster_version}｜基礎名冊所有群組共用，群組設定只影響 {group_name}")
+        
+        overrides = [
+            {'BOSS名稱': name, '基礎重生(分)': base_roster.get(name, "-"), '本群組設定': f"{minutes} 分"}
+            for name, minutes in overlay.get('respawn', {}).items()
+        ] + [
+            {'BOSS名稱': name, '基礎重生(分)': "-", '本群組設定': f"新增 {minutes} 分"}
+            for name, minutes in overlay.get('add', {}).items()
+        ] + [
+            {'BOSS名稱': name, '基礎重生(分)': base_roster.get(name, "-"), '本群組設定': "已移除"}
+            for name in overlay.get('remove', [])
+        ]
+        if overrides:
+            st.dataframe(pd.DataFrame(overrides), use_container_width=True, hide_index=True)
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            roster_boss = st.text_input("BOSS名稱", placeholder="現有或新增的BOSS名稱", key=f"roster_boss_{group_config['file_prefix']}")
+        with col2:
+            roster_minutes = st.number_input("重生時間(分)", min_value=1, max_value=10080, value=tracker.bosses.get(roster_boss.strip(), {}).get('respawn_minutes', 60), key=f"roster_minutes_{group_config['file_prefix']}")
+        with col3:
+            roster_scope = st.radio("套用範圍", ["本群組", "所有群組"], key=f"roster_scope_{group_config['file_prefix']}")
+        
+        roster_boss = roster_boss.strip()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("💾 設定重生時間", use_container_width=True) and roster_boss:
+                if roster_scope == "所有群組":
+                    roster_store.set_base_respawn(roster_boss, int(roster_minutes))
+                elif roster_boss in base_roster:
+                    roster_store.update_overlay(group_config['file_prefix'], respawn={roster_boss: int(roster_minutes)})
+                else:
+                    roster_store.update_overlay(group_config['file_prefix'], add={roster_boss: int(roster_minutes)})
+                tracker.sync_roster()
+                st.success(f"✅ 已設定 {roster_boss} 重生時間為 {int(roster_minutes)} 分鐘（{roster_scope}）")
+                st.rerun()
+        with col2:
+            if st.button("➖ 本群組移除", use_container_width=True) and roster_boss in tracker.bosses:
+                roster_store.update_overlay(group_config['file_prefix'], remove=[roster_boss])
+                tracker.sync_roster()
+                st.rerun()
+        with col3:
+            if st.button("↩️ 還原為基礎名冊", use_container_width=True) and roster_boss:
+                roster_store.update_overlay(group_config['file_prefix'], reset=[roster_boss])
+                tracker.sync_roster()
+                st.rerun()
+    
     # 底部信息
     st.markdown("---")
     st.markdown(f"""
@@ -1182,10 +4765,41 @@ def show_boss_tracker(group_name, group_config):
     </div>
     """, unsafe_allow_html=True)
 
+# 以 `python app.py --server.port=...` 啟動時，先啟動健康檢查服務並平行預先載入所有群組，
+# 完成後才啟動 Streamlit 開始接受連線（快取由同一程序中的 Streamlit 沿用）
+if __name__ == "__main__" and not st.runtime.exists():
+    from streamlit.web import cli as streamlit_cli
+    start_api_server()
+    get_backup_manager()
+    get_warm_start().run(wait=True)
+    sys.argv = ["streamlit", "run", os.path.abspath(__file__)] + sys.argv[1:]
+    sys.exit(streamlit_cli.main())
+
 # 主程式邏輯
+start_api_server()
+# 以 streamlit run 啟動時，第一次執行才在背景預先載入其他群組
+get_warm_start().run()
+# 自動備份在背景定時執行
+get_backup_manager()
+# 每次執行只讀取一次時鐘，整個畫面使用同一個「現在」
+render_now = get_taiwan_time()
 if st.session_state.selected_group is None:
-    show_group_selector()
+    show_group_selector(render_now)
+elif st.session_state.selected_group not in get_group_registry().groups():
+    # 群組已從設定檔移除
+    st.session_state.selected_group = None
+    show_group_selector(render_now)
 else:
     group_name = st.session_state.selected_group
-    group_config = GROUPS[group_name]
-    show_boss_tracker(group_name, group_config)
\ No newline at end of file
+    group_config = get_group_registry().groups()[group_name]
+    # 畫面執行期間持有的tracker不會被其他群組的載入釋放
+    with get_group_registry().in_use(group_name):
+        show_boss_tracker(group_name, group_config, render_now)
+
+# 管理者以 ?admin=金鑰 檢視記憶體統計
+admin_open = bool(ADMIN_KEY) and st.query_params.get("admin") == ADMIN_KEY
+if admin_open:
+    show_memory_admin()
+# 記錄本 session 的記憶體用量（定時取樣，開啟管理頁面時每次都估算）
+get_memory_monitor().record_session(st.session_state.setdefault('session_tag', os.urandom(4).hex()), st.session_state, force=admin_open)
+get_warm_start().mark_first_render()
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""數據檔案載入速度：JSON（含驗證）與二進位快照，python benchmarks/bench_boss_data.py [頻道數] [次數]"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.conftest import copy_data, load_app
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+def main(channels, repeat):
+    os.chdir(tempfile.mkdtemp())
+    copy_data(".")
+    app = load_app()
+    _, roster = app.RosterStore().effective("bench")
+    now_ts = int(app.get_taiwan_timestamp())
+    channel_kills = {
+        channel: {name: app.datetime.fromtimestamp(now_ts - i * 97 - channel, app.TW_TZ).isoformat() for i, name in enumerate(roster)}
+        for channel in range(1, channels + 1)
+    }
+    data = {'last_killed': channel_kills[1], 'channels': {str(channel): kills for channel, kills in channel_kills.items() if channel != 1}}
+    with open("bench_boss_data.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    app.write_boss_snapshot("bench_boss_data.bin", channel_kills)
+    
+    def load_json():
+        with open("bench_boss_data.json", encoding="utf-8") as f:
+            return app.validate_boss_data(json.load(f))[0]
+    json_seconds, from_json = timed(load_json, repeat)
+    snapshot_seconds, from_snapshot = timed(lambda: app.read_boss_snapshot("bench_boss_data.bin"), repeat)
+    tracker_seconds, _ = timed(lambda: app.BossTracker("bench", storage=app.StorageIO()), max(1, repeat // 10))
+    assert from_json == from_snapshot, "快照內容與JSON不一致"
+    
+    records = channels * len(roster)
+    print(f"{channels} 頻道 × {len(roster)} BOSS = {records} 筆")
+    print(f"JSON + 驗證:  {json_seconds * 1000:8.2f} ms  ({os.path.getsize('bench_boss_data.json'):,} bytes)")
+    print(f"二進位快照:   {snapshot_seconds * 1000:8.2f} ms  ({os.path.getsize('bench_boss_data.bin'):,} bytes)")
+    print(f"BossTracker:  {tracker_seconds * 1000:8.2f} ms  (JSON，含名冊合併)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
@@ -0,0 +1,37 @@
+"""時間解析吞吐量：python benchmarks/bench_time_parser.py [筆數]"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.conftest import copy_data, load_app
+
+SAMPLES = ["剛剛", "-5m", "-1h30m", "5分鐘前", "1小時20分前", "16:30", "16:30:45", "1630",
+           "163045", "08/11 16:30", "0811/163045", "2025/08/11 16:30:45", "無法解析"]
+
+def main(count):
+    os.chdir(tempfile.mkdtemp())
+    copy_data(".")
+    app = load_app()
+    parser = app.get_time_parser()
+    texts = [SAMPLES[i % len(SAMPLES)] for i in range(count)]
+    now = app.get_taiwan_time()
+    
+    started = time.perf_counter()
+    results = parser.parse_many(texts, now)
+    batch_seconds = time.perf_counter() - started
+    
+    tracker = app.BossTracker("bench")
+    started = time.perf_counter()
+    for text in texts:
+        tracker.parse_time_string(text)
+    single_seconds = time.perf_counter() - started
+    
+    parsed = sum(result is not None for result in results)
+    print(f"{count} 筆輸入，{parsed} 筆可解析")
+    print(f"parse_many:        {count / batch_seconds:>12,.0f} 筆/秒")
+    print(f"parse_time_string: {count / single_seconds:>12,.0f} 筆/秒（每筆讀取時鐘）")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,50 @@
+"""測試共用設定：載入 app.py 的定義（不執行畫面），並在暫存目錄中操作數據檔案"""
+import logging
+import os
+import shutil
+import sys
+import types
+import warnings
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# app.py 在此標記之後才開始啟動服務與繪製畫面
+APP_MAIN_MARKER = "# 以 `python app.py"
+DATA_FILES = ("groups.json", "base_roster.json")
+
+def load_app():
+    """以模組形式載入 app.py 的函式與類別（Streamlit 以 bare 模式執行，不需要伺服器）"""
+    logging.disable(logging.WARNING)  # bare 模式的 ScriptRunContext 警告
+    warnings.filterwarnings("ignore")
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        source = f.read()
+    source = source[:source.index(APP_MAIN_MARKER)]
+    module = types.ModuleType("app")
+    module.__file__ = os.path.join(ROOT, "app.py")
+    exec(compile(source, module.__file__, "exec"), module.__dict__)
+    return module
+
+def copy_data(target):
+    """把群組設定、名單與各群組數據檔複製到 target"""
+    for name in os.listdir(ROOT):
+        if name in DATA_FILES or name.endswith("_boss_data.json"):
+            shutil.copy(os.path.join(ROOT, name), target)
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("app")
+    copy_data(workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        yield load_app()
+    finally:
+        os.chdir(cwd)
+
+@pytest.fixture
+def workdir(app, tmp_path, monkeypatch):
+    """每個測試使用獨立的數據目錄"""
+    copy_data(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,94 @@
+"""自動備份：完整+增量備份鏈的還原、輪替、重新啟動後接續，以及還原只寫入一次"""
+import pytest
+
+START_TS = 1_700_000_000
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(START_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+@pytest.fixture
+def registry(app, workdir, clock):
+    return app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+
+@pytest.fixture
+def tracker(registry):
+    return registry.get_tracker(next(iter(registry.groups())))
+
+def make_backups(app, registry, tmp_path, **options):
+    return app.BackupManager(registry, backup_dir=str(tmp_path / "backups"), interval=0, **options)
+
+def kill(app, tracker, clock, boss_name, channel=1, minutes_ago=1):
+    """以目前的時鐘記錄一筆擊殺，等待寫入完成後前進一分鐘"""
+    killed = app.datetime.fromtimestamp(clock.now_ts() - minutes_ago * 60, app.TW_TZ).isoformat()
+    assert tracker.update_kill_times({boss_name: killed}, app.get_taiwan_time(), channel).result(timeout=5)
+    clock.advance(60)
+
+def test_chain_restores_every_point(app, registry, tracker, clock, tmp_path):
+    backups = make_backups(app, registry, tmp_path, full_every=3)
+    names = list(tracker.bosses)
+    expected = {}
+    for i in range(6):
+        kill(app, tracker, clock, names[i % 3], channel=1 + i % 2)
+        if i == 4:
+            tracker.update_kill_times({names[1]: None}, None, 1).result(timeout=5)  # 清除的記錄也要還原
+        name = backups.backup_group(tracker.group_prefix)
+        assert name is not None
+        expected[name] = tracker.kill_records()
+    points = backups.points(tracker.group_prefix)
+    assert [kind for _, kind, _ in points] == ["full", "inc", "inc", "inc", "full", "inc"]
+    for name, records in expected.items():
+        assert backups.state_at(tracker.group_prefix, name) == {channel: kills for channel, kills in records.items() if kills}
+    # 沒有變更時不寫入新的備份點
+    assert backups.backup_group(tracker.group_prefix) is None
+
+def test_rotation_keeps_restorable_chain(app, registry, tracker, clock, tmp_path):
+    backups = make_backups(app, registry, tmp_path, full_every=2, keep_full=2)
+    names = list(tracker.bosses)
+    latest = None
+    for i in range(10):
+        kill(app, tracker, clock, names[i])
+        latest = backups.backup_group(tracker.group_prefix)
+    points = backups.points(tracker.group_prefix)
+    kinds = [kind for _, kind, _ in points]
+    assert kinds[0] == "full" and kinds.count("full") == 2
+    assert len(points) < 10
+    for _, _, name in points:
+        backups.state_at(tracker.group_prefix, name)  # 每個保留的備份點都能還原
+    assert backups.state_at(tracker.group_prefix, latest) == tracker.kill_records()
+
+def test_resume_after_restart(app, registry, tracker, clock, tmp_path):
+    names = list(tracker.bosses)
+    backups = make_backups(app, registry, tmp_path, full_every=5)
+    kill(app, tracker, clock, names[0])
+    backups.backup_group(tracker.group_prefix)
+    kill(app, tracker, clock, names[1])
+    backups.backup_group(tracker.group_prefix)
+    # 重新啟動：新的備份管理接續原本的備份鏈，寫入增量而不是完整備份
+    restarted = make_backups(app, registry, tmp_path, full_every=5)
+    kill(app, tracker, clock, names[2])
+    name = restarted.backup_group(tracker.group_prefix)
+    assert name.endswith("_inc.json.gz")
+    assert restarted._state[tracker.group_prefix]['incrementals'] == 2
+    assert restarted.state_at(tracker.group_prefix, name) == tracker.kill_records()
+
+def test_restore_writes_once(app, registry, tracker, clock, tmp_path):
+    backups = make_backups(app, registry, tmp_path)
+    names = list(tracker.bosses)
+    kill(app, tracker, clock, names[0])
+    kill(app, tracker, clock, names[1], channel=2)
+    point = backups.backup_group(tracker.group_prefix)
+    before = tracker.kill_records()
+    kill(app, tracker, clock, names[2])
+    kill(app, tracker, clock, names[3], channel=2)
+    tracker.update_kill_times({names[0]: None}).result(timeout=5)
+    writes = []
+    write = tracker._write_boss_data
+    tracker._write_boss_data = lambda saved: writes.append(saved) or write(saved)
+    state = backups.state_at(tracker.group_prefix, point)
+    assert tracker.restore_kill_times(state).result(timeout=5)
+    assert len(writes) == 1
+    assert tracker.kill_records() == before
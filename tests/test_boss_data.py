@@ -0,0 +1,82 @@
+"""BOSS數據檔案：驗證、損毀隔離與二進位快照（以 hypothesis 產生任意輸入）"""
+import json
+import os
+from datetime import datetime
+
+from hypothesis import HealthCheck, given, settings, strategies as st
+
+json_values = st.recursive(
+    st.none() | st.booleans() | st.integers() | st.floats(allow_nan=False) | st.text(max_size=30),
+    lambda children: st.lists(children, max_size=4) | st.dictionaries(st.text(max_size=8), children, max_size=4),
+    max_leaves=20,
+)
+iso_times = st.datetimes(min_value=datetime(2000, 1, 1), max_value=datetime(2100, 1, 1))
+boss_names = st.text(alphabet=st.characters(blacklist_characters="\0", blacklist_categories=("Cs",)), min_size=1, max_size=12)
+fuzz = settings(max_examples=200, deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+
+def kills_strategy(app):
+    return st.dictionaries(
+        st.integers(min_value=1, max_value=20),
+        st.dictionaries(boss_names, st.none() | iso_times.map(lambda dt: dt.replace(tzinfo=app.TW_TZ).isoformat()), max_size=8),
+        max_size=4,
+    )
+
+@fuzz
+@given(data=st.data())
+def test_validate_accepts_or_rejects_cleanly(app, data):
+    value = data.draw(json_values | st.fixed_dictionaries({'last_killed': json_values, 'channels': json_values}))
+    try:
+        channel_kills, _ = app.validate_boss_data(value)
+    except ValueError:
+        return
+    for kills in channel_kills.values():
+        for killed in kills.values():
+            assert killed is None or isinstance(app.parse_iso_ts(killed), float)
+
+@fuzz
+@given(data=st.data())
+def test_snapshot_roundtrip(app, workdir, data):
+    channel_kills = data.draw(kills_strategy(app))
+    app.write_boss_snapshot("fuzz.bin", channel_kills)
+    expected = {app.DEFAULT_CHANNEL: {}, **{channel: kills for channel, kills in channel_kills.items() if kills}}
+    assert app.read_boss_snapshot("fuzz.bin") == expected
+
+@fuzz
+@given(data=st.data())
+def test_corrupted_snapshot_is_rejected(app, workdir, data):
+    app.write_boss_snapshot("fuzz.bin", data.draw(kills_strategy(app)))
+    with open("fuzz.bin", "rb") as f:
+        content = bytearray(f.read())
+    if data.draw(st.booleans()):
+        position = data.draw(st.integers(min_value=0, max_value=len(content) - 1))
+        content[position] ^= data.draw(st.integers(min_value=1, max_value=255))
+    else:
+        content = content[:data.draw(st.integers(min_value=0, max_value=len(content) - 1))]
+    with open("fuzz.bin", "wb") as f:
+        f.write(content)
+    try:
+        app.read_boss_snapshot("fuzz.bin")
+    except ValueError:
+        pass  # 空檔案時 mmap 也是 ValueError
+
+def test_corrupt_file_is_quarantined(app, workdir):
+    with open("broken_boss_data.json", "w", encoding="utf-8") as f:
+        f.write('{"last_killed": {"佩爾利斯": "not a time"}}')
+    tracker = app.BossTracker("broken", roster_store=app.RosterStore(), storage=app.StorageIO())
+    assert tracker.load_error and tracker.quarantined_file
+    assert os.path.exists(tracker.quarantined_file) and not os.path.exists("broken_boss_data.json")
+    assert all(boss_data['last_killed'] is None for boss_data in tracker.bosses.values())
+
+def test_snapshot_used_when_json_is_corrupt(app, workdir):
+    tracker = app.BossTracker("snap", roster_store=app.RosterStore(), storage=app.StorageIO())
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time().replace(microsecond=0).isoformat()
+    assert tracker.update_kill_times({boss_name: killed}).result(timeout=5)
+    app.write_boss_snapshot(tracker.snapshot_file, tracker.kill_records())
+    with open(tracker.data_file, "w", encoding="utf-8") as f:
+        f.write("{")
+    restored = app.BossTracker("snap", roster_store=app.RosterStore(), storage=app.StorageIO())
+    assert restored.quarantined_file and restored.bosses[boss_name]['last_killed'] == killed
+    with open(restored.quarantined_file, encoding="utf-8") as f:
+        assert f.read() == "{"
+    assert json.dumps(restored.kill_records())
@@ -0,0 +1,81 @@
+"""行事曆訂閱：實際向旁路 HTTP 服務取得 /calendar/<群組>.ics"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+@pytest.fixture
+def api(app, workdir):
+    registry = app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+    server = ThreadingHTTPServer(("127.0.0.1", 0), app.ApiRequestHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    server.calendar = app.CalendarFeed()
+    server.warm_start = app.WarmStart()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def fetch(server, path, headers=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def first_group(server):
+    group_name, config = next(iter(server.registry.groups().items()))
+    return group_name, config['file_prefix']
+
+def test_feed_contains_respawn_events(app, api):
+    group_name, prefix = first_group(api)
+    tracker = api.registry.get_tracker(group_name)
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time() - app.timedelta(minutes=1)
+    tracker.update_kill_times({boss_name: killed.isoformat()}).result(timeout=5)
+    
+    started = int(time.time())
+    status, headers, body = fetch(api, f"/calendar/{prefix}.ics?hours=48")
+    assert status == 200
+    assert headers['Content-Type'].startswith("text/calendar")
+    text = body.decode('utf-8').replace("\r\n ", "")
+    assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+    assert boss_name in text
+    events = text.split("BEGIN:VEVENT")[1:]
+    assert events and all("END:VEVENT" in event and "DTSTART:" in event for event in events)
+    # DTSTAMP 是產生內容的時間，不是擊殺時間
+    stamps = {line for event in events for line in event.split("\r\n") if line.startswith("DTSTAMP:")}
+    assert len(stamps) == 1
+    stamp = time.mktime(time.strptime(stamps.pop(), "DTSTAMP:%Y%m%dT%H%M%SZ")) - time.timezone
+    assert started - 5 <= stamp <= time.time() + 5
+
+def test_conditional_requests(api):
+    _, prefix = first_group(api)
+    status, headers, _ = fetch(api, f"/calendar/{prefix}.ics")
+    assert status == 200
+    etag, last_modified = headers['ETag'], headers['Last-Modified']
+    
+    status, headers, body = fetch(api, f"/calendar/{prefix}.ics", {"If-None-Match": etag})
+    assert (status, body, headers['ETag']) == (304, b"", etag)
+    assert fetch(api, f"/calendar/{prefix}.ics", {"If-Modified-Since": last_modified})[0] == 304
+    assert fetch(api, f"/calendar/{prefix}.ics", {"If-None-Match": '"other"'})[0] == 200
+
+def test_feed_changes_after_kill(app, api):
+    group_name, prefix = first_group(api)
+    etag = fetch(api, f"/calendar/{prefix}.ics")[1]['ETag']
+    tracker = api.registry.get_tracker(group_name)
+    tracker.update_kill_times({next(iter(tracker.bosses)): app.get_taiwan_time().isoformat()}).result(timeout=5)
+    status, headers, _ = fetch(api, f"/calendar/{prefix}.ics", {"If-None-Match": etag})
+    assert status == 200 and headers['ETag'] != etag
+
+def test_unknown_group_and_bad_hours(api):
+    _, prefix = first_group(api)
+    assert fetch(api, "/calendar/nope.ics")[0] == 404
+    assert fetch(api, f"/calendar/{prefix}.ics?hours=abc")[0] == 400
+    assert json.loads(fetch(api, "/healthz")[2]) == {"status": "ok"}
@@ -0,0 +1,82 @@
+"""聊天記錄匯入：重複回報、晚到的擊殺、依時間補記歷史，以及無法辨識的行"""
+import json
+
+import pytest
+
+# 匯入時的現在時間：2025/08/11 14:00（台灣時間）
+NOW_TS = 1754892000
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(NOW_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+@pytest.fixture
+def tracker(app, workdir, clock):
+    return app.BossTracker("chat", storage=app.StorageIO())
+
+def tw(app, text):
+    return int(app.datetime.fromisoformat(f"2025-08-11T{text}+08:00").timestamp())
+
+def run(app, tracker, lines):
+    return app.ChatLogImporter(tracker).run(iter(lines), app.get_taiwan_time())
+
+def history_events(tracker):
+    with open(tracker.history.log_file, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_reports_within_respawn_window_count_once(app, tracker):
+    result = run(app, tracker, [
+        "2025/08/11（一）",
+        "02:30 阿明: 潘納洛德 死",
+        "02:31 小華: 潘納洛德 死 0230",   # 同一次擊殺的其他回報
+        "05:40 阿明: 潘納洛德 死",        # 超過重生時間，是新的擊殺
+    ])
+    assert (result['kills'], result['duplicates'], result['updated']) == (2, 1, 1)
+    assert app.parse_iso_ts(tracker.bosses['潘納洛德']['last_killed']) == tw(app, "05:40:00")
+
+def test_older_kill_does_not_overwrite_newer_record(app, tracker):
+    newer = app.datetime.fromtimestamp(tw(app, "10:00:00"), app.TW_TZ).isoformat()
+    tracker.update_kill_times({'巨蟻女王': newer}).result(timeout=5)
+    result = run(app, tracker, ["2025/08/11", "08:00 阿明: 巨蟻女王 死"])
+    assert result['updated'] == 0
+    assert tracker.bosses['巨蟻女王']['last_killed'] == newer
+
+def test_backfill_follows_history_floor(app, tracker, clock):
+    # 歷史最後一筆事件在 12:00
+    clock.advance(tw(app, "12:00:00") - NOW_TS)
+    tracker.update_kill_times({'史坦': app.get_taiwan_time().isoformat()}).result(timeout=5)
+    clock.advance(tw(app, "14:00:00") - clock.now_ts())
+    result = run(app, tracker, [
+        "2025/08/11",
+        "02:30 阿明: 潘納洛德 死",      # 早於歷史最後一筆：只更新目前記錄，以匯入時間記錄
+        "13:30 小華: 安庫拉 死",
+        "13:35 阿明: 巴實那 死 1310",   # 內容時間比前一則訊息早，補記時依擊殺時間排序
+        "15:00 小華: 塔金 死",          # 未來的時間
+    ])
+    assert tracker.wait_saved()
+    assert (result['updated'], result['backfilled'], result['future']) == (3, 2, 1)
+    events = history_events(tracker)
+    stamps = [app.parse_iso_ts(event['ts']) for event in events]
+    assert stamps == sorted(stamps)
+    backfilled = [(event['boss'], app.parse_iso_ts(event['ts'])) for event in events if event['boss'] in ('安庫拉', '巴實那')]
+    assert backfilled == [('巴實那', tw(app, "13:10:00")), ('安庫拉', tw(app, "13:30:00"))]
+    late = [event for event in events if event['boss'] == '潘納洛德']
+    assert len(late) == 1 and app.parse_iso_ts(late[0]['ts']) == tw(app, "14:00:00")
+    assert app.parse_iso_ts(late[0]['last_killed']) == tw(app, "02:30:00")
+    assert tracker.bosses['塔金']['last_killed'] is None
+
+def test_unmatched_lines_are_reported(app, tracker):
+    result = run(app, tracker, [
+        "02:30 阿明: 潘納洛德 死",   # 還沒有日期行，不知道是哪一天
+        "2025/08/11",
+        "02:40 小華: 不知道什麼 死了",
+        "02:45 阿明: 今天天氣很好",  # 一般聊天不列入
+        "02:50 小華: 潘納洛德 死",
+    ])
+    assert result['unmatched'] == 2
+    assert [line_no for line_no, _ in result['unmatched_samples']] == [1, 3]
+    assert "不知道什麼" in result['unmatched_samples'][1][1]
+    assert result['updated'] == 1
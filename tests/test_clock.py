@@ -0,0 +1,56 @@
+"""以 ManualClock 快轉時間，檢查重生狀態、即將重生清單與回報時間範圍"""
+import pytest
+
+START_TS = 1_700_000_000  # 固定的起始時間（整分鐘）
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(START_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+@pytest.fixture
+def tracker(app, workdir, clock):
+    tracker = app.BossTracker("clock", storage=app.StorageIO())
+    now = app.get_taiwan_time()
+    boss_name = tracker.name_index.sorted_names[0]
+    assert tracker.update_kill_times({boss_name: now.isoformat()}, now).result(timeout=5)
+    return tracker
+
+def test_taiwan_time_follows_clock(app, clock):
+    assert app.get_taiwan_timestamp() == START_TS
+    clock.advance(90)
+    assert app.get_taiwan_time().timestamp() == START_TS + 90
+    assert app.get_taiwan_time().utcoffset().total_seconds() == app.TW_OFFSET_SECONDS
+
+def test_status_changes_when_respawn_time_passes(tracker, clock):
+    boss_name = tracker.name_index.sorted_names[0]
+    minutes = tracker.bosses[boss_name]['respawn_minutes']
+    status = lambda: tracker.calculate_respawn_info(boss_name, tracker.bosses[boss_name])[2:]
+    assert status()[1] == "waiting"
+    clock.advance(minutes * 60 - 1)
+    assert status() == ("⏳ 0m", "waiting")
+    clock.advance(1)
+    assert status() == ("✅ 已重生", "ready")
+
+def test_upcoming_window_moves_with_clock(tracker, clock):
+    boss_name = tracker.name_index.sorted_names[0]
+    minutes = tracker.bosses[boss_name]['respawn_minutes']
+    clock.advance((minutes - 6) * 60)
+    assert tracker.get_upcoming_bosses(5) == []
+    clock.advance(90)
+    upcoming = tracker.get_upcoming_bosses(5)
+    assert [entry['name'] for entry in upcoming] == [boss_name]
+    assert upcoming[0]['time_left'] == "4m30s"
+    clock.advance(5 * 60)
+    assert tracker.get_upcoming_bosses(5) == []
+
+def test_report_age_limit_uses_clock(app, tracker, clock):
+    boss_name = tracker.name_index.sorted_names[1]
+    killed_ts = START_TS + 60
+    clock.advance(60 + app.REPORT_MAX_AGE_DAYS * 86400 + 1)
+    assert tracker.report_kill(boss_name, killed_ts)[0] == "rejected"
+    clock.advance(-2)
+    assert tracker.report_kill(boss_name, killed_ts)[0] == "recorded"
+    assert tracker.report_kill(boss_name, clock.now_ts() + app.TIME_PARSE_FUTURE_GRACE_SECONDS + 1)[0] == "rejected"
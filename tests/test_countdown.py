@@ -0,0 +1,54 @@
+"""即時倒數表格：只傳送重生時間戳，內容只在數據改變時改變，不隨時間改變"""
+import json
+import re
+
+import pytest
+
+START_TS = 1_700_000_000
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(START_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+@pytest.fixture
+def tracker(app, workdir, clock):
+    return app.BossTracker("countdown", storage=app.StorageIO())
+
+def payload(html):
+    return json.loads(re.search(r"const bosses = (.*);", html).group(1).replace("<\\/", "</"))
+
+def test_rows_carry_respawn_epochs(app, tracker):
+    names = tracker.name_index.sorted_names
+    killed = app.get_taiwan_time().replace(microsecond=0)
+    tracker.update_kill_times({names[2]: killed.isoformat()}).result(timeout=5)
+    rows = tracker.get_countdown_rows()
+    assert [row[0] for row in rows] == names
+    minutes = tracker.bosses[names[2]]['respawn_minutes']
+    assert rows[2] == [names[2], int(killed.timestamp()) + minutes * 60, minutes]
+    assert all(row[1] is None for i, row in enumerate(rows) if i != 2)
+
+def test_html_changes_with_data_not_clock(app, tracker, clock):
+    html = app.get_countdown_table_html(tracker.get_countdown_rows(), [])
+    clock.advance(3 * 3600)
+    assert app.get_countdown_table_html(tracker.get_countdown_rows(), []) == html
+    boss_name = tracker.name_index.sorted_names[0]
+    tracker.update_kill_times({boss_name: app.get_taiwan_time().isoformat()}).result(timeout=5)
+    changed = app.get_countdown_table_html(tracker.get_countdown_rows(), ["waiting"])
+    assert changed != html
+    assert payload(changed)[0][1] == int(clock.now_ts()) + tracker.bosses[boss_name]['respawn_minutes'] * 60
+    assert 'const statusFilter = ["waiting"];' in changed
+
+def test_names_cannot_close_script(app):
+    html = app.get_countdown_table_html([["</script><b>x", None, 60]], [])
+    assert "</script><b>" not in html
+    assert payload(html) == [["</script><b>x", None, 60]]
+
+def test_render_snapshot_countdown_matches_table(app, tracker):
+    tracker.update_kill_times({tracker.name_index.sorted_names[5]: app.get_taiwan_time().isoformat()}).result(timeout=5)
+    render = tracker.build_render_snapshot(START_TS // 60 * 60)
+    assert [row[0] for row in render['countdown']] == list(render['table']['BOSS名稱'])
+    order = render['sort_orders']['next_respawn']
+    assert render['countdown'][order[0]][0] == tracker.name_index.sorted_names[5]
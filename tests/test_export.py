@@ -0,0 +1,57 @@
+"""分析匯出：直接讀取數據檔案，不載入群組"""
+import json
+import os
+import threading
+
+import pytest
+
+@pytest.fixture
+def registry(app, workdir):
+    return app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet", "csv"])
+def test_export_does_not_load_groups(app, registry, fmt):
+    if fmt not in app.available_export_formats():
+        pytest.skip("pyarrow 未安裝")
+    results = app.export_analytics(registry, fmt, "out")
+    assert all(registry.loaded_tracker(name) is None for name in registry.groups())
+    path, rows = results['boss_state']
+    assert os.path.exists(path) and rows > 0
+    assert sorted(os.listdir("out")) == sorted(os.path.basename(p) for p, _ in results.values())
+
+def test_state_rows_match_data_file(app, registry):
+    group_name, config = next(iter(registry.groups().items()))
+    tracker = registry.get_tracker(group_name)
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time().replace(microsecond=0)
+    tracker.update_kill_times({boss_name: killed.isoformat()})  # 不等待寫入，匯出前會先等待排隊中的寫入
+    rows = {(group, channel, boss): row for group, channel, boss, *row in app.export_state_rows(registry)}
+    respawn_minutes = tracker.bosses[boss_name]['respawn_minutes']
+    assert rows[(group_name, 1, boss_name)] == [respawn_minutes, int(killed.timestamp()), int(killed.timestamp()) + respawn_minutes * 60]
+    with open(tracker.data_file, encoding="utf-8") as f:
+        assert json.load(f)['last_killed'][boss_name] == killed.isoformat()
+
+def test_corrupt_group_is_skipped(app, registry):
+    group_name, config = next(iter(registry.groups().items()))
+    with open(f"{config['file_prefix']}_boss_data.json", "w", encoding="utf-8") as f:
+        f.write("{broken")
+    groups = {group for group, *_ in app.export_state_rows(registry)}
+    assert group_name not in groups and groups
+
+def test_concurrent_exports_use_separate_temp_files(app, registry):
+    errors = []
+    def run():
+        try:
+            app.export_analytics(registry, "csv", "out")
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert not [name for name in os.listdir("out") if name.endswith(".tmp")]
+    with open("out/boss_state.csv", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "group,channel,boss,respawn_minutes,last_killed,next_respawn" and len(lines) > 1
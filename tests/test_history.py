@@ -0,0 +1,72 @@
+"""擊殺歷史：跨快照的回溯與比較、事件時間遞增，以及略過格式錯誤的日誌行"""
+import json
+
+import pytest
+
+START_TS = 1_700_000_000
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(START_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+@pytest.fixture
+def tracker(app, workdir, clock, monkeypatch):
+    monkeypatch.setattr(app, "HISTORY_SNAPSHOT_INTERVAL", 3)  # 每3筆事件一個快照
+    return app.BossTracker("history", storage=app.StorageIO())
+
+def at(app, ts):
+    return app.datetime.fromtimestamp(ts, app.TW_TZ)
+
+def record(app, tracker, clock, boss_name, last_killed):
+    clock.advance(60)
+    assert tracker.update_kill_times({boss_name: last_killed}, app.get_taiwan_time()).result(timeout=5)
+    return clock.now_ts()
+
+def test_state_at_and_diff_across_snapshots(app, tracker, clock):
+    names = list(tracker.bosses)[:4]
+    expected = []  # (事件時間, 當時的擊殺記錄)
+    for i in range(10):
+        killed = at(app, clock.now_ts()).isoformat()
+        event_ts = record(app, tracker, clock, names[i % 4], None if i == 7 else killed)
+        expected.append((event_ts, {name: tracker.bosses[name]['last_killed'] for name in names}))
+    history = tracker.history
+    assert len(history._snapshot_ts) >= 3
+    assert history.state_at(at(app, START_TS - 60)) is None
+    for event_ts, kills in expected:
+        for when in (event_ts, event_ts + 30):  # 事件當下與下一筆事件之前
+            state = history.state_at(at(app, when))
+            assert {name: state[name]['last_killed'] for name in names} == kills
+    # 比較跨越快照的兩個時間點
+    start_ts, start_kills = expected[1]
+    end_ts, end_kills = expected[8]
+    changes = history.diff(at(app, start_ts), at(app, end_ts))
+    assert {(name, old, new) for name, old, new in changes} == {
+        (name, start_kills[name], end_kills[name]) for name in names if start_kills[name] != end_kills[name]
+    }
+
+def test_event_time_never_goes_backwards(app, tracker, clock):
+    first, second = list(tracker.bosses)[:2]
+    clock.advance(600)
+    now = app.get_taiwan_time()
+    tracker.update_kill_times({first: now.isoformat()}, now).result(timeout=5)
+    # 較晚處理的 session 帶著較早的畫面時間
+    earlier = now - app.timedelta(minutes=5)
+    tracker.update_kill_times({second: earlier.isoformat()}, earlier).result(timeout=5)
+    with open(tracker.history.log_file, encoding="utf-8") as f:
+        stamps = [app.parse_iso_ts(json.loads(line)['ts']) for line in f]
+    assert stamps == sorted(stamps)
+    state = tracker.history.state_at(now)
+    assert state[first]['last_killed'] == now.isoformat()
+    assert state[second]['last_killed'] == earlier.isoformat()
+
+def test_malformed_log_lines_are_skipped(app, tracker, clock):
+    boss_name = list(tracker.bosses)[0]
+    record(app, tracker, clock, boss_name, at(app, clock.now_ts()).isoformat())
+    with open(tracker.history.log_file, "a", encoding="utf-8") as f:
+        f.write('{"ts": "2023-11-15T06:00:00+08:00"}\n{"boss": "x"}\n{"ts": 5, "boss": "x", "last_killed": null}\nnot json\n')
+    killed = at(app, clock.now_ts()).isoformat()
+    event_ts = record(app, tracker, clock, boss_name, killed)
+    assert tracker.history.state_at(at(app, event_ts))[boss_name]['last_killed'] == killed
@@ -0,0 +1,40 @@
+"""多頻道的寫入與畫面數據只重新處理有變更的頻道"""
+import json
+
+import pytest
+
+@pytest.fixture
+def tracker(app, workdir):
+    tracker = app.BossTracker("incremental", roster_store=app.RosterStore(), channel_count=5, storage=app.StorageIO())
+    now = app.get_taiwan_time().replace(microsecond=0)
+    names = list(tracker.bosses)
+    for channel in range(1, 6):
+        assert tracker.update_kill_times({names[channel]: now.isoformat()}, now, channel).result(timeout=5)
+    return tracker
+
+def test_file_matches_memory(app, tracker):
+    with open(tracker.data_file, encoding="utf-8") as f:
+        channel_kills, legacy = app.validate_boss_data(json.load(f))
+    assert not legacy
+    assert {channel: kills for channel, kills in channel_kills.items() if kills} == tracker.kill_records()
+
+def test_only_changed_channel_is_serialized(app, tracker):
+    before = dict(tracker._saved_channels)
+    name = list(tracker.bosses)[0]
+    assert tracker.update_kill_times({name: app.get_taiwan_time().isoformat()}, None, 3).result(timeout=5)
+    changed = [channel for channel, cached in tracker._saved_channels.items() if cached is not before.get(channel)]
+    assert changed == [3]
+    with open(tracker.data_file, encoding="utf-8") as f:
+        assert json.load(f)['channels']['3'][name] == tracker.channel_bosses(3)[name]['last_killed']
+
+def test_render_reuses_unchanged_channel_tables(app, tracker):
+    channels = tuple(tracker.channel_list())
+    now_ts = int(app.get_taiwan_timestamp()) // 60 * 60
+    first = tracker.build_render_snapshot(now_ts, channels)
+    tables = {channel: cached[1] for channel, cached in tracker._channel_tables.items()}
+    tracker.update_kill_times({list(tracker.bosses)[0]: app.get_taiwan_time().isoformat()}, None, 2)
+    second = tracker.build_render_snapshot(now_ts, channels)
+    rebuilt = [channel for channel, cached in tracker._channel_tables.items() if cached[1] is not tables[channel]]
+    assert rebuilt == [2]
+    assert len(second['table']) == len(first['table']) == len(channels) * len(tracker.bosses)
+    assert second['table'].equals(tracker.build_render_snapshot(now_ts, channels)['table'])
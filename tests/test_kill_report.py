@@ -0,0 +1,23 @@
+"""「記錄現在時間」的回報結果都會顯示訊息"""
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+
+def report_page(tests_dir):
+    import sys
+    from datetime import timedelta
+    sys.path.insert(0, tests_dir)
+    from conftest import load_app
+    app = load_app()
+    tracker = app.BossTracker("report", storage=app.StorageIO())
+    boss_name = next(iter(tracker.bosses))
+    now = app.get_taiwan_time()
+    tracker.update_kill_times({boss_name: now.isoformat()}, now).result(timeout=5)
+    app.show_kill_report(tracker, boss_name, now - timedelta(hours=1))  # 比現有記錄舊
+    app.show_kill_report(tracker, "不存在的BOSS", now)                   # 不在名冊
+
+def test_stale_and_rejected_messages(workdir):
+    at = AppTest.from_function(report_page, args=(f"{ROOT}/tests",), default_timeout=60).run()
+    assert not at.exception
+    assert len(at.warning) == 1 and "較新的擊殺記錄" in at.warning[0].value
+    assert len(at.error) == 1 and "無法記錄" in at.error[0].value
@@ -0,0 +1,51 @@
+"""記憶體統計：session_state 大小定時取樣，不在每次執行時估算；背景摘要使用傳入的共用資源"""
+import json
+import threading
+
+import pytest
+
+@pytest.fixture
+def monitor(app, workdir, monkeypatch):
+    calls = []
+    original = app.deep_getsizeof
+    def counting(obj, seen=None):
+        if seen is None:
+            calls.append(obj)
+        return original(obj, seen)
+    monkeypatch.setattr(app, "deep_getsizeof", counting)
+    registry = app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+    monitor = app.MemoryMonitor(registry, app.RenderCache(), log_file=str(workdir / "memory.jsonl"), interval=0)
+    monitor.calls = calls
+    return monitor
+
+def test_sampled_at_most_once_per_interval(app, monitor, monkeypatch):
+    state = {'a': "x" * 100, 'b': [1, 2, 3]}
+    monitor.record_session("s1", state)
+    assert len(monitor.calls) == 2
+    state['a'] = "y" * 10000
+    monitor.record_session("s1", state)
+    assert len(monitor.calls) == 2 and monitor.sessions()['s1']['a'] < 1000
+    monkeypatch.setattr(app, "SESSION_SAMPLE_SECONDS", 0)
+    monitor.record_session("s1", state)
+    assert monitor.sessions()['s1']['a'] > 10000
+
+def test_force_when_admin_open(monitor):
+    monitor.record_session("s1", {'a': 1})
+    monitor.record_session("s1", {'a': 1, 'b': 2}, force=True)
+    assert set(monitor.sessions()['s1']) == {'a', 'b'}
+
+def test_summary_uses_given_resources_off_script_thread(app, monitor, monkeypatch):
+    def unavailable():
+        raise AssertionError("背景執行緒不應呼叫 Streamlit 快取函式")
+    monkeypatch.setattr(app, "get_group_registry", unavailable)
+    monkeypatch.setattr(app, "get_render_cache", unavailable)
+    group_name = next(iter(monitor.registry.groups()))
+    monitor.registry.get_tracker(group_name)
+    monitor.render_cache.get_or_build(("g", 1), lambda: [0] * 100)
+    thread = threading.Thread(target=monitor.write_summary)
+    thread.start()
+    thread.join(10)
+    with open(monitor.log_file, encoding="utf-8") as f:
+        summary = json.loads(f.readline())
+    assert list(summary['groups']) == [group_name] and summary['groups'][group_name] > 0
+    assert summary['render_cache']['g'] > 0
@@ -0,0 +1,51 @@
+"""BOSS名稱索引：名稱片段、別名與字首查詢，快速輸入，以及只在名冊或別名變更時重建"""
+import pytest
+
+# 2025/08/11 17:00（台灣時間）
+NOW_TS = 1754902800
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(NOW_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+@pytest.fixture
+def tracker(app, workdir, clock):
+    return app.BossTracker("names", roster_store=app.RosterStore(), storage=app.StorageIO())
+
+def test_search_and_resolve(app):
+    index = app.BossNameIndex({
+        '巨蟻女王': {'respawn_minutes': 360},
+        '突變克魯瑪': {'respawn_minutes': 480},
+        '被汙染的克魯瑪': {'respawn_minutes': 480},
+        '潘納洛德': {'respawn_minutes': 180},
+    }, aliases={'蟻后': '巨蟻女王', '舊名': '已移除的BOSS'})
+    assert index.sorted_names[0] == '潘納洛德'  # 依重生時間排序
+    assert [index.sorted_names[i] for i in index.search('克魯')] == ['突變克魯瑪', '被汙染的克魯瑪']
+    assert index.resolve('巨蟻') == '巨蟻女王'
+    assert index.resolve('蟻后') == '巨蟻女王'
+    assert index.resolve('克魯瑪') is None  # 兩個都符合，無法確定
+    assert index.resolve('突變') == '突變克魯瑪'
+    assert index.resolve('舊名') is None    # 別名指向不在名冊的BOSS時忽略
+    assert index.candidates('克') == ['突變克魯瑪', '被汙染的克魯瑪']
+    assert index.search('不存在') == []
+
+def test_quick_entry(app, tracker):
+    name_part, _, time_part = "巨蟻 1630".partition(" ")
+    assert tracker.name_index.resolve(name_part) == '巨蟻女王'
+    killed = tracker.parse_time_string(time_part, app.get_taiwan_time())
+    assert killed == app.datetime(2025, 8, 11, 16, 30, 0, tzinfo=app.TW_TZ)
+
+def test_index_rebuilt_only_on_roster_or_alias_change(app, tracker):
+    index = tracker.name_index
+    tracker.sync_roster()
+    assert tracker.name_index is index
+    tracker.roster_store.update_overlay(tracker.group_prefix, add={'測試BOSS': 30})
+    tracker.sync_roster()
+    assert tracker.name_index is not index
+    assert tracker.name_index.sorted_names[0] == '測試BOSS'
+    index = tracker.name_index
+    assert tracker.save_aliases({'測試': '測試BOSS'})
+    assert tracker.name_index is not index and tracker.name_index.resolve('測試') == '測試BOSS'
@@ -0,0 +1,96 @@
+"""群組註冊表：設定檔驗證，以及使用中或有待寫入變更的tracker不會被釋放"""
+import json
+import os
+
+import pytest
+
+@pytest.fixture
+def registry(app, workdir, monkeypatch):
+    monkeypatch.setattr(app, "TRACKER_MEMORY_CAP_BYTES", 0)  # 每次取得其他群組時都會嘗試釋放
+    return app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+
+def test_in_use_tracker_is_not_evicted(registry):
+    first, second = list(registry.groups())[:2]
+    with registry.in_use(first):
+        tracker = registry.get_tracker(first)
+        registry.get_tracker(second)
+        assert registry.loaded_tracker(first) is tracker
+        assert registry.get_tracker(first) is tracker
+    registry.get_tracker(second)
+    assert registry.loaded_tracker(first) is None
+
+def test_tracker_with_pending_write_is_not_evicted(app, registry):
+    first, second = list(registry.groups())[:2]
+    registry.storage.delay = 0.5
+    tracker = registry.get_tracker(first)
+    saved = tracker.update_kill_times({next(iter(tracker.bosses)): app.get_taiwan_time().isoformat()})
+    registry.get_tracker(second)
+    assert registry.loaded_tracker(first) is tracker
+    assert saved.result(timeout=5)
+    registry.get_tracker(second)
+    assert registry.loaded_tracker(first) is None
+
+def test_invalid_group_entries_are_skipped(app, capsys):
+    groups = app.validate_groups({
+        "ok": {"icon": "⚔️", "color": "#e74c3c", "file_prefix": "ok1", "channels": 3},
+        "path": {"icon": "⚔️", "color": "#e74c3c", "file_prefix": "../etc"},
+        "css": {"icon": "⚔️", "color": "red;}</style>", "file_prefix": "css"},
+        "dup": {"icon": "⚔️", "color": "#e74c3c", "file_prefix": "ok1"},
+        "channels": {"icon": "⚔️", "color": "#e74c3c", "file_prefix": "ch", "channels": 0},
+        "text": "not a dict",
+    })
+    assert list(groups) == ["ok"]
+    assert capsys.readouterr().out.count("群組設定錯誤") == 5
+    with pytest.raises(ValueError):
+        app.validate_groups([])
+
+def test_registry_keeps_previous_groups_on_bad_file(app, registry):
+    before = registry.groups()
+    with open(registry.groups_file, "w", encoding="utf-8") as f:
+        json.dump(["not", "an", "object"], f)
+    assert registry.groups() == before
+
+def test_reload_keeps_same_tracker(app, registry):
+    first = list(registry.groups())[0]
+    tracker = registry.get_tracker(first)
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time().replace(microsecond=0).isoformat()
+    with open(tracker.data_file, "w", encoding="utf-8") as f:
+        json.dump({"last_killed": {boss_name: killed}}, f)
+    with registry.in_use(first):
+        assert registry.reload(first).result(timeout=5)
+    assert registry.loaded_tracker(first) is tracker
+    assert tracker.bosses[boss_name]['last_killed'] == killed
+
+def test_reload_refused_while_write_pending(app, registry):
+    first = list(registry.groups())[0]
+    tracker = registry.get_tracker(first)
+    boss_name = next(iter(tracker.bosses))
+    with tracker.lock:
+        tracker.bosses[boss_name]['last_killed'] = app.get_taiwan_time().isoformat()
+        tracker._mark_dirty()  # 尚未排入寫入工作
+    assert registry.reload(first).result(timeout=5) is False
+    assert tracker.bosses[boss_name]['last_killed'] is not None
+
+def test_deleted_group_released_only_when_evictable(app, registry):
+    groups = registry.groups()
+    first = list(groups)[0]
+    with registry.in_use(first):
+        registry.get_tracker(first)
+        with open(registry.groups_file, "w", encoding="utf-8") as f:
+            json.dump({name: config for name, config in groups.items() if name != first}, f)
+        os.utime(registry.groups_file, ns=(1, 1))  # 確保修改時間不同
+        assert first not in registry.groups()
+        assert registry.loaded_tracker(first) is not None
+    registry.get_tracker(list(groups)[1])
+    assert registry.loaded_tracker(first) is None
+
+def test_sizes_follow_changes_after_load(app, registry):
+    first = list(registry.groups())[0]
+    tracker = registry.get_tracker(first)
+    before = registry.loaded_groups()[first]
+    now = app.get_taiwan_time()
+    for channel in range(2, 6):
+        assert tracker.update_kill_times({name: now.isoformat() for name in tracker.bosses}, now, channel).result(timeout=5)
+    assert registry.loaded_groups()[first] > before
+    assert registry.loaded_groups()[first] == tracker.estimated_size()
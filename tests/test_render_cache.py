@@ -0,0 +1,50 @@
+"""渲染快取：同一分鐘同一群組的多次重新執行只建立一次，建立時不阻擋其他群組"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+def test_reruns_in_same_minute_build_once(app, workdir):
+    cache = app.RenderCache()
+    tracker = app.BossTracker("render", storage=app.StorageIO())
+    minute = int(app.get_taiwan_timestamp() // 60)
+    key = (tracker.group_prefix, tracker.data_version, (app.DEFAULT_CHANNEL,), minute)
+    builds = []
+    def build():
+        builds.append(None)
+        time.sleep(0.2)  # 建立期間其他 session 同時重新執行
+        return tracker.build_render_snapshot(minute * 60)
+    with ThreadPoolExecutor(max_workers=40) as pool:
+        renders = list(pool.map(lambda _: cache.get_or_build(key, build), range(40)))
+    assert len(builds) == 1 and cache.builds == 1 and cache.hits == 39
+    assert all(render is renders[0] for render in renders)
+
+def test_slow_build_does_not_block_other_keys(app):
+    cache = app.RenderCache()
+    started, release = threading.Event(), threading.Event()
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+    thread = threading.Thread(target=cache.get_or_build, args=("a", slow))
+    thread.start()
+    assert started.wait(5)
+    began = time.monotonic()
+    assert cache.get_or_build("b", lambda: "fast") == "fast"
+    assert time.monotonic() - began < 1
+    release.set()
+    thread.join(5)
+    assert cache.get_or_build("a", lambda: "rebuilt") == "slow"
+
+def test_build_can_use_cache(app):
+    cache = app.RenderCache()
+    assert cache.get_or_build("outer", lambda: cache.get_or_build("inner", lambda: 1) + 1) == 2
+
+def test_failed_build_is_retried(app):
+    cache = app.RenderCache()
+    def fail():
+        raise RuntimeError("build failed")
+    with pytest.raises(RuntimeError):
+        cache.get_or_build("a", fail)
+    assert cache.get_or_build("a", lambda: "ok") == "ok"
@@ -0,0 +1,63 @@
+"""BOSS名冊：版本由內容推導，移除後再加回的BOSS保留擊殺記錄"""
+import json
+
+import pytest
+
+def make_tracker(app, prefix="roster_test"):
+    return app.BossTracker(prefix, roster_store=app.RosterStore(), storage=app.StorageIO())
+
+def test_version_follows_content(app, workdir):
+    store = app.RosterStore()
+    version, roster = store.effective("g")
+    # 手動編輯檔案（沒有改版本號）也會得到新版本
+    with open("base_roster.json", encoding="utf-8") as f:
+        base = json.load(f)
+    boss_name = next(iter(base['bosses']))
+    base['bosses'][boss_name] += 1
+    with open("base_roster.json", "w", encoding="utf-8") as f:
+        json.dump(base, f, ensure_ascii=False)
+    changed, _ = store.effective("g")
+    assert changed != version
+    # 內容改回原樣時版本也回到原本的值
+    store.update_overlay("g", respawn={boss_name: roster[boss_name]})
+    assert store.effective("g")[0] == version
+
+def test_removed_boss_keeps_kill(app, workdir):
+    tracker = make_tracker(app)
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time().replace(microsecond=0).isoformat()
+    assert tracker.update_kill_times({boss_name: killed}).result(timeout=5)
+    
+    tracker.roster_store.update_overlay(tracker.group_prefix, remove=[boss_name])
+    tracker.sync_roster()
+    assert boss_name not in tracker.bosses
+    # 移除期間的其他寫入不會把記錄從檔案中刪掉
+    other = next(iter(tracker.bosses))
+    assert tracker.update_kill_times({other: killed}).result(timeout=5)
+    with open(tracker.data_file, encoding="utf-8") as f:
+        assert json.load(f)['last_killed'][boss_name] == killed
+    
+    # 重新載入後加回名冊，記錄恢復
+    reloaded = make_tracker(app)
+    reloaded.roster_store.update_overlay(reloaded.group_prefix, reset=[boss_name])
+    reloaded.sync_roster()
+    assert reloaded.bosses[boss_name]['last_killed'] == killed
+    tracker.roster_store.update_overlay(tracker.group_prefix, reset=[boss_name])
+    tracker.sync_roster()
+    assert tracker.bosses[boss_name]['last_killed'] == killed
+
+def test_failed_write_keeps_previous_roster(app, workdir, monkeypatch):
+    store = app.RosterStore()
+    version, roster = store.effective("g")
+    boss_name = next(iter(roster))
+    dump = json.dump
+    def interrupted(data, f, **kwargs):
+        f.write('{"bosses": {')  # 寫到一半中斷
+        raise OSError("磁碟已滿")
+    monkeypatch.setattr(app.json, "dump", interrupted)
+    with pytest.raises(OSError):
+        store.set_base_respawn(boss_name, roster[boss_name] + 1)
+    monkeypatch.setattr(app.json, "dump", dump)
+    with open("base_roster.json", encoding="utf-8") as f:
+        assert json.load(f)['bosses'][boss_name] == roster[boss_name]
+    assert app.RosterStore().effective("g") == (version, roster)
@@ -0,0 +1,55 @@
+"""跨群組重生時間軸：重生推算、跨日查詢時段，以及不為未載入的群組建立tracker"""
+import json
+from datetime import time
+
+import pytest
+
+def tw(app, text):
+    return app.datetime.fromisoformat(f"{text}+08:00")
+
+def test_respawns_projected_within_horizon(app):
+    start = int(tw(app, "2025-08-11T12:00:00").timestamp())
+    timeline = app.SpawnTimeline((
+        ("g1", (("A", start - 30 * 60, 60),)),         # 12:30、13:30、14:30
+        ("g2", (("B", start - 10 * 3600 - 60, 120),)), # 很久以前擊殺：從區間內的第一次重生開始（13:59）
+    ), start, horizon_hours=3)
+    df = timeline.to_dataframe()
+    spawns = [(group, boss, spawn.strftime("%H:%M")) for group, boss, spawn in zip(df['群組'], df['BOSS名稱'], df['重生時間'])]
+    assert spawns == [
+        ("g1", "A", "12:30"), ("g1", "A", "13:30"), ("g2", "B", "13:59"), ("g1", "A", "14:30"),
+    ]
+    assert list(timeline.spawn) == sorted(timeline.spawn)
+
+@pytest.mark.parametrize("now, expected", [
+    ("2025-08-11T23:00:00", ("2025-08-11T20:00:00", "2025-08-12T02:00:00")),  # 時段進行中
+    ("2025-08-11T01:00:00", ("2025-08-10T20:00:00", "2025-08-11T02:00:00")),  # 過了午夜仍在同一個時段
+    ("2025-08-11T03:00:00", ("2025-08-11T20:00:00", "2025-08-12T02:00:00")),  # 下一個時段
+])
+def test_window_wraps_past_midnight(app, now, expected):
+    window_from, window_to = app.timeline_window(tw(app, now), time(20, 0), time(2, 0))
+    assert (window_from, window_to) == (tw(app, expected[0]), tw(app, expected[1]))
+
+def test_between_uses_wrapped_window(app):
+    spawns = ["2025-08-11T19:55:00", "2025-08-11T23:55:00", "2025-08-12T01:59:00", "2025-08-12T02:00:00", "2025-08-11T19:40:00"]
+    start = int(tw(app, "2025-08-11T12:00:00").timestamp())
+    timeline = app.SpawnTimeline((("g", tuple((f"B{i}", int(tw(app, text).timestamp()) - 3600 * 24, 24 * 60)
+                                               for i, text in enumerate(spawns))),), start, horizon_hours=24)
+    window_from, window_to = app.timeline_window(tw(app, "2025-08-11T23:00:00"), time(20, 0), time(2, 0))
+    names = set(timeline.to_dataframe(timeline.between(window_from.timestamp(), window_to.timestamp()))['BOSS名稱'])
+    assert names == {"B0", "B1", "B2"}  # 19:55 的時段延續到 20:05；02:00 開始的不在時段內
+
+def test_unloaded_groups_read_from_disk(app, workdir):
+    roster_store = app.RosterStore()
+    registry = app.GroupRegistry(roster_store=roster_store, storage=app.StorageIO())
+    (first, first_config), (second, _) = list(registry.groups().items())[:2]
+    killed = tw(app, "2025-08-11T12:00:00")
+    with open(f"{first_config['file_prefix']}_boss_data.json", "w", encoding="utf-8") as f:
+        json.dump({"last_killed": {"潘納洛德": killed.isoformat(), "不在名冊": killed.isoformat()}}, f)
+    tracker = registry.get_tracker(second)
+    tracker.update_kill_times({"史坦": killed.isoformat()}).result(timeout=5)
+
+    states = dict(app.timeline_group_states(registry, roster_store))
+    assert states[first] == (("潘納洛德", int(killed.timestamp()), 180),)
+    assert states[second] == tracker.get_kill_state()
+    assert registry.loaded_tracker(first) is None
+    assert list(registry.loaded_groups()) == [second]
@@ -0,0 +1,57 @@
+"""寫入在儲存執行緒進行：記錄擊殺不等待緩慢的磁碟，寫入失敗時保持待寫入並自動重試"""
+import json
+import time
+
+import pytest
+
+SLOW_DISK_SECONDS = 2
+
+@pytest.fixture
+def tracker(app, workdir):
+    return app.BossTracker("storage", storage=app.StorageIO(delay=SLOW_DISK_SECONDS))
+
+def saved_kills(tracker):
+    with open(tracker.data_file, encoding="utf-8") as f:
+        return json.load(f)['last_killed']
+
+def test_update_returns_before_slow_write(app, tracker):
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time().replace(microsecond=0).isoformat()
+    started = time.monotonic()
+    saved = tracker.update_kill_times({boss_name: killed})
+    assert time.monotonic() - started < SLOW_DISK_SECONDS / 4
+    assert tracker.bosses[boss_name]['last_killed'] == killed  # 畫面立即使用新的數據
+    assert not saved.done() and tracker.save_status()[0] is not None
+    assert saved.result(timeout=SLOW_DISK_SECONDS * 5)
+    assert saved_kills(tracker)[boss_name] == killed
+    assert tracker.save_status() == (None, None)
+
+def test_report_returns_before_slow_write(app, tracker):
+    boss_name = next(iter(tracker.bosses))
+    killed_ts = int(app.get_taiwan_timestamp()) - 60
+    started = time.monotonic()
+    assert tracker.report_kill(boss_name, killed_ts, key="k1")[0] == "recorded"
+    assert time.monotonic() - started < SLOW_DISK_SECONDS / 4
+    assert tracker.wait_saved(timeout=SLOW_DISK_SECONDS * 5)
+    assert app.parse_iso_ts(saved_kills(tracker)[boss_name]) == killed_ts
+
+def test_failed_write_stays_dirty_and_retries(app, tracker, monkeypatch):
+    monkeypatch.setattr(app, "STORAGE_RETRY_SECONDS", 0.1)
+    tracker.storage.delay = 0
+    write = tracker._write_boss_data
+    attempts = []
+    def flaky_write(saved):
+        attempts.append(saved)
+        return "磁碟已滿" if len(attempts) == 1 else write(saved)
+    monkeypatch.setattr(tracker, "_write_boss_data", flaky_write)
+    boss_name = next(iter(tracker.bosses))
+    killed = app.get_taiwan_time().replace(microsecond=0).isoformat()
+    assert tracker.update_kill_times({boss_name: killed}).result(timeout=5) is False
+    pending, error = tracker.save_status()
+    assert pending is not None and error == "磁碟已滿"
+    deadline = time.monotonic() + 5
+    while tracker.save_status() != (None, None) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert tracker.save_status() == (None, None)
+    assert len(attempts) == 2
+    assert saved_kills(tracker)[boss_name] == killed
@@ -0,0 +1,119 @@
+"""離線同步：實際向旁路 HTTP 服務 POST /sync/<群組>"""
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+SECRET = "test-secret"
+
+@pytest.fixture
+def api(app, workdir, monkeypatch):
+    monkeypatch.setattr(app, "API_SECRET", SECRET)
+    monkeypatch.setattr(app, "STORAGE_RETRY_SECONDS", 60)  # 失敗的寫入在測試期間不自動重試
+    registry = app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+    server = ThreadingHTTPServer(("127.0.0.1", 0), app.ApiRequestHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    server.calendar = app.CalendarFeed()
+    server.warm_start = app.WarmStart()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def group(app, api):
+    group_name, config = next(iter(api.registry.groups().items()))
+    tracker = api.registry.get_tracker(group_name)
+    writes = []
+    write = tracker._write_boss_data
+    def counted_write(saved):
+        writes.append(saved)
+        return write(saved)
+    tracker._write_boss_data = counted_write
+    return config['file_prefix'], tracker, writes
+
+def post(server, path, body, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    headers = {"Content-Type": "application/json", "Content-Length": str(len(data)), **(headers or {})}
+    connection.request("POST", path, body=data, headers=headers)
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read() or b"null")
+    connection.close()
+    return result
+
+def sync_path(app, prefix, token=None):
+    return f"/sync/{prefix}?token={app.api_token(prefix) if token is None else token}"
+
+def test_bad_or_rotated_token_is_forbidden(app, api, group, monkeypatch):
+    prefix, tracker, writes = group
+    kills = {"kills": [["k1", next(iter(tracker.bosses)), int(app.get_taiwan_timestamp())]]}
+    assert post(api, sync_path(app, prefix, token="0" * 32), kills)[0] == 403
+    assert post(api, f"/sync/{prefix}", kills)[0] == 403
+    old_token = app.api_token(prefix)
+    monkeypatch.setattr(app, "API_SECRET", "rotated-secret")  # 換密鑰後舊網址失效
+    assert post(api, sync_path(app, prefix, token=old_token), kills)[0] == 403
+    assert writes == []
+
+def test_replayed_key_is_applied_once(app, api, group):
+    prefix, tracker, writes = group
+    boss_name = next(iter(tracker.bosses))
+    killed_ts = int(app.get_taiwan_timestamp()) - 600
+    kills = {"kills": [["k1", boss_name, killed_ts]]}
+    assert post(api, sync_path(app, prefix), kills) == (200, {"acked": ["k1"], "applied": 1})
+    assert post(api, sync_path(app, prefix), kills) == (200, {"acked": ["k1"], "applied": 0})
+    # 同一個冪等鍵帶不同時間重送也不會再套用
+    assert post(api, sync_path(app, prefix), {"kills": [["k1", boss_name, killed_ts + 300]]})[1]['applied'] == 0
+    assert app.parse_iso_ts(tracker.bosses[boss_name]['last_killed']) == killed_ts
+    assert len(writes) == 1
+
+def test_batch_is_written_once(app, api, group):
+    prefix, tracker, writes = group
+    now_ts = int(app.get_taiwan_timestamp())
+    names = list(tracker.bosses)[:5]
+    kills = {"kills": [[f"k{i}", name, now_ts - 60 * i] for i, name in enumerate(names)]}
+    status, result = post(api, sync_path(app, prefix), kills)
+    assert status == 200 and result['applied'] == len(names)
+    assert len(writes) == 1
+    assert set(writes[0][app.DEFAULT_CHANNEL][0]) == set(names)
+
+def test_ack_withheld_when_write_fails(app, api, group):
+    prefix, tracker, writes = group
+    tracker._write_boss_data = lambda saved: "磁碟已滿"
+    boss_name = next(iter(tracker.bosses))
+    kills = {"kills": [["k1", boss_name, int(app.get_taiwan_timestamp())]]}
+    assert post(api, sync_path(app, prefix), kills) == (200, {"acked": [], "applied": 0})
+    assert tracker.save_status()[1] == "磁碟已滿"
+
+def test_invalid_entries_rejected_individually(app, api, group):
+    prefix, tracker, writes = group
+    names = list(tracker.bosses)
+    now_ts = int(app.get_taiwan_timestamp())
+    tracker.update_kill_times({names[1]: app.datetime.fromtimestamp(now_ts - 60, app.TW_TZ).isoformat()}).result(timeout=5)
+    kills = {"kills": [
+        ["ok", names[0], now_ts - 120],
+        ["stale", names[1], now_ts - 3600],                                         # 比現有記錄舊
+        ["old", names[2], now_ts - app.REPORT_MAX_AGE_DAYS * 86400 - 60],           # 超過保留天數
+        ["future", names[3], now_ts + app.TIME_PARSE_FUTURE_GRACE_SECONDS + 600],  # 未來時間
+        ["unknown", "不存在的BOSS", now_ts],
+        ["channel", names[4], now_ts, 99],
+    ]}
+    status, result = post(api, sync_path(app, prefix), kills)
+    # 全部確認（避免裝置無限重送），只有有效的一筆被套用
+    assert status == 200 and result == {"acked": [kill[0] for kill in kills["kills"]], "applied": 1}
+    assert app.parse_iso_ts(tracker.bosses[names[0]]['last_killed']) == now_ts - 120
+    assert app.parse_iso_ts(tracker.bosses[names[1]]['last_killed']) == now_ts - 60
+    assert tracker.bosses[names[2]]['last_killed'] is None
+    assert tracker.bosses[names[3]]['last_killed'] is None
+
+def test_bad_content_length(app, api, group):
+    prefix, _, writes = group
+    path = sync_path(app, prefix)
+    assert post(api, path, b'{"kills": []}', {"Content-Length": "abc"})[0] == 400
+    assert post(api, path, b'{"kills": []}', {"Content-Length": "-1"})[0] == 400
+    assert post(api, path, b'{"kills": []}', {"Content-Length": str(app.SYNC_MAX_BODY_BYTES + 1)})[0] == 413
+    assert post(api, path, b'not json')[0] == 400
+    assert writes == []
@@ -0,0 +1,63 @@
+"""表格選取：只有目前頁面上看得到的行才會被快速更新使用"""
+import json
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+
+PREFIX = "erika1"
+
+@pytest.fixture
+def page(workdir):
+    with open("groups.json", encoding="utf-8") as f:
+        groups = json.load(f)
+    group_name = next(name for name, config in groups.items() if config['file_prefix'] == PREFIX)
+    groups[group_name]['channels'] = 20  # 多頁表格
+    with open("groups.json", "w", encoding="utf-8") as f:
+        json.dump(groups, f, ensure_ascii=False)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.session_state['selected_group'] = group_name
+    at.run()
+    at.selectbox(key=f"channel_view_{PREFIX}").set_value(None)
+    at.run()
+    assert not at.exception
+    return at
+
+def quick_update_shown(at):
+    return any("快速更新：" in markdown.value for markdown in at.markdown)
+
+def first_row(at):
+    row = at.dataframe[0].value.iloc[0]
+    return row['BOSS名稱'], int(row['頻道'].rstrip('頻'))
+
+def test_selection_on_page_is_used(page):
+    page.session_state[f"table_selection_{PREFIX}"] = first_row(page)
+    page.run()
+    assert quick_update_shown(page)
+
+def test_selection_off_page_is_ignored(page):
+    page.session_state[f"table_selection_{PREFIX}"] = first_row(page)
+    page.number_input(key=f"table_page_{PREFIX}").set_value(3)
+    page.run()
+    assert not page.exception and not quick_update_shown(page)
+
+def test_selection_filtered_out_or_live_is_ignored(page):
+    boss_name, channel = first_row(page)
+    page.session_state[f"table_selection_{PREFIX}"] = (boss_name, channel)
+    page.text_input(key=f"name_filter_{PREFIX}").set_value("不存在的BOSS")
+    page.run()
+    assert not quick_update_shown(page)
+    page.text_input(key=f"name_filter_{PREFIX}").set_value("")
+    page.toggle(key=f"live_countdown_{PREFIX}").set_value(True)
+    page.run()
+    assert not page.exception and not quick_update_shown(page)
+
+def test_deselect_button(page):
+    page.session_state[f"table_selection_{PREFIX}"] = first_row(page)
+    page.run()
+    page.button(key="quick_deselect").click()
+    page.run()
+    assert page.session_state[f"table_selection_{PREFIX}"] is None
+    assert not quick_update_shown(page)
@@ -0,0 +1,53 @@
+"""時間輸入解析：固定案例與以 hypothesis 產生的任意輸入"""
+from datetime import datetime, timedelta
+
+import pytest
+from hypothesis import given, settings, strategies as st
+
+@pytest.fixture(scope="module")
+def parser(app):
+    return app.get_time_parser()
+
+@pytest.fixture(scope="module")
+def now(app):
+    return datetime(2025, 8, 11, 16, 30, 45, tzinfo=app.TW_TZ)
+
+@pytest.mark.parametrize("text, expected", [
+    ("剛剛", datetime(2025, 8, 11, 16, 30, 45)),
+    ("-5m", datetime(2025, 8, 11, 16, 25, 45)),
+    ("-1h30m", datetime(2025, 8, 11, 15, 0, 45)),
+    ("1小時20分前", datetime(2025, 8, 11, 15, 10, 45)),
+    ("30秒前", datetime(2025, 8, 11, 16, 30, 15)),
+    ("2025/08/10 23:59", datetime(2025, 8, 10, 23, 59, 0)),
+    ("0811/163000", datetime(2025, 8, 11, 16, 30, 0)),
+    ("08/12 10:00", datetime(2024, 8, 12, 10, 0, 0)),
+    ("16:00", datetime(2025, 8, 11, 16, 0, 0)),
+    ("1700", datetime(2025, 8, 10, 17, 0, 0)),
+])
+def test_known_formats(app, parser, now, text, expected):
+    assert parser.parse(text, now) == expected.replace(tzinfo=app.TW_TZ)
+
+@pytest.mark.parametrize("text", ["-99999999999h", "99999999999分鐘前", "-99999999999999999999s", "25:00", "1332/120000", "亂打"])
+def test_out_of_range_returns_none(parser, now, text):
+    assert parser.parse(text, now) is None
+
+@settings(max_examples=300, deadline=None)
+@given(st.text(alphabet="0123456789:/- hms分鐘秒小時前剛現在Tnow", max_size=24))
+def test_never_raises(parser, now, text):
+    result = parser.parse(text, now)
+    assert result is None or result.tzinfo is not None
+
+@settings(max_examples=300, deadline=None)
+@given(st.integers(min_value=0, max_value=10**12), st.integers(min_value=0, max_value=10**12))
+def test_relative_is_past_or_none(parser, now, hours, minutes):
+    for text in (f"-{hours}h{minutes}m", f"{hours}小時{minutes}分前"):
+        result = parser.parse(text, now)
+        if result is not None:
+            assert result == now - timedelta(hours=hours, minutes=minutes)
+
+@settings(max_examples=300, deadline=None)
+@given(st.integers(min_value=0, max_value=23), st.integers(min_value=0, max_value=59), st.integers(min_value=0, max_value=59))
+def test_time_of_day_is_nearest_past(app, parser, now, hour, minute, second):
+    result = parser.parse(f"{hour:02d}:{minute:02d}:{second:02d}", now)
+    assert (result.hour, result.minute, result.second) == (hour, minute, second)
+    assert now - timedelta(days=1) <= result <= now + timedelta(seconds=app.TIME_PARSE_FUTURE_GRACE_SECONDS)
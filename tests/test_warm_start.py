@@ -0,0 +1,45 @@
+"""啟動預先載入：只載入最近使用的群組，並遵守記憶體上限"""
+import os
+import time
+
+import pytest
+
+@pytest.fixture
+def registry(app, workdir):
+    return app.GroupRegistry(roster_store=app.RosterStore(), storage=app.StorageIO())
+
+def run(app, registry):
+    warm = app.WarmStart()
+    warm._registry = registry
+    warm.started_at = time.monotonic()
+    warm._preload_all(registry, app.RenderCache(), {})
+    return warm
+
+def test_preloads_most_recent_groups(app, registry, monkeypatch):
+    monkeypatch.setattr(app, "WARM_START_GROUPS", 2)
+    groups = registry.groups()
+    recent = list(groups)[-2:]
+    for offset, group_name in enumerate(recent, 1):
+        path = f"{groups[group_name]['file_prefix']}_boss_data.json"
+        if not os.path.exists(path):
+            open(path, "w").write('{"last_killed": {}}')
+        os.utime(path, (time.time() + offset, time.time() + offset))
+    warm = run(app, registry)
+    assert sorted(warm.timings) == sorted(recent) and not warm.errors
+    assert sorted(warm.skipped) == sorted(set(groups) - set(recent))
+    assert sorted(registry.loaded_groups()) == sorted(recent)
+    status = warm.status()
+    assert status['ready'] and status['loaded_groups'] == 2
+
+def test_stops_at_memory_cap(app, registry, monkeypatch):
+    monkeypatch.setattr(app, "WARM_START_GROUPS", 0)
+    monkeypatch.setattr(app, "WARM_START_WORKERS", 1)
+    monkeypatch.setattr(app, "TRACKER_MEMORY_CAP_BYTES", 1)
+    warm = run(app, registry)
+    assert len(warm.timings) == 1
+    assert len(warm.skipped) == len(registry.groups()) - 1
+    assert len(registry.loaded_groups()) == 1
+
+def test_history_preload_is_public(app, workdir):
+    history = app.KillHistory("warm")
+    assert history.preload() == 0
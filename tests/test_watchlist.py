@@ -0,0 +1,48 @@
+"""成員關注清單：保存與讀取，以及以位元遮罩篩選表格與即將重生清單"""
+import pytest
+
+START_TS = 1_700_000_000
+
+@pytest.fixture
+def clock(app):
+    clock = app.ManualClock(START_TS)
+    previous = app.set_clock(clock)
+    yield clock
+    app.set_clock(previous)
+
+def test_store_round_trip(app, workdir):
+    store = app.WatchlistStore()
+    store.set("member-1", "g1", ["巨蟻女王", "潘納洛德"])
+    store.set("member-1", "g2", ["史坦"])
+    assert app.WatchlistStore().get("member-1", "g1") == ["巨蟻女王", "潘納洛德"]
+    store.set("member-1", "g1", [])
+    store.set("member-1", "g2", [])
+    assert app.WatchlistStore()._read() == {'members': {}}
+    assert app.valid_member_id("member_1") and not app.valid_member_id("../x") and not app.valid_member_id("")
+
+def test_mask_helpers(app):
+    index = app.BossNameIndex({name: {'respawn_minutes': i} for i, name in enumerate("ABCDE")})
+    mask = index.mask(["B", "D", "不在名冊"])
+    assert app.mask_positions(mask) == [1, 3]
+    assert list(app.mask_array(mask, 5)) == [False, True, False, True, False]
+    assert app.mask_positions(app.spread_mask(mask, 2, 5)) == [1, 3, 6, 8]
+
+def test_filters_match_dataframe(app, workdir, clock):
+    tracker = app.BossTracker("watch", channel_count=2, storage=app.StorageIO())
+    names = tracker.name_index.sorted_names
+    now = app.get_taiwan_time()
+    tracker.update_kill_times({names[0]: (now - app.timedelta(days=1)).isoformat(), names[1]: now.isoformat()}, now, 1).result(timeout=5)
+    tracker.update_kill_times({names[1]: now.isoformat(), names[2]: now.isoformat()}, now, 2).result(timeout=5)
+    channels = (1, 2)
+    render = tracker.build_render_snapshot(START_TS // 60 * 60, channels)
+    df = render['table']
+    watchlist = [names[0], names[1], names[3]]
+    watch_mask = tracker.name_index.mask(watchlist)
+    rows = app.spread_mask(watch_mask, len(channels), len(names)) & render['status_bits']['waiting']
+    expected = df.index[df['BOSS名稱'].isin(watchlist) & (df['_status_type'] == 'waiting')]
+    assert app.mask_positions(rows) == list(expected)
+    # 即將重生清單以BOSS位置與關注遮罩篩選
+    clock.advance(tracker.bosses[names[1]]['respawn_minutes'] * 60 - 120)
+    upcoming = tracker.get_upcoming_bosses(5, channels=channels)
+    watched = [boss['channel'] for boss in upcoming if watch_mask >> boss['position'] & 1]
+    assert watched == [1, 2]